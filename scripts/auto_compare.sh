@@ -1,31 +1,20 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-REF="${1:?Usage: auto_compare.sh /path/to/ref.pdf /path/to/gen.pdf}"
-GEN="${2:?Usage: auto_compare.sh /path/to/ref.pdf /path/to/gen.pdf}"
+REF="${1:?Usage: auto_compare.sh /path/to/ref.pdf /path/to/gen.pdf [outdir] [pdf_compare.py options]}"
+GEN="${2:?Usage: auto_compare.sh /path/to/ref.pdf /path/to/gen.pdf [outdir] [pdf_compare.py options]}"
 OUTDIR="${3:-/tmp/pdfdiff}"
+shift $(( $# < 3 ? $# : 3 ))
 
-mkdir -p "$OUTDIR/ref" "$OUTDIR/gen" "$OUTDIR/diff"
+DIR="$(cd "$(dirname "$0")" && pwd)"
+mkdir -p "$OUTDIR/diff"
 
-# Render both PDFs to PNG at 150 DPI
-pdftoppm -png -r 150 "$REF" "$OUTDIR/ref/page"
-pdftoppm -png -r 150 "$GEN" "$OUTDIR/gen/page"
+# Render page by page into a fresh run dir, compare in parallel (NumPy), write a JSON report.
+# Exit status is non-zero when any page fails, so this can gate a run.
+python3 "$DIR/pdf_compare.py" "$REF" "$GEN" \
+  --work-dir "$OUTDIR" \
+  --diff-dir "$OUTDIR/diff" \
+  --report "$OUTDIR/diff/compare.json" \
+  "$@"
 
-# Compare page by page
-rm -f "$OUTDIR/diff/compare.txt"
-for ref_img in "$OUTDIR/ref"/*.png; do
-  base=$(basename "$ref_img")
-  gen_img="$OUTDIR/gen/$base"
-  if [[ ! -f "$gen_img" ]]; then
-    echo "$base missing in generated" >> "$OUTDIR/diff/compare.txt"
-    continue
-  fi
-  # Generate diff image and metric
-  diff_img="$OUTDIR/diff/$base"
-  # compare returns metric on stderr
-  metric=$(compare -metric AE "$ref_img" "$gen_img" "$diff_img" 2>&1 || true)
-  echo "$base $metric" >> "$OUTDIR/diff/compare.txt"
-
-done
-
-echo "[OK] Diff report: $OUTDIR/diff/compare.txt"
+echo "[OK] Diff report: $OUTDIR/diff/compare.json"
@@ -1,13 +1,26 @@
 #!/usr/bin/env python3
 import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 from pathlib import Path
 import re
 import os
 import zipfile
 import pandas as pd
-import openpyxl
-from openpyxl.cell.cell import MergedCell
+
+# shared pipeline modules live in scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from export1_xlsx import table_from_export1, write_parsed_csv, write_parsed_parquet, write_parsed_xlsx  # noqa: E402
+from job_table import JobTable  # noqa: E402
+from policy_rules import RuleSet, SPLIT_RULES, load_rules, split_labels  # noqa: E402
+from remarks import THRESHOLDS, WINDOW_DAYS, build_remarks, compute_deltas, history_matrix, load_thresholds  # noqa: E402
+from rollup import STORE_DEFAULT as ROLLUP_STORE, load_store  # noqa: E402
+from sheet_xml import (  # noqa: E402
+    formula_cell, merged_children, read_cells, rewrite_zip_entries, set_cells, shared_strings, sheet_part, split_ref,
+    text_cell,
+)
+from status_api import policy_status, write_status  # noqa: E402
 
 
 def read_excel_with_retry(path, sheet_name, header=None, engine="openpyxl", retries=5, delay=1.0):
@@ -27,117 +40,23 @@ HEADER_ROW = [
     "Start", "Time", "Elapsed", "Time.1", "End", "Time.2", "Unit"
 ]
 
-# Column indices in Export1.xlsx (0-based)
-COL_POLICY = 4
-COL_START_Y = 8
-COL_START_M = 9
-COL_START_D = 10
-COL_START_AMPM = 11
-COL_START_TIME = 12
-COL_ELAPSED = 13
-COL_END_Y = 14
-COL_END_M = 15
-COL_END_D = 16
-COL_END_AMPM = 17
-COL_END_TIME = 18
-COL_STORAGE_UNIT = 19
-COL_UNIT = 21
-
 REPORT_GLOB = "/home/owen/벽산 리포트_백업상태_최종(양식)_*.xlsx"
 
+REPORT_SHEET = "백업상태 점검_일일점검"
 
-TEMPLATE_PATH = "/home/owen/벽산 리포트_백업상태_최종(양식).xlsx"
 
+def job_table_from_raw(raw: pd.DataFrame, include_all_dates: bool = False, split_rules=SPLIT_RULES) -> JobTable:
+    return report_table(table_from_export1(raw.iloc[1:].reset_index(drop=True)), include_all_dates, split_rules)
 
-def build_parsed_df(export1_path: str, include_all_dates: bool = False) -> pd.DataFrame:
-    raw = read_excel_with_retry(export1_path, sheet_name="Export1", header=None)
-    raw = raw.iloc[1:].reset_index(drop=True)
 
-    rows = []
-    for _, r in raw.iterrows():
-        policy = r[COL_POLICY]
-        if pd.isna(policy):
-            continue
-        row = {
-            "Policy": str(policy).strip(),
-            "Start_Y": r[COL_START_Y],
-            "Start_M": r[COL_START_M],
-            "Start_D": r[COL_START_D],
-            "Start_AMPM": r[COL_START_AMPM],
-            "Start_Time": r[COL_START_TIME],
-            "Elapsed": r[COL_ELAPSED],
-            "End_Y": r[COL_END_Y],
-            "End_M": r[COL_END_M],
-            "End_D": r[COL_END_D],
-            "End_AMPM": r[COL_END_AMPM],
-            "End_Time": r[COL_END_TIME],
-            "Storage_Unit": r[COL_STORAGE_UNIT],
-            "Unit": r[COL_UNIT],
-        }
-        rows.append(row)
-
-    if include_all_dates:
-        filtered = rows
-    else:
+def report_table(table: JobTable, include_all_dates: bool = False, split_rules=SPLIT_RULES) -> JobTable:
+    """Report rows of the parsed Export1 table (all rows, unsplit policies)."""
+    if not include_all_dates:
         # latest date per policy
-        latest_date = {}
-        for row in rows:
-            try:
-                d = datetime(int(row["End_Y"]), int(row["End_M"]), int(row["End_D"])).date()
-            except Exception:
-                continue
-            pol = row["Policy"]
-            if pol not in latest_date or d > latest_date[pol]:
-                latest_date[pol] = d
-
-        # filter to latest date rows only
-        filtered = []
-        for row in rows:
-            pol = row["Policy"]
-            try:
-                d = datetime(int(row["End_Y"]), int(row["End_M"]), int(row["End_D"])).date()
-            except Exception:
-                continue
-            if latest_date.get(pol) == d:
-                filtered.append(row)
+        table = table.take(table.latest_date_mask())
 
-    # HZDB_MSSQL split labeling
-    for row in filtered:
-        if row["Policy"] == "HZDB_MSSQL":
-            try:
-                unit = int(str(row["Unit"]).replace(",", ""))
-            except Exception:
-                unit = None
-            if unit is None:
-                continue
-            if 8000 <= unit < 10000:
-                row["Policy"] = "HZDB_MSSQL_ReportServer"
-            elif 1000000 <= unit < 2000000:
-                row["Policy"] = "HZDB_MSSQL_SMS"
-            else:
-                row["Policy"] = "HZDB_MSSQL_NEOE"
-
-    # build output rows with header row exactly like test.xlsx
-    out_rows = [HEADER_ROW]
-    for row in filtered:
-        out_rows.append([
-            row["Policy"],
-            row["Start_Y"],
-            row["Start_M"],
-            row["Start_D"],
-            row["Start_AMPM"],
-            row["Start_Time"],
-            row["Elapsed"],
-            row["End_Y"],
-            row["End_M"],
-            row["End_D"],
-            row["End_AMPM"],
-            row["End_Time"],
-            row["Storage_Unit"],
-            row["Unit"],
-        ])
-
-    return pd.DataFrame(out_rows)
+    # policy splits (e.g. HZDB_MSSQL by unit range), evaluated over the whole column
+    return table.relabel(RuleSet(split_rules))
 
 
 def _parse_unit_from_cell(cell_value):
@@ -161,20 +80,14 @@ def _parse_unit_from_cell(cell_value):
     return None
 
 
-def _format_gb(val: float) -> str:
-    # keep two decimals if needed, else integer
-    if val is None:
-        return ""
-    if abs(val - round(val)) < 0.005:
-        return str(int(round(val)))
-    return f"{val:.2f}"
-
-
 def _find_previous_report(current_report: str) -> str | None:
-    # find latest dated report before today (by filename tag)
+    # find latest dated report before today (by filename tag) next to current_report, never itself
+    current = Path(current_report)
     candidates = []
-    for p in Path("/home/owen").glob("벽산 리포트_백업상태_최종(양식)_*.xlsx"):
+    for p in current.parent.glob(Path(REPORT_GLOB).name):
         name = p.name
+        if name == current.name:
+            continue
         m = re.search(r"_(\d{8})(?:_\d{6})?\.xlsx$", name)
         if not m:
             continue
@@ -189,172 +102,157 @@ def _find_previous_report(current_report: str) -> str | None:
         return None
 
     candidates.sort()
-    # choose latest before today, else latest overall
+    # choose latest before today, else latest overall except today's (an earlier run's output)
     today = date.today()
     before = [c for c in candidates if c[0] < today]
     if before:
         return before[-1][1]
-    return candidates[-1][1]
+    others = [c for c in candidates if c[0] != today]
+    return others[-1][1] if others else None
 
 
-def _read_previous_values(prev_report: str) -> dict:
-    wb = openpyxl.load_workbook(prev_report, data_only=False)
-    ws = wb["백업상태 점검_일일점검"]
+def _read_report_sheet(report_path: str):
+    with zipfile.ZipFile(report_path, "r") as zf:
+        part = sheet_part(zf, REPORT_SHEET)
+        sheet_xml = zf.read(part).decode("utf-8")
+        strings = shared_strings(zf)
+    return part, sheet_xml, read_cells(sheet_xml, strings)
+
+
+def _row_keys(cells: dict, split_rules=SPLIT_RULES, max_row: int = 200) -> dict:
+    # report key per row: split label in D wins over policy in C
+    label_map = split_labels(split_rules)
+    row_keys = {}
+    for row_num in range(1, max_row + 1):
+        pol, _ = cells.get(f"C{row_num}", (None, None))
+        label, _ = cells.get(f"D{row_num}", (None, None))
+        label = label.strip() if isinstance(label, str) else ""
+        pol = pol.strip() if isinstance(pol, str) else ""
+        key = label_map.get(label) or pol
+        if key:
+            row_keys[row_num] = key
+    return row_keys
 
-    prev = {}
-    # policy rows (col C)
-    for row in ws.iter_rows(min_row=1, max_row=200, min_col=3, max_col=3):
-        cell = row[0]
-        v = cell.value
-        if isinstance(v, str):
-            pol = v.strip()
-            gb = _parse_unit_from_cell(ws.cell(cell.row, 5).value)
-            if gb is not None:
-                prev[pol] = gb
-
-    # HZDB split rows by label in col D
-    label_map = {
-        "ReportServer": "HZDB_MSSQL_ReportServer",
-        "SMS": "HZDB_MSSQL_SMS",
-        "NEOE": "HZDB_MSSQL_NEOE",
-    }
-    for row in ws.iter_rows(min_row=1, max_row=200, min_col=4, max_col=4):
-        cell = row[0]
-        v = cell.value
-        if isinstance(v, str) and v.strip() in label_map:
-            key = label_map[v.strip()]
-            gb = _parse_unit_from_cell(ws.cell(cell.row, 5).value)
-            if gb is not None:
-                prev[key] = gb
 
+def _read_previous_values(prev_report: str, split_rules=SPLIT_RULES) -> dict:
+    _, _, cells = _read_report_sheet(prev_report)
+
+    prev = {}
+    for row_num, key in _row_keys(cells, split_rules).items():
+        value, formula = cells.get(f"E{row_num}", (None, None))
+        gb = _parse_unit_from_cell(f"={formula}" if formula else value)
+        if gb is not None:
+            prev[key] = gb
     return prev
 
 
-def restore_sheet1_assets(template_path: str, report_path: str):
-    # Preserve Sheet1 drawings/images by copying parts from the template.
-    if not Path(template_path).exists():
-        print(f"[WARN] template missing: {template_path}")
-        return
-
-    def should_override(name: str) -> bool:
-        if name in ("[Content_Types].xml", "xl/worksheets/sheet1.xml", "xl/worksheets/_rels/sheet1.xml.rels"):
-            return True
-        if name.startswith(("xl/media/", "xl/drawings/", "xl/ink/", "xl/printerSettings/")):
-            return True
-        return False
-
-    def should_copy_missing(name: str) -> bool:
-        if should_override(name):
-            return True
-        if name in ("xl/sharedStrings.xml", "xl/calcChain.xml", "xl/worksheets/_rels/sheet2.xml.rels"):
-            return True
-        return False
-
-    tmp_path = report_path + ".tmp"
-    with zipfile.ZipFile(report_path, "r") as z_out, zipfile.ZipFile(template_path, "r") as z_tpl:
-        out_names = set(z_out.namelist())
-        tpl_names = set(z_tpl.namelist())
-        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as z_new:
-            for name in out_names:
-                if should_override(name) and name in tpl_names:
-                    z_new.writestr(name, z_tpl.read(name))
-                else:
-                    z_new.writestr(name, z_out.read(name))
-            for name in tpl_names - out_names:
-                if should_copy_missing(name):
-                    z_new.writestr(name, z_tpl.read(name))
-    os.replace(tmp_path, report_path)
-
-
-def update_report(report_path: str, parsed_path: str):
-    parsed = pd.read_excel(parsed_path, sheet_name="Export1", header=None)
-    parsed = parsed.iloc[1:].reset_index(drop=True)
-
-    policy_col = 0
-    unit_col = 13
-    parsed[unit_col] = pd.to_numeric(parsed[unit_col], errors="coerce").fillna(0)
-
-    agg = parsed.groupby(policy_col)[unit_col].sum()
+def _load_previous_values(report_path: str, split_rules=SPLIT_RULES) -> dict:
+    prev_report = _find_previous_report(report_path)
+    return _read_previous_values(prev_report, split_rules) if prev_report else {}
+
+
+def _load_rollup_store():
+    return load_store(ROLLUP_STORE) if os.path.exists(ROLLUP_STORE) else None
+
+
+def update_report(
+    report_path: str,
+    table: JobTable,
+    split_rules=SPLIT_RULES,
+    thresholds=THRESHOLDS,
+    template_path: str | None = None,
+    prev_values: dict | None = None,
+    sheet=None,
+    store=None,
+):
+    """Fill the report sheet; returns per-key status (totals, deltas, remarks).
+
+    Inputs already loaded by the caller (prefetch) are reused.
+
+    With ``template_path`` the workbook is built from the template straight into
+    ``report_path`` (no separate copy step).
+    """
+    agg = table.sum_kb_by_policy()
 
     # current gb values by key
     current_gb = {k: v / 1024 / 1024 for k, v in agg.items()}
 
-    prev_report = _find_previous_report(report_path)
-    prev_values = _read_previous_values(prev_report) if prev_report else {}
-
-    wb = openpyxl.load_workbook(report_path)
-    ws = wb["백업상태 점검_일일점검"]
+    if prev_values is None:
+        prev_values = _load_previous_values(report_path, split_rules)
+    if sheet is None:
+        sheet = _read_report_sheet(template_path or report_path)
+    if store is None:
+        store = _load_rollup_store()
+    part, sheet_xml, cells = sheet
+    updates = {}
 
     # update inspection date
-    for row in ws.iter_rows(min_row=1, max_row=10, min_col=1, max_col=10):
-        for cell in row:
-            v = cell.value
-            if isinstance(v, str) and "점검일시" in v:
-                cell.value = f"점검일시 : {date.today().isoformat()}"
-
-    # fill backup volume for policy rows (col C => col E)
-    for row in ws.iter_rows(min_row=1, max_row=200, min_col=3, max_col=3):
-        cell = row[0]
-        v = cell.value
-        if isinstance(v, str):
-            pol = v.strip()
-            if pol in agg:
-                unit_sum = int(agg[pol])
-                ws.cell(cell.row, 5).value = f"={unit_sum}/(1024*1024)"
-
-    # HZDB_MSSQL split rows in col D
-    label_map = {
-        "ReportServer": "HZDB_MSSQL_ReportServer",
-        "SMS": "HZDB_MSSQL_SMS",
-        "NEOE": "HZDB_MSSQL_NEOE",
-    }
-    for row in ws.iter_rows(min_row=1, max_row=200, min_col=4, max_col=4):
-        cell = row[0]
-        v = cell.value
-        if isinstance(v, str) and v.strip() in label_map:
-            pol = label_map[v.strip()]
-            if pol in agg:
-                unit_sum = int(agg[pol])
-                ws.cell(cell.row, 5).value = f"={unit_sum}/(1024*1024)"
-
-    # update remarks if delta >= 10GB, except ERP-APP
-    for row in ws.iter_rows(min_row=1, max_row=200, min_col=3, max_col=8):
-        policy_cell = row[0]  # col C
-        remark_cell = row[5]  # col H
-        pol = policy_cell.value.strip() if isinstance(policy_cell.value, str) else ""
-        if not pol:
-            continue
-        if isinstance(remark_cell, MergedCell):
+    for ref, (v, _) in cells.items():
+        col, row_num = split_ref(ref)
+        if col <= 10 and row_num <= 10 and isinstance(v, str) and "점검일시" in v:
+            updates[ref] = text_cell(f"점검일시 : {date.today().isoformat()}")
+
+    row_keys = _row_keys(cells, split_rules)
+
+    # fill backup volume (col E), cached value so the file reads correctly before recalculation
+    for row_num, key in row_keys.items():
+        if key in agg:
+            updates[f"E{row_num}"] = formula_cell(f"{int(agg[key])}/(1024*1024)", current_gb[key])
+
+    # remarks (col H): deltas for all keys in one pass, thresholds per policy
+    keys = list(current_gb)
+    history = history_matrix(store, keys, date.today(), WINDOW_DAYS) if store else None
+    deltas = compute_deltas(current_gb, prev_values, history, keys)
+    remarks = build_remarks(deltas, thresholds)
+    merged = merged_children(sheet_xml)
+    for row_num, key in row_keys.items():
+        text = remarks.get(key)
+        if text is None or (8, row_num) in merged:
             continue
-        if pol == "ERP-APP":
-            # keep existing remark
-            continue
-        if pol in current_gb and pol in prev_values:
-            cur = current_gb[pol]
-            prev = prev_values[pol]
-            diff = cur - prev
-            if abs(diff) >= 10:
-                trend = "증가" if diff > 0 else "감소"
-                remark_cell.value = f"{_format_gb(prev)}GB -> {_format_gb(cur)}GB ({_format_gb(abs(diff))}GB{trend})"
-
-    # HZDB split remark rows by label in col D
-    for row in ws.iter_rows(min_row=1, max_row=200, min_col=4, max_col=8):
-        label_cell = row[0]  # col D
-        remark_cell = row[4]  # col H
-        label = label_cell.value.strip() if isinstance(label_cell.value, str) else ""
-        if label in label_map:
-            if isinstance(remark_cell, MergedCell):
-                continue
-            key = label_map[label]
-            if key in current_gb and key in prev_values:
-                cur = current_gb[key]
-                prev = prev_values[key]
-                diff = cur - prev
-                if abs(diff) >= 10:
-                    trend = "증가" if diff > 0 else "감소"
-                    remark_cell.value = f"{_format_gb(prev)}GB -> {_format_gb(cur)}GB ({_format_gb(abs(diff))}GB{trend})"
-
-    wb.save(report_path)
+        updates[f"H{row_num}"] = text_cell(text)
+
+    # only the sheet part is rewritten; drawings/images/other sheets stay byte-identical
+    sheet_xml, _ = set_cells(sheet_xml, updates)
+    rewrite_zip_entries(report_path, {part: sheet_xml.encode("utf-8")}, src_path=template_path)
+    return policy_status(agg, deltas, remarks)
+
+
+def run_report(
+    report_path: str,
+    load_table,
+    split_rules=SPLIT_RULES,
+    thresholds=THRESHOLDS,
+    template_path: str | None = None,
+    on_table=None,
+):
+    """Fill the report with its inputs fetched concurrently; returns (per-key status, table).
+
+    ``load_table()`` builds the job table while the previous report, the
+    template sheet and the rollup store are read (slow WSL/OneDrive paths).
+    ``on_table(table, pool)`` may start more work on the table and return
+    futures that are awaited before returning.
+    """
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        table_f = pool.submit(load_table)
+        prev_f = pool.submit(_load_previous_values, report_path, split_rules)
+        sheet_f = pool.submit(_read_report_sheet, template_path or report_path)
+        store_f = pool.submit(_load_rollup_store)
+
+        table = table_f.result()
+        pending = on_table(table, pool) if on_table else []
+        policies = update_report(
+            report_path,
+            table,
+            split_rules,
+            thresholds,
+            template_path=template_path,
+            prev_values=prev_f.result(),
+            sheet=sheet_f.result(),
+            store=store_f.result(),
+        )
+        for f in pending:
+            f.result()
+    return policies, table
 
 
 def main():
@@ -362,17 +260,50 @@ def main():
     ap.add_argument("--export1", default="/home/owen/Export1.xlsx")
     ap.add_argument("--parsed", required=True)
     ap.add_argument("--report", required=True)
+    ap.add_argument("--template", help="Build --report from this template (instead of a pre-copied report)")
     ap.add_argument("--all-dates", action="store_true", help="Include all dates (no latest-date filtering)")
+    ap.add_argument("--parsed-csv", help="Also write the parsed rows as CSV")
+    ap.add_argument("--parsed-parquet", help="Also write the parsed rows as Parquet (needs pyarrow)")
+    ap.add_argument("--remark-thresholds", help="JSON file with per-policy remark thresholds")
+    ap.add_argument("--split-rules", help="JSON file with policy split rules (default: built-in HZDB_MSSQL rules)")
     args = ap.parse_args()
-
-    parsed_df = build_parsed_df(args.export1, include_all_dates=args.all_dates)
-    with pd.ExcelWriter(args.parsed, engine="openpyxl") as writer:
-        parsed_df.to_excel(writer, sheet_name="Export1", header=False, index=False)
-
-    update_report(args.report, args.parsed)
-    restore_sheet1_assets(TEMPLATE_PATH, args.report)
+    started = datetime.now()
+
+    split_rules = load_rules(args.split_rules) if args.split_rules else SPLIT_RULES
+    thresholds = load_thresholds(args.remark_thresholds) if args.remark_thresholds else THRESHOLDS
+
+    def load_table():
+        raw = read_excel_with_retry(args.export1, "Export1", None)
+        return job_table_from_raw(raw, include_all_dates=args.all_dates, split_rules=split_rules)
+
+    def write_parsed(table, pool):
+        # streamed straight into sheet XML (no openpyxl cell objects)
+        writes = [pool.submit(write_parsed_xlsx, args.parsed, table, HEADER_ROW)]
+        if args.parsed_csv:
+            writes.append(pool.submit(write_parsed_csv, args.parsed_csv, table, HEADER_ROW))
+        if args.parsed_parquet:
+            writes.append(pool.submit(write_parsed_parquet, args.parsed_parquet, table, HEADER_ROW))
+        return writes
+
+    # Independent inputs are fetched concurrently; each CPU step waits only on what it needs.
+    policies, table = run_report(
+        args.report, load_table, split_rules, thresholds, template_path=args.template, on_table=write_parsed,
+    )
+
+    write_status(policies, {
+        "pipeline": "byeoksan_watch",
+        "export1": args.export1,
+        "report": args.report,
+        "parsed": args.parsed,
+        "rows": len(table),
+        "started_at": started.isoformat(timespec="seconds"),
+        "duration_s": round((datetime.now() - started).total_seconds(), 3),
+    })
 
     print(f"[OK] parsed: {args.parsed}")
+    for extra in (args.parsed_csv, args.parsed_parquet):
+        if extra:
+            print(f"[OK] parsed: {extra}")
     print(f"[OK] report updated: {args.report}")
 
 
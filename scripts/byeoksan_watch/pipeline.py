@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Byeoksan report run as a stage DAG: only stages whose inputs changed are run.
+
+    parse    Export1.xlsx                            -> jobs.npz (all rows, unsplit)
+    parsed   jobs.npz (+ split rules)                -> Export(가공)_<tag>.xlsx
+    rollup   jobs.npz                                -> rollup store
+    report   jobs.npz (+ split rules), template,     -> 리포트_<tag>.xlsx (+ status snapshot)
+             previous report, rollup store (z-score history)
+    archive  jobs.npz                                -> month partitions of raw job rows
+    pdf      text export, template PDF (optional)    -> NetBackup_Report_<tag>.pdf
+    publish  report                                  -> Windows folder
+
+Publish runs last and in the foreground: it is recorded as complete only when
+the copy succeeded, so a failed copy (e.g. file locked past all retries) is
+retried on the next run.
+
+Export1 is parsed once; the other stages derive their tables from jobs.npz.
+The report is filled through ``export1_to_report.run_report`` (previous
+report, template sheet and rollup store are read concurrently).
+
+Fingerprints are sha256 of the files; the report also depends on today's date
+(점검일시). State is saved after each stage, so a crashed run resumes where it
+stopped. Outputs are tagged per day (a rerun on the same day overwrites them);
+dated outputs keep the tag of the run that produced them.
+
+    pipeline.py run --tag 20260129
+    pipeline.py run --dry-run
+    pipeline.py run --force report
+"""
+import argparse
+import os
+import subprocess
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# this variant's export1_to_report (imported before scripts/ goes on the path; it shadows by name)
+from export1_to_report import (
+    HEADER_ROW, REPORT_GLOB, _find_previous_report, read_excel_with_retry, report_table, run_report,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from export1_xlsx import table_from_export1, write_parsed_xlsx  # noqa: E402
+from job_archive import ARCHIVE_DIR, ingest as archive_ingest, partition_path  # noqa: E402
+from job_table import JobTable  # noqa: E402
+from policy_rules import SPLIT_RULES, load_rules  # noqa: E402
+from remarks import THRESHOLDS, load_thresholds  # noqa: E402
+from rollup import STORE_DEFAULT as ROLLUP_STORE, ingest, load_store, report_keys, save_store  # noqa: E402
+from stage_dag import Stage, run_stages  # noqa: E402
+from status_api import write_status  # noqa: E402
+
+STATE_PATH = "/home/owen/.pipeline_state.json"
+WORK_DIR = "/home/owen/.pipeline"
+EXPORT1 = "/home/owen/Export1.xlsx"
+TEMPLATE = "/home/owen/벽산 리포트_백업상태_최종(양식).xlsx"
+PARSED_FMT = "/home/owen/Export(가공)_{tag}.xlsx"
+REPORT_FMT = REPORT_GLOB.replace("*", "{tag}")
+PDF_FMT = "/home/owen/NetBackup_Report_{tag}.pdf"
+WIN_DEST_DIR = "/mnt/c/Users/goust/OneDrive/바탕 화면/22/OneDrive/owen_잡/4. 벽산"
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+def build_stages(args) -> list:
+    jobs_path = os.path.join(WORK_DIR, "jobs.npz")
+    split_rules = load_rules(args.split_rules) if args.split_rules else SPLIT_RULES
+    thresholds = load_thresholds(args.remark_thresholds) if args.remark_thresholds else THRESHOLDS
+
+    def load_report_table(with_extra: bool = False) -> JobTable:
+        return report_table(JobTable.load(jobs_path, with_extra=with_extra), args.all_dates, split_rules)
+
+    def parse(_):
+        # the only read of Export1: parsed/report/rollup/archive all start from this table
+        os.makedirs(WORK_DIR, exist_ok=True)
+        raw = read_excel_with_retry(args.export1, "Export1", None)
+        table = table_from_export1(raw.iloc[1:].reset_index(drop=True))
+        tmp = jobs_path + ".tmp.npz"
+        table.save(tmp, with_extra=True)  # parsed-workbook display columns
+        os.replace(tmp, jobs_path)
+        return [jobs_path]
+
+    def parsed(_):
+        out = PARSED_FMT.format(tag=args.tag)
+        write_parsed_xlsx(out, load_report_table(with_extra=True), HEADER_ROW)
+        return [out]
+
+    def report_inputs(out):
+        # previous report and rollup history drive the remarks (deltas, z-score)
+        prev = _find_previous_report(REPORT_FMT.format(tag=args.tag))
+        return out["parse"] + [TEMPLATE, prev, ROLLUP_STORE, args.split_rules, args.remark_thresholds]
+
+    def report(_):
+        started = datetime.now()
+        out = REPORT_FMT.format(tag=args.tag)
+        policies, table = run_report(out, load_report_table, split_rules, thresholds, template_path=TEMPLATE)
+        write_status(policies, {
+            "pipeline": "byeoksan_watch",
+            "export1": args.export1,
+            "report": out,
+            "rows": len(table),
+            "started_at": started.isoformat(timespec="seconds"),
+            "duration_s": round((datetime.now() - started).total_seconds(), 3),
+        })
+        return [out]
+
+    def rollup(_):
+        store = load_store(ROLLUP_STORE)
+        ingest(store, report_keys(JobTable.load(jobs_path)))
+        save_store(store, ROLLUP_STORE)
+        return [ROLLUP_STORE]
+
+    def archive(_):
+        added = archive_ingest(JobTable.load(jobs_path), ARCHIVE_DIR)
+        return [partition_path(ARCHIVE_DIR, m) for m in added]
+
+    def publish(out):
+        src = out["report"][0]
+        # only the dated report, never the template
+        if not (os.path.isfile(src) and "벽산 리포트_백업상태_최종(양식)_" in os.path.basename(src)):
+            raise SystemExit(f"[ERROR] Report missing or unexpected filename: {src}")
+        # foreground: a failed copy exits here, so the stage is not recorded and reruns next time
+        rc = subprocess.call([
+            sys.executable, str(SCRIPTS / "publish.py"), "file", "--src", src, "--dest-dir", WIN_DEST_DIR,
+        ])
+        if rc != 0:
+            print(f"[ERROR] publish failed (exit {rc}); retried on the next run", file=sys.stderr)
+            raise SystemExit(rc)  # run_from_export1.sh exits with publish's status (2 on a failed copy)
+        return []
+
+    def pdf(_):
+        out = PDF_FMT.format(tag=args.tag)
+        subprocess.check_call([
+            sys.executable, str(SCRIPTS / "nbu_txt_to_pdf.py"), "--in", args.text, "--out", out,
+            *(["--template-pdf", args.template_pdf] if args.template_pdf else []),
+        ])
+        return [out]
+
+    stages = [
+        Stage("parse", parse, inputs=[args.export1]),
+        Stage(
+            "parsed", parsed, inputs=lambda out: out["parse"] + [args.split_rules],
+            params={"all_dates": args.all_dates}, after=["parse"],
+        ),
+        Stage("rollup", rollup, inputs=lambda out: out["parse"], after=["parse"]),
+        Stage(
+            "report", report, inputs=report_inputs,
+            params={"day": date.today().isoformat(), "all_dates": args.all_dates}, after=["parse", "rollup"],
+        ),
+        Stage("archive", archive, inputs=lambda out: out["parse"], after=["parse"]),
+    ]
+    if args.text:
+        stages.append(Stage("pdf", pdf, inputs=[args.text, args.template_pdf]))
+    # last: a copy retrying on a locked file must not hold back the other stages
+    stages.append(Stage("publish", publish, inputs=lambda out: out["report"], after=["report"]))
+    return stages
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the Byeoksan report stages that are out of date")
+    ap.add_argument("--state", default=STATE_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_run = sub.add_parser("run")
+    p_run.add_argument("--export1", default=EXPORT1)
+    p_run.add_argument("--tag", default=datetime.now().strftime("%Y%m%d"), help="Suffix for new dated outputs")
+    p_run.add_argument("--all-dates", action="store_true")
+    p_run.add_argument("--split-rules")
+    p_run.add_argument("--remark-thresholds")
+    p_run.add_argument("--text", help="Also render the PDF report from this NetBackup text export")
+    p_run.add_argument("--template-pdf")
+    p_run.add_argument("--force", action="append", default=[], help="Run this stage even if up to date (repeatable)")
+    p_run.add_argument("--dry-run", action="store_true", help="Only show which stages are stale")
+    args = ap.parse_args()
+
+    result = run_stages(build_stages(args), args.state, force=args.force, dry_run=args.dry_run)
+    print("[OK] " + " ".join(f"{name}={status}" for name, status in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,16 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-WATCH_FILE="/home/owen/Export1.xlsx"
-RUNNER="$(cd "$(dirname "$0")" && pwd)/run_from_export1.sh"
-LOCKFILE="/tmp/export1_watch.lock"
-LOGFILE="/home/owen/export1_watch.log"
-WIN_ERROR_DIR="/mnt/c/Users/goust/OneDrive/바탕 화면/22/OneDrive/owen_잡/4. 벽산"
+WATCH_FILE="${WATCH_FILE:-/home/owen/Export1.xlsx}"
+RUNNER="${RUNNER:-$(cd "$(dirname "$0")" && pwd)/run_from_export1.sh}"
+LOCKFILE="${LOCKFILE:-/tmp/export1_watch.lock}"
+LOGFILE="${LOGFILE:-/home/owen/export1_watch.log}"
+PUBLISH="$(cd "$(dirname "$0")/.." && pwd)/publish.py"
+WIN_ERROR_DIR="${WIN_ERROR_DIR:-/mnt/c/Users/goust/OneDrive/바탕 화면/22/OneDrive/owen_잡/4. 벽산}"
 
 # Polling watcher (WSL + Windows writes can miss inotify events)
-# Checks mtime/size every 5s and triggers when stable for two checks.
-INTERVAL=5
+# Checks mtime/size every INTERVAL seconds (default 5) and triggers when stable for two checks.
+INTERVAL="${INTERVAL:-5}"
 last_sig=""
 
 while true; do
@@ -27,27 +28,36 @@ while true; do
       if [[ "$sig" == "$sig2" ]]; then
         if command -v flock >/dev/null 2>&1; then
           (
-            flock -n 9 || exit 0
-            {
-              echo "[INFO] $(date -Is) start (poll)"
-              bash "$RUNNER"
-              rc=$?
+            if ! flock -n 9; then
+              # another run holds the lock: queue a rerun instead of dropping this upload
+              touch "$LOCKFILE.pending"
+              flock -w 5 9 || exit 0
+            fi
+            while true; do
+              rm -f "$LOCKFILE.pending"
+              rc=0
+              (
+                echo "[INFO] $(date -Is) start (poll)"
+                bash "$RUNNER"
+                rc=$?
+                if [[ $rc -ne 0 ]]; then
+                  echo "[ERROR] $(date -Is) run failed rc=$rc"
+                else
+                  echo "[INFO] $(date -Is) done"
+                fi
+                exit $rc
+              ) >>"$LOGFILE" 2>&1 || rc=$?
               if [[ $rc -ne 0 ]]; then
-                echo "[ERROR] $(date -Is) run failed rc=$rc"
-              else
-                echo "[INFO] $(date -Is) done"
+                mkdir -p "$WIN_ERROR_DIR"
+                ts="$(date +%Y%m%d_%H%M%S)"
+                # ship only the log lines added since the last shipment
+                python3 "$PUBLISH" log --log "$LOGFILE" --dest "$WIN_ERROR_DIR/ERROR_export1_watch_${ts}.log" || true
               fi
-              exit $rc
-            } >>"$LOGFILE" 2>&1
-            rc=$?
-            if [[ $rc -ne 0 ]]; then
-              mkdir -p "$WIN_ERROR_DIR"
-              ts="$(date +%Y%m%d_%H%M%S)"
-              cp -f "$LOGFILE" "$WIN_ERROR_DIR/ERROR_export1_watch_${ts}.log" || true
-            fi
+              [[ -e "$LOCKFILE.pending" ]] || break
+            done
           ) 9>"$LOCKFILE"
         else
-          {
+          (
             echo "[INFO] $(date -Is) start (poll)"
             bash "$RUNNER"
             rc=$?
@@ -57,12 +67,12 @@ while true; do
               echo "[INFO] $(date -Is) done"
             fi
             exit $rc
-          } >>"$LOGFILE" 2>&1
-          rc=$?
+          ) >>"$LOGFILE" 2>&1 && rc=0 || rc=$?
           if [[ $rc -ne 0 ]]; then
             mkdir -p "$WIN_ERROR_DIR"
             ts="$(date +%Y%m%d_%H%M%S)"
-            cp -f "$LOGFILE" "$WIN_ERROR_DIR/ERROR_export1_watch_${ts}.log" || true
+            # ship only the log lines added since the last shipment
+            python3 "$PUBLISH" log --log "$LOGFILE" --dest "$WIN_ERROR_DIR/ERROR_export1_watch_${ts}.log" || true
           fi
         fi
         last_sig="$sig"
@@ -8,27 +8,17 @@ import pandas as pd
 import zipfile
 import openpyxl
 
+from export1_xlsx import table_from_export1, write_parsed_csv, write_parsed_parquet, write_parsed_xlsx
+from job_table import JobTable, format_gb
+from policy_rules import RuleSet, SPLIT_RULES, load_rules, split_labels
+from remarks import compute_deltas
+from status_api import policy_status, write_status
+
 HEADER_ROW = [
     "State", "Policy", "Job", "Schedule", "Client", "Media", "Server",
     "Start", "Time", "Elapsed", "Time.1", "End", "Time.2", "Unit"
 ]
 
-# Column indices in Export1.xlsx (0-based)
-COL_POLICY = 4
-COL_START_Y = 8
-COL_START_M = 9
-COL_START_D = 10
-COL_START_AMPM = 11
-COL_START_TIME = 12
-COL_ELAPSED = 13
-COL_END_Y = 14
-COL_END_M = 15
-COL_END_D = 16
-COL_END_AMPM = 17
-COL_END_TIME = 18
-COL_STORAGE_UNIT = 19
-COL_UNIT = 21
-
 REPORT_GLOB = "/home/owen/벽산 리포트_백업상태_최종(양식)_*.xlsx"
 
 
@@ -63,95 +53,17 @@ def _update_formula_in_cell(sheet_xml: str, cell_ref: str, formula: str, value:
     return new_xml if n else sheet_xml
 
 
-def build_parsed_df(export1_path: str, include_all_dates: bool = False) -> pd.DataFrame:
+def build_job_table(export1_path: str, include_all_dates: bool = False, split_rules=SPLIT_RULES) -> JobTable:
     raw = pd.read_excel(export1_path, sheet_name="Export1", header=None)
     raw = raw.iloc[1:].reset_index(drop=True)
 
-    rows = []
-    for _, r in raw.iterrows():
-        policy = r[COL_POLICY]
-        if pd.isna(policy):
-            continue
-        row = {
-            "Policy": str(policy).strip(),
-            "Start_Y": r[COL_START_Y],
-            "Start_M": r[COL_START_M],
-            "Start_D": r[COL_START_D],
-            "Start_AMPM": r[COL_START_AMPM],
-            "Start_Time": r[COL_START_TIME],
-            "Elapsed": r[COL_ELAPSED],
-            "End_Y": r[COL_END_Y],
-            "End_M": r[COL_END_M],
-            "End_D": r[COL_END_D],
-            "End_AMPM": r[COL_END_AMPM],
-            "End_Time": r[COL_END_TIME],
-            "Storage_Unit": r[COL_STORAGE_UNIT],
-            "Unit": r[COL_UNIT],
-        }
-        rows.append(row)
-
-    if include_all_dates:
-        filtered = rows
-    else:
+    table = table_from_export1(raw)
+    if not include_all_dates:
         # latest date per policy
-        latest_date = {}
-        for row in rows:
-            try:
-                d = datetime(int(row["End_Y"]), int(row["End_M"]), int(row["End_D"])).date()
-            except Exception:
-                continue
-            pol = row["Policy"]
-            if pol not in latest_date or d > latest_date[pol]:
-                latest_date[pol] = d
-
-        # filter to latest date rows only
-        filtered = []
-        for row in rows:
-            pol = row["Policy"]
-            try:
-                d = datetime(int(row["End_Y"]), int(row["End_M"]), int(row["End_D"])).date()
-            except Exception:
-                continue
-            if latest_date.get(pol) == d:
-                filtered.append(row)
+        table = table.take(table.latest_date_mask())
 
-    # HZDB_MSSQL split labeling
-    for row in filtered:
-        if row["Policy"] == "HZDB_MSSQL":
-            try:
-                unit = int(str(row["Unit"]).replace(",", ""))
-            except Exception:
-                unit = None
-            if unit is None:
-                continue
-            if 8000 <= unit < 10000:
-                row["Policy"] = "HZDB_MSSQL_ReportServer"
-            elif 1000000 <= unit < 2000000:
-                row["Policy"] = "HZDB_MSSQL_SMS"
-            else:
-                row["Policy"] = "HZDB_MSSQL_NEOE"
-
-    # build output rows with header row exactly like test.xlsx
-    out_rows = [HEADER_ROW]
-    for row in filtered:
-        out_rows.append([
-            row["Policy"],
-            row["Start_Y"],
-            row["Start_M"],
-            row["Start_D"],
-            row["Start_AMPM"],
-            row["Start_Time"],
-            row["Elapsed"],
-            row["End_Y"],
-            row["End_M"],
-            row["End_D"],
-            row["End_AMPM"],
-            row["End_Time"],
-            row["Storage_Unit"],
-            row["Unit"],
-        ])
-
-    return pd.DataFrame(out_rows)
+    # policy splits (e.g. HZDB_MSSQL by unit range), evaluated over the whole column
+    return table.relabel(RuleSet(split_rules))
 
 
 def _parse_unit_from_cell(cell_value):
@@ -175,15 +87,6 @@ def _parse_unit_from_cell(cell_value):
     return None
 
 
-def _format_gb(val: float) -> str:
-    # keep two decimals if needed, else integer
-    if val is None:
-        return ""
-    if abs(val - round(val)) < 0.005:
-        return str(int(round(val)))
-    return f"{val:.2f}"
-
-
 def _find_previous_report(current_report: str) -> str | None:
     # find latest dated report before today (by filename tag)
     candidates = []
@@ -211,7 +114,7 @@ def _find_previous_report(current_report: str) -> str | None:
     return candidates[-1][1]
 
 
-def _read_previous_values(prev_report: str) -> dict:
+def _read_previous_values(prev_report: str, split_rules=SPLIT_RULES) -> dict:
     wb = openpyxl.load_workbook(prev_report, data_only=False)
     ws = wb["백업상태 점검_일일점검"]
 
@@ -227,11 +130,7 @@ def _read_previous_values(prev_report: str) -> dict:
                 prev[pol] = gb
 
     # HZDB split rows by label in col D
-    label_map = {
-        "ReportServer": "HZDB_MSSQL_ReportServer",
-        "SMS": "HZDB_MSSQL_SMS",
-        "NEOE": "HZDB_MSSQL_NEOE",
-    }
+    label_map = split_labels(split_rules)
     for row in ws.iter_rows(min_row=1, max_row=200, min_col=4, max_col=4):
         cell = row[0]
         v = cell.value
@@ -244,22 +143,22 @@ def _read_previous_values(prev_report: str) -> dict:
     return prev
 
 
-def update_report(report_path: str, parsed_path: str):
-    parsed = pd.read_excel(parsed_path, sheet_name="Export1", header=None)
-    parsed = parsed.iloc[1:].reset_index(drop=True)
-
-    policy_col = 0
-    unit_col = 13
-    parsed[unit_col] = pd.to_numeric(parsed[unit_col], errors="coerce").fillna(0)
-
-    agg = parsed.groupby(policy_col)[unit_col].sum()
+def update_report(report_path: str, table: JobTable, split_rules=SPLIT_RULES) -> dict:
+    """Fill column E; returns per-key status (totals and deltas vs the previous report)."""
+    agg = table.sum_kb_by_policy()
 
     # current gb values by key
     current_gb = {k: v / 1024 / 1024 for k, v in agg.items()}
 
     prev_report = _find_previous_report(report_path)
-    prev_values = _read_previous_values(prev_report) if prev_report else {}
+    prev_values = _read_previous_values(prev_report, split_rules) if prev_report else {}
 
+    fill_volume_cells(report_path, agg, split_rules)
+    return policy_status(agg, compute_deltas(current_gb, prev_values))
+
+
+def fill_volume_cells(report_path: str, agg: dict, split_rules=SPLIT_RULES) -> int:
+    """Write ``=<KB>/(1024*1024)`` into column E for each policy/split key in ``agg``."""
     with zipfile.ZipFile(report_path, "r") as z:
         sheet_xml = z.read("xl/worksheets/sheet2.xml").decode("utf-8", "ignore")
         sst_xml = z.read("xl/sharedStrings.xml")
@@ -291,7 +190,7 @@ def update_report(report_path: str, parsed_path: str):
     for pol, unit_sum in agg.items():
         row_num = policy_rows.get(str(pol).strip())
         if row_num:
-            gb_val = _format_gb(unit_sum / 1024 / 1024)
+            gb_val = format_gb(unit_sum / 1024 / 1024)
             new_xml = _update_formula_in_cell(
                 sheet_xml,
                 f"E{row_num}",
@@ -303,16 +202,12 @@ def update_report(report_path: str, parsed_path: str):
             sheet_xml = new_xml
 
     # HZDB_MSSQL split rows in col D
-    label_map = {
-        "ReportServer": "HZDB_MSSQL_ReportServer",
-        "SMS": "HZDB_MSSQL_SMS",
-        "NEOE": "HZDB_MSSQL_NEOE",
-    }
+    label_map = split_labels(split_rules)
     for label, key in label_map.items():
         if key in agg:
             row_num = label_rows.get(label)
             if row_num:
-                gb_val = _format_gb(agg[key] / 1024 / 1024)
+                gb_val = format_gb(agg[key] / 1024 / 1024)
                 new_xml = _update_formula_in_cell(
                     sheet_xml,
                     f"E{row_num}",
@@ -324,6 +219,7 @@ def update_report(report_path: str, parsed_path: str):
                 sheet_xml = new_xml
 
     _rewrite_zip_entry(report_path, "xl/worksheets/sheet2.xml", sheet_xml.encode("utf-8"))
+    return updates
 
 
 def main():
@@ -332,15 +228,36 @@ def main():
     ap.add_argument("--parsed", required=True)
     ap.add_argument("--report", required=True)
     ap.add_argument("--all-dates", action="store_true", help="Include all dates (no latest-date filtering)")
+    ap.add_argument("--parsed-csv", help="Also write the parsed rows as CSV")
+    ap.add_argument("--parsed-parquet", help="Also write the parsed rows as Parquet (needs pyarrow)")
+    ap.add_argument("--split-rules", help="JSON file with policy split rules (default: built-in HZDB_MSSQL rules)")
     args = ap.parse_args()
-
-    parsed_df = build_parsed_df(args.export1, include_all_dates=args.all_dates)
-    with pd.ExcelWriter(args.parsed, engine="openpyxl") as writer:
-        parsed_df.to_excel(writer, sheet_name="Export1", header=False, index=False)
-
-    update_report(args.report, args.parsed)
+    started = datetime.now()
+
+    split_rules = load_rules(args.split_rules) if args.split_rules else SPLIT_RULES
+    table = build_job_table(args.export1, include_all_dates=args.all_dates, split_rules=split_rules)
+    # streamed straight into sheet XML (no openpyxl cell objects)
+    write_parsed_xlsx(args.parsed, table, HEADER_ROW)
+    if args.parsed_csv:
+        write_parsed_csv(args.parsed_csv, table, HEADER_ROW)
+    if args.parsed_parquet:
+        write_parsed_parquet(args.parsed_parquet, table, HEADER_ROW)
+
+    policies = update_report(args.report, table, split_rules)
+    write_status(policies, {
+        "pipeline": "export1_to_report",
+        "export1": args.export1,
+        "report": args.report,
+        "parsed": args.parsed,
+        "rows": len(table),
+        "started_at": started.isoformat(timespec="seconds"),
+        "duration_s": round((datetime.now() - started).total_seconds(), 3),
+    })
 
     print(f"[OK] parsed: {args.parsed}")
+    for extra in (args.parsed_csv, args.parsed_parquet):
+        if extra:
+            print(f"[OK] parsed: {extra}")
     print(f"[OK] report updated: {args.report}")
 
 
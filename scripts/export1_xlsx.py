@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Export1.xlsx (NetBackup jobs sheet) -> JobTable, and the parsed-sheet outputs."""
+import csv
+from typing import Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from job_table import JobTable, normalize_kb
+from xlsx_stream import write_xlsx
+
+# Column indices in Export1.xlsx (0-based)
+COL_POLICY = 4
+COL_START_Y = 8
+COL_START_M = 9
+COL_START_D = 10
+COL_START_AMPM = 11
+COL_START_TIME = 12
+COL_ELAPSED = 13
+COL_END_Y = 14
+COL_END_M = 15
+COL_END_D = 16
+COL_END_AMPM = 17
+COL_END_TIME = 18
+COL_STORAGE_UNIT = 19
+COL_UNIT = 21
+
+# Raw cells copied as-is into the parsed workbook (after the Policy column)
+DISPLAY_COLUMNS = [
+    ("Start_Y", COL_START_Y),
+    ("Start_M", COL_START_M),
+    ("Start_D", COL_START_D),
+    ("Start_AMPM", COL_START_AMPM),
+    ("Start_Time", COL_START_TIME),
+    ("Elapsed", COL_ELAPSED),
+    ("End_Y", COL_END_Y),
+    ("End_M", COL_END_M),
+    ("End_D", COL_END_D),
+    ("End_AMPM", COL_END_AMPM),
+    ("End_Time", COL_END_TIME),
+    ("Storage_Unit", COL_STORAGE_UNIT),
+    ("Unit", COL_UNIT),
+]
+
+
+def _column(raw: pd.DataFrame, col: int) -> pd.Series:
+    if col in raw.columns:
+        return raw[col]
+    return pd.Series([None] * len(raw), index=raw.index, dtype=object)
+
+
+def _datetimes(raw: pd.DataFrame, y: int, m: int, d: int, ampm: int, tm: int) -> np.ndarray:
+    ymd = pd.DataFrame({
+        "year": pd.to_numeric(_column(raw, y), errors="coerce"),
+        "month": pd.to_numeric(_column(raw, m), errors="coerce"),
+        "day": pd.to_numeric(_column(raw, d), errors="coerce"),
+    })
+    day = pd.to_datetime(ymd, errors="coerce")
+
+    # 12-hour clock with 오전/오후 marker; unparseable times fall back to midnight
+    t = pd.to_timedelta(_column(raw, tm).astype(str).str.strip(), errors="coerce").fillna(pd.Timedelta(0))
+    hour = t.dt.components.hours
+    marker = _column(raw, ampm).astype(str).str.strip()
+    t = t + pd.to_timedelta(((marker == "오후") & (hour < 12)).astype(int) * 12, unit="h")
+    t = t - pd.to_timedelta(((marker == "오전") & (hour == 12)).astype(int) * 12, unit="h")
+    return (day + t).to_numpy(dtype="datetime64[s]")
+
+
+def _kilobytes(values: pd.Series) -> np.ndarray:
+    kb, bad = normalize_kb(values.to_numpy(dtype=object))
+    if bad.any():
+        # title row dropped, so sheet row = index + 2; bad cells stay empty instead of being guessed
+        rows = ", ".join(str(i + 2) for i in values.index[bad][:10])
+        more = f" (+{int(bad.sum()) - 10} more)" if bad.sum() > 10 else ""
+        print(f"[WARN] Unit: {int(bad.sum())} non-numeric value(s) left empty, rows {rows}{more}")
+    return kb
+
+
+def table_from_export1(raw: pd.DataFrame) -> JobTable:
+    """Build a JobTable from the Export1 sheet (read with header=None, title row dropped)."""
+    policy = _column(raw, COL_POLICY)
+    raw = raw[policy.notna()]
+    policy = policy[policy.notna()].astype(str).str.strip()
+    return JobTable.from_columns(
+        policy=policy.to_numpy(dtype=object),
+        start=_datetimes(raw, COL_START_Y, COL_START_M, COL_START_D, COL_START_AMPM, COL_START_TIME),
+        end=_datetimes(raw, COL_END_Y, COL_END_M, COL_END_D, COL_END_AMPM, COL_END_TIME),
+        kilobytes=_kilobytes(_column(raw, COL_UNIT)),
+        extra={name: _column(raw, col).to_numpy(dtype=object) for name, col in DISPLAY_COLUMNS},
+    )
+
+
+def iter_parsed_rows(table: JobTable, header: Sequence) -> Iterator[list]:
+    """Rows of the Export(가공) sheet: header, then Policy + raw display cells."""
+    yield list(header)
+    cols = [table.extra[name] for name, _ in DISPLAY_COLUMNS]
+    for policy, *cells in zip(table.policy_names(), *cols):
+        yield [policy, *cells]
+
+
+def write_parsed_xlsx(path: str, table: JobTable, header: Sequence) -> int:
+    return write_xlsx(path, iter_parsed_rows(table, header), sheet_name="Export1")
+
+
+def write_parsed_csv(path: str, table: JobTable, header: Sequence) -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f)
+        for row in iter_parsed_rows(table, header):
+            w.writerow(["" if v is None or v != v else v for v in row])
+            n += 1
+    return n
+
+
+def write_parsed_parquet(path: str, table: JobTable, header: Sequence) -> int:
+    # Raw cells as text under the sheet header, plus typed columns for analysis.
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise SystemExit("PARQUET_FAIL: pyarrow is not installed (pip install pyarrow)")
+    df = pd.DataFrame({header[0]: table.policy_names()})
+    for col_name, (name, _) in zip(header[1:], DISPLAY_COLUMNS):
+        cells = pd.Series(table.extra[name], dtype=object)
+        df[col_name] = cells.map(lambda v: None if v is None or v != v else str(v))
+    df["Start_DT"] = table.start
+    df["End_DT"] = table.end
+    df["Kilobytes"] = table.kilobytes
+    df.to_parquet(path, index=False)
+    return len(df)
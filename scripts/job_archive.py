@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Month-partitioned, compressed archive of raw export job rows.
+
+Export1.xlsx is overwritten every day; the archive keeps every job row it
+has seen as one compressed columnar ``.npz`` per month of the job's end time
+(``JobTable.save``: int codes + interned names, datetimes as int64):
+
+    /home/owen/nbu_archive/jobs_2026-01.npz
+    /home/owen/nbu_archive/jobs_undated.npz     (no start/end time)
+
+Rows are the unsplit parser output (job id, policy, instance, client,
+start, end, kilobytes), so split rules can be applied at read time. An
+ingest only rewrites the months present in the export; a row is added unless
+the archive already holds as many identical rows (all columns equal) as the
+export does, so re-ingesting an export adds nothing while identical-looking
+jobs within one export are all kept. Reading a date range loads
+only the partitions that overlap it.
+
+    job_archive.py ingest --source /home/owen/Export1.xlsx
+    job_archive.py ls
+    job_query.py summary --archive /home/owen/nbu_archive --since 2026-01-01 --until 2026-01-31
+"""
+import argparse
+import glob
+import os
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from job_table import JobTable
+
+ARCHIVE_DIR = "/home/owen/nbu_archive"
+UNDATED = "undated"
+PARSED_GLOB = "/home/owen/Export(가공)_*.xlsx"
+
+
+def partition_path(archive_dir: str, month: str) -> str:
+    return os.path.join(archive_dir, f"jobs_{month}.npz")
+
+
+def partition_months(table: JobTable) -> np.ndarray:
+    """Partition name per row: "YYYY-MM" of the end time (start if no end), else "undated"."""
+    when = np.where(np.isnat(table.end), table.start, table.end).astype("datetime64[M]")
+    months = np.datetime_as_string(when, unit="M").astype(object)
+    months[np.isnat(when)] = UNDATED
+    return months
+
+
+def _row_keys(table: JobTable) -> np.ndarray:
+    """n x 7 int64 matrix identifying a row (codes are only comparable within one table)."""
+    return np.stack([
+        table.job_id,
+        table.policy.astype(np.int64),
+        table.instance.astype(np.int64),
+        table.client.astype(np.int64),
+        table.start.astype(np.int64),  # NaT -> int64 min, compares equal
+        table.end.astype(np.int64),
+        table.kilobytes,
+    ], axis=1)
+
+
+def merge_rows(archived: JobTable, new: JobTable) -> JobTable:
+    """Archived rows followed by the rows of ``new`` that the archive does not already hold.
+
+    Rows are compared as multisets: Export1 rows have no job id, so identical
+    rows can be distinct jobs. A key seen n times in ``new`` and k times in
+    the archive adds max(n - k, 0) rows; duplicates within ``new`` are kept.
+    """
+    if not len(new):
+        return archived
+    both = JobTable.concat([archived, new])
+    n_old = len(archived)
+    _, inv = np.unique(_row_keys(both), axis=0, return_inverse=True)
+    inv = inv.reshape(-1)
+    archived_count = np.bincount(inv[:n_old], minlength=inv.max() + 1)
+    # occurrence number of each new row among new rows with the same key (0, 1, 2, ...)
+    new_inv = inv[n_old:]
+    order = np.argsort(new_inv, kind="stable")
+    sorted_inv = new_inv[order]
+    group_start = np.flatnonzero(np.r_[True, sorted_inv[1:] != sorted_inv[:-1]])
+    rank = np.empty(len(new_inv), dtype=np.int64)
+    rank[order] = np.arange(len(new_inv)) - np.repeat(group_start, np.diff(np.r_[group_start, len(new_inv)]))
+    keep_new = rank >= archived_count[new_inv]
+    return both.take(np.concatenate([np.arange(n_old), n_old + np.flatnonzero(keep_new)]))
+
+
+def _save_atomic(table: JobTable, path: str) -> None:
+    tmp = path + ".tmp.npz"
+    table.save(tmp)
+    os.replace(tmp, path)
+
+
+def ingest(table: JobTable, archive_dir: str = ARCHIVE_DIR) -> Dict[str, int]:
+    """Add the table's rows to their month partitions; returns {month: rows added} (0 entries omitted)."""
+    os.makedirs(archive_dir, exist_ok=True)
+    table = table.take(slice(None))
+    table.extra = {}  # display columns are not archived
+    months = partition_months(table)
+    added = {}
+    for month in sorted(set(months)):
+        rows = table.take(months == month)
+        path = partition_path(archive_dir, month)
+        archived = JobTable.load(path) if os.path.exists(path) else JobTable.empty()
+        merged = merge_rows(archived, rows)
+        n = len(merged) - len(archived)
+        if n:
+            _save_atomic(merged, path)
+            added[month] = n
+    return added
+
+
+def list_partitions(archive_dir: str = ARCHIVE_DIR) -> List[str]:
+    names = [os.path.basename(p)[len("jobs_"):-len(".npz")] for p in glob.glob(partition_path(archive_dir, "*"))]
+    return sorted(n for n in names if not n.endswith(".tmp"))
+
+
+def _months_between(since: date, until: date) -> List[str]:
+    out = []
+    y, m = since.year, since.month
+    while (y, m) <= (until.year, until.month):
+        out.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+def load_range(
+    archive_dir: str = ARCHIVE_DIR,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    include_undated: bool = False,
+) -> JobTable:
+    """Archived rows from the partitions overlapping [since, until] (all partitions when both are None).
+
+    Rows are not filtered inside a partition; JobIndex.query does the exact range.
+    """
+    available = list_partitions(archive_dir)
+    if since is None and until is None:
+        months = [m for m in available if m != UNDATED]
+    else:
+        dated = [m for m in available if m != UNDATED]
+        if not dated:
+            return JobTable.empty()
+        lo = since or date.fromisoformat(dated[0] + "-01")
+        hi = until or date.fromisoformat(dated[-1] + "-01")
+        months = [m for m in _months_between(lo, hi) if m in available]
+    if include_undated and UNDATED in available:
+        months.append(UNDATED)
+    return JobTable.concat(JobTable.load(partition_path(archive_dir, m)) for m in months)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Month-partitioned archive of raw export job rows")
+    ap.add_argument("--archive", default=ARCHIVE_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_ing = sub.add_parser("ingest")
+    p_ing.add_argument("--source", default="/home/owen/Export1.xlsx", help="Export1.xlsx or NetBackup text export")
+    sub.add_parser("ls")
+    args = ap.parse_args()
+
+    if args.cmd == "ingest":
+        from job_query import load_jobs
+
+        added = ingest(load_jobs(args.source), args.archive)
+        detail = ", ".join(f"{m}+{n}" for m, n in added.items()) or "no new rows"
+        print(f"[OK] archive updated: {detail} -> {args.archive}")
+        return
+
+    total = 0
+    for month in list_partitions(args.archive):
+        path = partition_path(args.archive, month)
+        size = os.path.getsize(path)
+        total += size
+        with np.load(path) as z:
+            rows = len(z["policy"])
+        print(f"{month:10s} rows={rows:<9d} {size / 1024:10.1f} KiB")
+    parsed = sum(os.path.getsize(p) for p in glob.glob(PARSED_GLOB))
+    print(f"total      {total / 1024:.1f} KiB (parsed xlsx copies: {parsed / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Time-range queries over parsed NetBackup jobs.
+
+Python:
+    index = JobIndex(load_jobs("/home/owen/Export1.xlsx"))
+    rows = index.summary(policies=["ERP-DB_ORACLE"], since=..., group_by=["date"])
+
+CLI:
+    job_query.py summary --source Export1.xlsx --policy ERP-DB_ORACLE --last-days 7
+    job_query.py jobs --source Export1.txt --policy HZDB_MSSQL --since 2026-01-01 --until 2026-01-31
+    job_query.py summary --archive /home/owen/nbu_archive --since 2025-11-01 --until 2025-11-30 --group-by date
+
+Rows are sorted once by (policy, end time); a policy lookup is an offset
+slice and a time range is two binary searches inside it. Parsed sources are
+cached as ``.npz`` so repeated questions skip the reparse.
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from job_table import KB_PER_GB, JobTable
+from policy_rules import RuleSet, SPLIT_RULES
+
+CACHE_DIR = "/tmp/nbu_job_cache"
+GROUP_KEYS = ("policy", "date", "instance", "client")
+
+
+def _parse_source(path: str) -> JobTable:
+    if path.lower().endswith(".xlsx"):
+        import pandas as pd
+        from export1_xlsx import table_from_export1
+
+        raw = pd.read_excel(path, sheet_name="Export1", header=None)
+        return table_from_export1(raw.iloc[1:].reset_index(drop=True))
+    from nbu_text import extract_jobs
+
+    with open(path, "rb") as f:
+        return extract_jobs(f.read())
+
+
+def _cache_path(path: str) -> str:
+    st = os.stat(path)
+    key = f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}"
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npz")
+
+
+def load_jobs(path: str, use_cache: bool = True) -> JobTable:
+    """Parse an Export1.xlsx / text export, reusing the cached table if the file is unchanged."""
+    if not use_cache:
+        return _parse_source(path)
+    cache = _cache_path(path)
+    if os.path.exists(cache):
+        return JobTable.load(cache)
+    table = _parse_source(path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = cache + ".tmp.npz"
+    table.save(tmp)
+    os.replace(tmp, cache)
+    return table
+
+
+def _to_dt64(value, end_of_day: bool = False) -> Optional[np.datetime64]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value) if len(value) == 10 else datetime.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+        if end_of_day:
+            value += timedelta(days=1) - timedelta(seconds=1)
+    return np.datetime64(value, "s")
+
+
+def _to_date(value) -> Optional[date]:
+    dt = _to_dt64(value)
+    return None if dt is None else dt.astype("datetime64[D]").item()
+
+
+class JobIndex:
+    """Jobs sorted by (policy, end); per-policy offsets plus binary-search ranges."""
+
+    def __init__(self, table: JobTable):
+        order = np.lexsort((table.end, table.policy))
+        self.table = table.take(order)
+        counts = np.bincount(self.table.policy, minlength=len(self.table.policies))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._code = {name: i for i, name in enumerate(self.table.policies)}
+
+    @property
+    def policies(self) -> List[str]:
+        return list(self.table.policies)
+
+    def _range(self, code: int, since, until) -> np.ndarray:
+        lo, hi = int(self.offsets[code]), int(self.offsets[code + 1])
+        if since is None and until is None:
+            return np.arange(lo, hi)
+        ends = self.table.end[lo:hi]
+        ends = ends[: int(np.searchsorted(ends, np.datetime64("NaT"), side="left"))]  # NaT sorts last
+        a = 0 if since is None else int(np.searchsorted(ends, since, side="left"))
+        b = len(ends) if until is None else int(np.searchsorted(ends, until, side="right"))
+        return np.arange(lo + a, lo + max(a, b))
+
+    def query(self, policies: Optional[Sequence[str]] = None, since=None, until=None) -> JobTable:
+        """Jobs of ``policies`` (all when None) whose end time is within [since, until]."""
+        since = _to_dt64(since)
+        until = _to_dt64(until, end_of_day=True)
+        names = self.policies if not policies else policies
+        parts = [self._range(self._code[p], since, until) for p in names if p in self._code]
+        index = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        return self.table.take(index)
+
+    def summary(
+        self,
+        policies: Optional[Sequence[str]] = None,
+        since=None,
+        until=None,
+        group_by: Sequence[str] = ("policy",),
+    ) -> List[Dict]:
+        return aggregate(self.query(policies, since, until), group_by)
+
+
+def aggregate(table: JobTable, group_by: Sequence[str] = ("policy",)) -> List[Dict]:
+    """Group-by count / kilobyte total / first and last end time."""
+    for key in group_by:
+        if key not in GROUP_KEYS:
+            raise ValueError(f"unknown group key: {key} (expected one of {', '.join(GROUP_KEYS)})")
+    if not len(table):
+        return []
+
+    day = table.end.astype("datetime64[D]")
+    columns = {
+        "policy": (table.policy, table.policies),
+        "instance": (table.instance, table.instances),
+        "client": (table.client, table.clients),
+    }
+    if "date" in group_by:
+        days = np.where(np.isnat(day), np.iinfo(np.int64).min, day.astype(np.int64))
+        uniq_days, day_codes = np.unique(days, return_inverse=True)
+        day_names = ["" if d == np.iinfo(np.int64).min else str(np.datetime64(int(d), "D")) for d in uniq_days]
+        columns["date"] = (day_codes, day_names)
+
+    keys = np.stack([columns[k][0] for k in group_by], axis=1) if group_by else np.zeros((len(table), 1), dtype=np.int64)
+    uniq, inv = np.unique(keys, axis=0, return_inverse=True)
+    inv = inv.reshape(-1)
+    n = len(uniq)
+
+    counts = np.bincount(inv, minlength=n)
+    has_size = table.has_size()
+    kb = np.zeros(n, dtype=np.int64)
+    np.add.at(kb, inv[has_size], table.kilobytes[has_size])
+    ends = table.end.astype(np.int64)
+    valid_end = ~np.isnat(table.end)
+    first = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+    last = np.full(n, np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(first, inv[valid_end], ends[valid_end])
+    np.maximum.at(last, inv[valid_end], ends[valid_end])
+
+    out = []
+    for g in range(n):
+        row = {k: columns[k][1][uniq[g][i]] for i, k in enumerate(group_by)}
+        row["jobs"] = int(counts[g])
+        row["kilobytes"] = int(kb[g])
+        row["gb"] = round(kb[g] / KB_PER_GB, 2)
+        row["first_end"] = str(np.datetime64(int(first[g]), "s")) if first[g] != np.iinfo(np.int64).max else None
+        row["last_end"] = str(np.datetime64(int(last[g]), "s")) if last[g] != np.iinfo(np.int64).min else None
+        out.append(row)
+    return out
+
+
+def query_jobs(
+    source: str,
+    policies: Optional[Sequence[str]] = None,
+    since=None,
+    until=None,
+    last_days: Optional[int] = None,
+    group_by: Optional[Sequence[str]] = ("policy",),
+    split: bool = False,
+    archive: Optional[str] = None,
+) -> List[Dict]:
+    """One-shot helper: load (cached, or the archive months in range), optionally apply policy splits, query and aggregate."""
+    if last_days:
+        since = date.today() - timedelta(days=last_days - 1)
+    if archive:
+        from job_archive import load_range
+
+        table = load_range(archive, _to_date(since), _to_date(until))
+    else:
+        table = load_jobs(source)
+    if split:
+        table = table.relabel(RuleSet(SPLIT_RULES))
+    index = JobIndex(table)
+    if group_by is None:
+        return job_rows(index.query(policies, since, until))
+    return index.summary(policies, since, until, group_by)
+
+
+def job_rows(table: JobTable) -> List[Dict]:
+    policies = table.policy_names()
+    instances = table.instance_names()
+    out = []
+    for i in range(len(table)):
+        out.append({
+            "job_id": int(table.job_id[i]),
+            "policy": policies[i],
+            "instance": instances[i],
+            "start": None if np.isnat(table.start[i]) else str(table.start[i]),
+            "end": None if np.isnat(table.end[i]) else str(table.end[i]),
+            "kilobytes": int(table.kilobytes[i]),
+        })
+    return out
+
+
+def _print_rows(rows: List[Dict], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    if not rows:
+        print("(no jobs)")
+        return
+    cols = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in cols))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Query NetBackup jobs by policy and end-time range")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("summary", "jobs"):
+        p = sub.add_parser(name)
+        p.add_argument("--source", default="/home/owen/Export1.xlsx", help="Export1.xlsx or NetBackup text export")
+        p.add_argument("--archive", help="Read past months from this job_archive.py directory instead of --source")
+        p.add_argument("--policy", action="append", help="Policy name (repeatable; default: all)")
+        p.add_argument("--since", help="Start date/time (ISO, inclusive)")
+        p.add_argument("--until", help="End date/time (ISO, inclusive; a date means end of that day)")
+        p.add_argument("--last-days", type=int, help="Shortcut for --since today-(N-1) days")
+        p.add_argument("--split", action="store_true", help="Apply policy split rules (HZDB_MSSQL_*) first")
+        p.add_argument("--json", action="store_true")
+        if name == "summary":
+            p.add_argument("--group-by", default="policy", help=f"Comma list of {', '.join(GROUP_KEYS)}")
+    args = ap.parse_args()
+
+    group_by = [g.strip() for g in args.group_by.split(",") if g.strip()] if args.cmd == "summary" else None
+
+    rows = query_jobs(
+        args.source,
+        policies=args.policy,
+        since=args.since,
+        until=args.until,
+        last_days=args.last_days,
+        group_by=group_by,
+        split=args.split,
+        archive=args.archive,
+    )
+    _print_rows(rows, args.json)
+
+
+if __name__ == "__main__":
+    main()
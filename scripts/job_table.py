@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Columnar (struct-of-arrays) job table shared by the xlsx and text parsers.
+
+One NumPy array per field instead of one dict per job:
+- ``policy``/``instance``/``client``: int32 codes into interned name lists
+- ``start``/``end``: ``datetime64[s]`` (NaT when missing)
+- ``kilobytes``: int64 (``KB_MISSING`` when missing)
+- ``job_id``: int64 (-1 when the source has no job id)
+
+``extra`` carries optional pass-through display columns (object arrays),
+e.g. the raw Export1 cells written to the parsed workbook.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KB_MISSING = -1
+KB_PER_GB = 1024 * 1024
+
+
+def format_gb(val: Optional[float]) -> str:
+    # keep two decimals if needed, else integer
+    if val is None:
+        return ""
+    if abs(val - round(val)) < 0.005:
+        return str(int(round(val)))
+    return f"{val:.2f}"
+
+
+def intern(values: Sequence) -> Tuple[np.ndarray, List[str]]:
+    """Map strings to small int codes; returns (codes, names)."""
+    arr = np.array(["" if v is None else str(v) for v in values], dtype=object)
+    if not len(arr):
+        return np.zeros(0, dtype=np.int32), []
+    names, codes = np.unique(arr.astype(str), return_inverse=True)
+    return codes.astype(np.int32), [str(n) for n in names]
+
+
+def normalize_kb(values: Sequence, chunk: int = 1 << 18) -> Tuple[np.ndarray, np.ndarray]:
+    """Size cells -> (int64 kilobytes, bad mask), in bulk.
+
+    Accepts ints, integral floats ("1234.0") and digit strings with or without
+    correct thousands grouping ("1,234,567"). Empty/None/NaN is missing
+    (``KB_MISSING``, not bad); anything else ("1,23", "12 34", "-5", "1e9",
+    "12.5", over 18 digits) is ``KB_MISSING`` and flagged bad.
+    """
+    s = np.char.strip(np.asarray(values, dtype=object).astype(str))
+    kb = np.full(len(s), KB_MISSING, dtype=np.int64)
+    bad = np.zeros(len(s), dtype=bool)
+    for a in range(0, len(s), chunk):
+        kb[a:a + chunk], bad[a:a + chunk] = _normalize_chunk(s[a:a + chunk])
+    return kb, bad
+
+
+def _normalize_chunk(s: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # right-aligned character matrix, one row per column position (rows are contiguous)
+    n = len(s)
+    width = max(int(np.char.str_len(s).max()), 1)
+    m = np.char.rjust(s, width).astype(f"U{width}").view(np.uint32).reshape(n, width).T.copy()
+    space = m == ord(" ")
+    digit = (m >= ord("0")) & (m <= ord("9"))
+    comma = m == ord(",")
+    dot = m == ord(".")
+    missing = space.all(axis=0) | (s == "nan") | (s == "NaN") | (s == "None") | (s == "NaT")
+
+    first = np.argmin(space, axis=0)  # first non-blank column
+    end = np.where(dot.any(axis=0), np.argmax(dot, axis=0), width)  # integer part ends here
+    ok = ~missing & digit[first, np.arange(n)]
+    has_comma = np.zeros(n, dtype=bool)
+    commas_ok = np.ones(n, dtype=bool)
+    n_digits = np.zeros(n, dtype=np.int64)
+    kb = np.zeros(n, dtype=np.int64)
+    for j in range(width):
+        int_part = (j >= first) & (j < end)
+        # grouping commas sit every 4th column left of the integer part's end
+        grouped = int_part & (j > first) & ((end - 1 - j) % 4 == 3)
+        ok &= (
+            (j < first)
+            | (int_part & (digit[j] | comma[j]))
+            | ((j == end) & dot[j])
+            | ((j > end) & (m[j] == ord("0")))  # "1234.0" from float cells
+        )
+        has_comma |= comma[j] & int_part
+        commas_ok &= comma[j] == grouped
+        d = digit[j] & int_part
+        n_digits += d
+        kb = np.where(d, kb * 10 + (m[j].astype(np.int64) - ord("0")), kb)
+    ok &= (~has_comma | commas_ok) & (n_digits <= 18)
+    kb[~ok] = KB_MISSING
+    return kb, ~ok & ~missing
+
+
+def recode(codes: np.ndarray, names: List[str], target: List[str]) -> np.ndarray:
+    """Translate codes from ``names`` into the (extended) dictionary ``target``."""
+    index = {n: i for i, n in enumerate(target)}
+    for n in names:
+        if n not in index:
+            index[n] = len(target)
+            target.append(n)
+    lut = np.array([index[n] for n in names], dtype=np.int32)
+    return lut[codes] if len(names) else codes.astype(np.int32)
+
+
+def group_latest_sum(
+    groups: np.ndarray, n_groups: int, day: np.ndarray, kb: np.ndarray, valid: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per group: latest day among valid rows and the kilobyte sum on that day.
+
+    Groups with no valid rows get day -1 and sum 0. ``day`` is int days.
+    """
+    latest = np.full(n_groups, -1, dtype=np.int64)
+    np.maximum.at(latest, groups[valid], day[valid])
+    on_latest = valid & (day == latest[groups])
+    sums = np.zeros(n_groups, dtype=np.int64)
+    np.add.at(sums, groups[on_latest], kb[on_latest])
+    return latest, sums
+
+
+class JobTable:
+    __slots__ = (
+        "job_id", "policy", "start", "end", "kilobytes", "instance", "client",
+        "policies", "instances", "clients", "extra",
+    )
+
+    def __init__(
+        self,
+        job_id: np.ndarray,
+        policy: np.ndarray,
+        start: np.ndarray,
+        end: np.ndarray,
+        kilobytes: np.ndarray,
+        instance: np.ndarray,
+        client: np.ndarray,
+        policies: List[str],
+        instances: List[str],
+        clients: List[str],
+        extra: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        self.job_id = np.asarray(job_id, dtype=np.int64)
+        self.policy = np.asarray(policy, dtype=np.int32)
+        self.start = np.asarray(start, dtype="datetime64[s]")
+        self.end = np.asarray(end, dtype="datetime64[s]")
+        self.kilobytes = np.asarray(kilobytes, dtype=np.int64)
+        self.instance = np.asarray(instance, dtype=np.int32)
+        self.client = np.asarray(client, dtype=np.int32)
+        self.policies = policies
+        self.instances = instances
+        self.clients = clients
+        self.extra = extra or {}
+
+    @classmethod
+    def from_columns(
+        cls,
+        policy: Sequence,
+        start: Sequence,
+        end: Sequence,
+        kilobytes: Sequence,
+        job_id: Optional[Sequence] = None,
+        instance: Optional[Sequence] = None,
+        client: Optional[Sequence] = None,
+        extra: Optional[Dict[str, Sequence]] = None,
+    ) -> "JobTable":
+        n = len(policy)
+        pol_codes, pol_names = intern(policy)
+        inst_codes, inst_names = intern(instance if instance is not None else [""] * n)
+        cli_codes, cli_names = intern(client if client is not None else [""] * n)
+        return cls(
+            job_id=np.full(n, -1, dtype=np.int64) if job_id is None else job_id,
+            policy=pol_codes,
+            start=np.array(start, dtype="datetime64[s]"),
+            end=np.array(end, dtype="datetime64[s]"),
+            kilobytes=kilobytes,
+            instance=inst_codes,
+            client=cli_codes,
+            policies=pol_names,
+            instances=inst_names,
+            clients=cli_names,
+            extra={k: np.asarray(v, dtype=object) for k, v in (extra or {}).items()},
+        )
+
+    @classmethod
+    def empty(cls) -> "JobTable":
+        return cls.from_columns([], [], [], [])
+
+    @classmethod
+    def concat(cls, tables: Iterable["JobTable"]) -> "JobTable":
+        tables = list(tables)
+        if not tables:
+            return cls.empty()
+        policies: List[str] = []
+        instances: List[str] = []
+        clients: List[str] = []
+        pol = [recode(t.policy, t.policies, policies) for t in tables]
+        inst = [recode(t.instance, t.instances, instances) for t in tables]
+        cli = [recode(t.client, t.clients, clients) for t in tables]
+        extra_keys = set(tables[0].extra)
+        for t in tables[1:]:
+            extra_keys &= set(t.extra)
+        return cls(
+            job_id=np.concatenate([t.job_id for t in tables]),
+            policy=np.concatenate(pol),
+            start=np.concatenate([t.start for t in tables]),
+            end=np.concatenate([t.end for t in tables]),
+            kilobytes=np.concatenate([t.kilobytes for t in tables]),
+            instance=np.concatenate(inst),
+            client=np.concatenate(cli),
+            policies=policies,
+            instances=instances,
+            clients=clients,
+            extra={k: np.concatenate([t.extra[k] for t in tables]) for k in extra_keys},
+        )
+
+    def save(self, path: str, with_extra: bool = False) -> None:
+        """Write the core columns to an ``.npz`` file (``extra`` only if asked; it needs pickling)."""
+        extra = {f"extra__{k}": v for k, v in self.extra.items()} if with_extra else {}
+        np.savez_compressed(
+            path,
+            **extra,
+            job_id=self.job_id,
+            policy=self.policy,
+            start=self.start.astype(np.int64),
+            end=self.end.astype(np.int64),
+            kilobytes=self.kilobytes,
+            instance=self.instance,
+            client=self.client,
+            policies=np.array(self.policies, dtype=str),
+            instances=np.array(self.instances, dtype=str),
+            clients=np.array(self.clients, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path: str, with_extra: bool = False) -> "JobTable":
+        """Read a table written by ``save``; ``with_extra`` unpickles the extra columns (trusted files only)."""
+        with np.load(path, allow_pickle=with_extra) as z:
+            extra = {k[len("extra__"):]: z[k] for k in z.files if k.startswith("extra__")} if with_extra else {}
+            return cls(
+                job_id=z["job_id"],
+                policy=z["policy"],
+                start=z["start"].astype("datetime64[s]"),
+                end=z["end"].astype("datetime64[s]"),
+                kilobytes=z["kilobytes"],
+                instance=z["instance"],
+                client=z["client"],
+                policies=[str(v) for v in z["policies"]],
+                instances=[str(v) for v in z["instances"]],
+                clients=[str(v) for v in z["clients"]],
+                extra=extra,
+            )
+
+    def __len__(self) -> int:
+        return len(self.policy)
+
+    def take(self, index: np.ndarray) -> "JobTable":
+        """Row subset by boolean mask or integer index (dictionaries are shared)."""
+        return JobTable(
+            job_id=self.job_id[index],
+            policy=self.policy[index],
+            start=self.start[index],
+            end=self.end[index],
+            kilobytes=self.kilobytes[index],
+            instance=self.instance[index],
+            client=self.client[index],
+            policies=self.policies,
+            instances=self.instances,
+            clients=self.clients,
+            extra={k: v[index] for k, v in self.extra.items()},
+        )
+
+    def policy_names(self) -> np.ndarray:
+        return np.array(self.policies, dtype=object)[self.policy] if self.policies else np.zeros(0, dtype=object)
+
+    def instance_names(self) -> np.ndarray:
+        return np.array(self.instances, dtype=object)[self.instance] if self.instances else np.zeros(0, dtype=object)
+
+    def end_day(self) -> np.ndarray:
+        """End date as int days since epoch (-1 for NaT)."""
+        day = self.end.astype("datetime64[D]")
+        return np.where(np.isnat(day), -1, day.astype(np.int64))
+
+    def has_size(self) -> np.ndarray:
+        return self.kilobytes != KB_MISSING
+
+    def latest_date_mask(self) -> np.ndarray:
+        """Rows whose end date is the latest end date of their policy."""
+        day = self.end_day()
+        valid = day >= 0
+        latest = np.full(len(self.policies), -1, dtype=np.int64)
+        np.maximum.at(latest, self.policy[valid], day[valid])
+        return valid & (day == latest[self.policy])
+
+    def relabel(self, rules, default: Optional[str] = None) -> "JobTable":
+        """Apply a ``policy_rules.RuleSet`` and re-intern the resulting policy labels."""
+        units = np.where(self.has_size(), self.kilobytes, np.nan).astype(float)
+        labels = rules.apply(
+            (self.policy, self.policies),
+            units=units,
+            instances=(self.instance, self.instances),
+            clients=(self.client, self.clients),
+            default=default,
+        )
+        codes, names = intern(labels)
+        out = self.take(slice(None))
+        out.policy = codes
+        out.policies = names
+        return out
+
+    def sum_kb_by_policy(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Total kilobytes per policy; missing sizes count as 0."""
+        sel = self.has_size() if mask is None else (mask & self.has_size())
+        sums = np.zeros(len(self.policies), dtype=np.int64)
+        np.add.at(sums, self.policy[sel], self.kilobytes[sel])
+        seen = np.zeros(len(self.policies), dtype=bool)
+        seen[self.policy if mask is None else self.policy[mask]] = True
+        return {self.policies[i]: int(sums[i]) for i in np.flatnonzero(seen)}
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""NetBackup text "Jobs" export (fixed-width) -> JobTable.
+
+``extract_jobs`` builds the per-job table in one process; ``aggregate_jobs``
+parses a large file on all cores into per (policy, instance, date) totals.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from job_table import KB_MISSING, JobTable, normalize_kb
+
+# NetBackup "Jobs" export header columns (fixed-width)
+COLUMNS = [
+    "Job Id",
+    "Type",
+    "State",
+    "State Details",
+    "Status",
+    "Job Policy",
+    "Job Schedule",
+    "Client",
+    "Media Server",
+    "Start Time",
+    "Elapsed Time",
+    "End Time",
+    "Storage Unit",
+    "Attempt",
+    "Operation",
+    "Kilobytes",
+    "Files",
+    "Pathname",
+    "% Complete (Estimated)",
+    "Job PID",
+    "Owner",
+    "Copy",
+    "Parent Job ID",
+    "KB/Sec",
+    "Active Start",
+    "Active Elapsed",
+    "Robot",
+    "Vault",
+    "Profile",
+    "Session ID",
+    "Media to Eject",
+    "Data Movement",
+    "Off-Host Type",
+    "Master",
+    "Priority",
+    "Deduplication Rate",
+    "Transport",
+    "Accelerator Optimization",
+    "Instance or Database",
+    "Share Host",
+]
+
+
+def parse_nb_datetime(s: str) -> Optional[datetime]:
+    s = re.sub(r"\s+", " ", s.strip())
+    if not s:
+        return None
+    m = re.match(r"(\d{4})\. (\d{1,2})\. (\d{1,2}) (오전|오후) (\d{1,2}):(\d{2}):(\d{2})", s)
+    if m:
+        y, mo, d, ap, hh, mm, ss = m.groups()
+        hh = int(hh)
+        if ap == "오후" and hh != 12:
+            hh += 12
+        if ap == "오전" and hh == 12:
+            hh = 0
+        return datetime(int(y), int(mo), int(d), hh, int(mm), int(ss))
+    for fmt in ("%Y. %m. %d %H:%M:%S",):
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+def _int_or(s: str, default: int) -> int:
+    s = s.strip().replace(",", "")
+    return int(s) if s.isdigit() else default
+
+
+class AttemptIndex:
+    """Hash index over logical jobs for streaming retry/duplicate resolution.
+
+    A logical job is (Job Id, Parent Job ID); each row is one attempt of it.
+    The row kept is the last successful attempt (status 0/1), or the last
+    attempt when none succeeded. Rows repeated with the same attempt number
+    replace each other. Memory is one entry per logical job.
+    """
+
+    def __init__(self):
+        self._slots: Dict[Tuple[int, int], Tuple[int, Tuple[bool, int]]] = {}
+        self.rows = 0
+
+    def offer(self, job_id: int, parent_id: int, attempt: int, ok: bool) -> Optional[int]:
+        """Slot to write this row to (``len`` of kept rows for a new job), or None to drop it."""
+        self.rows += 1
+        key = (job_id, parent_id)
+        rank = (ok, attempt)
+        cur = self._slots.get(key)
+        if cur is None:
+            slot = len(self._slots)
+            self._slots[key] = (slot, rank)
+            return slot
+        if rank >= cur[1]:
+            self._slots[key] = (cur[0], rank)
+            return cur[0]
+        return None
+
+    def entries(self):
+        """(job id, parent id, ok, attempt, slot) per logical job."""
+        for (job_id, parent_id), (slot, (ok, attempt)) in self._slots.items():
+            yield job_id, parent_id, ok, attempt, slot
+
+    @property
+    def kept(self) -> int:
+        return len(self._slots)
+
+    @property
+    def collapsed(self) -> int:
+        return self.rows - self.kept
+
+
+Span = Tuple[str, int, int]
+
+# Kilobytes cell whose number runs past its fixed-width span (flagged bad by normalize_kb)
+KB_OVERFLOW = "<overflow>"
+_NUM_BYTES = frozenset(b"0123456789,")
+
+
+def header_layout(lines: List[bytes]) -> Optional[Tuple[List[Span], int]]:
+    """(column spans, index of the first data line) from the fixed-width header, or None."""
+    header_idx = -1
+    header_line = b""
+    for i, ln in enumerate(lines):
+        if ln.startswith(b"Job Id") and b"Job Policy" in ln and b"Start Time" in ln:
+            header_idx = i
+            header_line = ln
+            break
+    if header_idx == -1:
+        return None
+
+    starts = {}
+    pos = 0
+    for col in [c.encode() for c in COLUMNS]:
+        idx = header_line.find(col, pos)
+        if idx == -1:
+            return None
+        starts[col] = idx
+        pos = idx + len(col)
+
+    spans = []
+    cols_b = [c.encode() for c in COLUMNS]
+    for i, col in enumerate(cols_b):
+        start = starts[col]
+        end = starts[cols_b[i + 1]] if i < len(cols_b) - 1 else len(header_line)
+        spans.append((col.decode(), start, end))
+
+    j = header_idx + 1
+    while j < len(lines) and lines[j].strip() == b"":
+        j += 1
+    if j < len(lines) and set(lines[j].strip()) == {ord("-")}:
+        data_start = j + 1
+    else:
+        data_start = header_idx + 1
+    return spans, data_start
+
+
+def _parse_row(ln: bytes, spans: List[Span]) -> Optional[Dict[str, str]]:
+    if not ln.strip():
+        return None
+    if ln.startswith(b"----") or ln.startswith(b"Job Id"):
+        return None
+
+    row = {}
+    for col, s, e in spans:
+        row[col] = ln[s:e].strip().decode("cp949", "ignore")
+
+    if not row.get("Job Id", "").isdigit():
+        return None
+
+    for col, s, e in spans:
+        if col == "Kilobytes" and _overflows(ln, s, e):
+            row["Kilobytes"] = KB_OVERFLOW
+    return row
+
+
+def _overflows(ln: bytes, s: int, e: int) -> bool:
+    """A number touching either edge of the span continues into the neighbouring column."""
+    left = 0 < s < len(ln) and ln[s - 1] in _NUM_BYTES and ln[s] in _NUM_BYTES
+    right = 0 < e < len(ln) and ln[e - 1] in _NUM_BYTES and ln[e] in _NUM_BYTES
+    return left or right
+
+
+def _offer(index: AttemptIndex, job_id: int, row: Dict[str, str]) -> Optional[int]:
+    status = _int_or(row.get("Status", ""), -1)
+    return index.offer(
+        job_id,
+        _int_or(row.get("Parent Job ID", ""), job_id),
+        _int_or(row.get("Attempt", ""), 0),
+        status in (0, 1),
+    )
+
+
+def extract_jobs(raw_bytes: bytes, dedup: bool = True, stats: Optional[Dict[str, int]] = None) -> JobTable:
+    """Parse job rows; with ``dedup`` only the final attempt of each logical job is kept.
+
+    ``stats`` (if given) receives ``rows``, ``kept``, ``collapsed`` and
+    ``bad_kb`` (kept rows whose Kilobytes cell is not a valid size) counts.
+    """
+    lines = raw_bytes.splitlines()
+    layout = header_layout(lines)
+    if layout is None:
+        return JobTable.empty()
+    spans, data_start = layout
+
+    # one list per column (no per-job dicts); arrays are built once at the end
+    job_ids: List[int] = []
+    policies: List[str] = []
+    clients: List[str] = []
+    instances: List[str] = []
+    starts_dt: List[Optional[datetime]] = []
+    ends_dt: List[Optional[datetime]] = []
+    kbs: List[str] = []  # raw cells, normalized in one pass at the end
+    columns = (job_ids, policies, clients, instances, starts_dt, ends_dt, kbs)
+    index = AttemptIndex()
+    for ln in lines[data_start:]:
+        row = _parse_row(ln, spans)
+        if row is None:
+            continue
+
+        job_id = int(row["Job Id"])
+        if dedup:
+            slot = _offer(index, job_id, row)
+            if slot is None:
+                continue
+        else:
+            slot = len(job_ids)
+
+        values = (
+            job_id,
+            row.get("Job Policy", ""),
+            row.get("Client", ""),
+            row.get("Instance or Database", ""),
+            parse_nb_datetime(row.get("Start Time", "")),
+            parse_nb_datetime(row.get("End Time", "")),
+            row.get("Kilobytes", ""),
+        )
+        if slot == len(job_ids):
+            for col, v in zip(columns, values):
+                col.append(v)
+        else:
+            # later attempt of a job already seen: overwrite it in place
+            for col, v in zip(columns, values):
+                col[slot] = v
+
+    kb, bad = normalize_kb(kbs)
+    if stats is not None:
+        stats["rows"] = index.rows if dedup else len(job_ids)
+        stats["kept"] = len(job_ids)
+        stats["collapsed"] = index.collapsed if dedup else 0
+        stats["bad_kb"] = int(bad.sum())
+
+    return JobTable.from_columns(
+        policy=policies,
+        start=starts_dt,
+        end=ends_dt,
+        kilobytes=kb,
+        job_id=job_ids,
+        instance=instances,
+        client=clients,
+    )
+
+
+# --- parallel aggregation -------------------------------------------------
+#
+# The body is split into line-aligned byte ranges; each worker parses one
+# range and returns per (policy, instance, end date) sums plus a compact
+# ledger of the logical jobs it kept (numpy arrays, no row objects). The
+# ledger lets the merge drop attempts of the same job that landed in
+# different ranges, so results match ``extract_jobs`` with dedup.
+
+HEAD_BYTES = 1 << 20
+
+
+def _aggregate_range(task: Tuple) -> Dict:
+    path, start, end, spans, dedup = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    groups: Dict[Tuple[str, str, str], int] = {}
+    index = AttemptIndex()
+    slot_group: List[int] = []
+    slot_kb: List[str] = []
+    for ln in data.splitlines():
+        row = _parse_row(ln, spans)
+        if row is None:
+            continue
+        job_id = int(row["Job Id"])
+        slot = _offer(index, job_id, row) if dedup else len(slot_group)
+        if slot is None:
+            continue
+        end_dt = parse_nb_datetime(row.get("End Time", ""))
+        key = (row.get("Job Policy", ""), row.get("Instance or Database", ""), end_dt.date().isoformat() if end_dt else "")
+        g = groups.setdefault(key, len(groups))
+        kb = row.get("Kilobytes", "")
+        if slot == len(slot_group):
+            slot_group.append(g)
+            slot_kb.append(kb)
+        else:
+            slot_group[slot] = g
+            slot_kb[slot] = kb
+
+    group = np.array(slot_group, dtype=np.int64)
+    kb, bad = normalize_kb(slot_kb)
+    sized = kb != KB_MISSING
+    out = {
+        "groups": list(groups),
+        "kb": np.bincount(group[sized], weights=kb[sized], minlength=len(groups)).astype(np.int64),
+        "sized": np.bincount(group[sized], minlength=len(groups)),
+        "jobs": np.bincount(group, minlength=len(groups)),
+        "rows": index.rows if dedup else len(slot_group),
+        "bad_kb": int(bad.sum()),
+    }
+    if dedup:
+        n = len(slot_group)
+        ledger = np.zeros((n, 3), dtype=np.int64)  # job id, parent id, rank
+        slots = np.zeros(n, dtype=np.int64)
+        for i, (job_id, parent_id, ok, attempt, slot) in enumerate(index.entries()):
+            ledger[i] = (job_id, parent_id, int(ok) << 32 | attempt)
+            slots[i] = slot
+        out["ledger"] = ledger
+        out["ledger_group"] = group[slots]
+        out["ledger_kb"] = kb[slots]
+        out["ledger_bad"] = bad[slots]
+    return out
+
+
+def _byte_ranges(path: str, start: int, parts: int) -> List[Tuple[int, int]]:
+    size = os.path.getsize(path)
+    bounds = [start]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            pos = start + (size - start) * i // parts
+            if pos <= bounds[-1]:
+                continue
+            f.seek(pos)
+            f.readline()  # move to the next line start
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def aggregate_jobs(
+    path: str,
+    workers: Optional[int] = None,
+    dedup: bool = True,
+    stats: Optional[Dict[str, int]] = None,
+) -> JobTable:
+    """Parse a text export in parallel into one row per (policy, instance, end date).
+
+    Each row's ``kilobytes`` is the group total (KB_MISSING when no job had a
+    size), ``end`` is the date at 00:00 and ``extra["jobs"]`` the job count;
+    latest-date/label sums over it match the per-job table.
+    """
+    with open(path, "rb") as f:
+        head = f.read(HEAD_BYTES)
+    head_lines = head.split(b"\n")
+    layout = header_layout([ln.rstrip(b"\r") for ln in head_lines[:-1]])
+    if layout is None:
+        return JobTable.empty()
+    spans, data_start = layout
+    body_start = sum(len(ln) + 1 for ln in head_lines[:data_start])
+
+    workers = workers or os.cpu_count() or 1
+    ranges = _byte_ranges(path, body_start, workers * 4)
+    tasks = [(path, a, b, spans, dedup) for a, b in ranges]
+    if workers <= 1 or len(tasks) <= 1:
+        partials = [_aggregate_range(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(_aggregate_range, tasks))
+
+    # merge: partial group codes -> global codes, then sum
+    names: Dict[Tuple[str, str, str], int] = {}
+    remaps = [np.array([names.setdefault(k, len(names)) for k in p["groups"]], dtype=np.int64) for p in partials]
+    n = len(names)
+    kb = np.zeros(n, dtype=np.int64)
+    sized = np.zeros(n, dtype=np.int64)
+    jobs = np.zeros(n, dtype=np.int64)
+    for p, remap in zip(partials, remaps):
+        if len(remap):
+            np.add.at(kb, remap, p["kb"])
+            np.add.at(sized, remap, p["sized"])
+            np.add.at(jobs, remap, p["jobs"])
+    rows = sum(p["rows"] for p in partials)
+    bad_kb = sum(p["bad_kb"] for p in partials)
+
+    if dedup and partials:
+        # a logical job kept in several ranges: keep the best rank (later range wins ties)
+        ledger = np.concatenate([p["ledger"] for p in partials])
+        order_in_file = np.concatenate([np.full(len(p["ledger"]), i) for i, p in enumerate(partials)])
+        group = np.concatenate([remap[p["ledger_group"]] for p, remap in zip(partials, remaps)])
+        led_kb = np.concatenate([p["ledger_kb"] for p in partials])
+        order = np.lexsort((order_in_file, ledger[:, 2], ledger[:, 1], ledger[:, 0]))
+        key = ledger[order, :2]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = np.any(key[1:] != key[:-1], axis=1)
+        losers = order[~last]
+        lose_sized = led_kb[losers] != KB_MISSING
+        np.subtract.at(kb, group[losers[lose_sized]], led_kb[losers[lose_sized]])
+        np.subtract.at(sized, group[losers[lose_sized]], 1)
+        np.subtract.at(jobs, group[losers], 1)
+        bad_kb -= int(np.concatenate([p["ledger_bad"] for p in partials])[losers].sum())
+
+    keep = jobs > 0
+    keys = [k for k, i in names.items() if keep[i]]
+    if stats is not None:
+        stats["rows"] = rows
+        stats["kept"] = int(jobs.sum())
+        stats["collapsed"] = rows - int(jobs.sum())
+        stats["bad_kb"] = bad_kb
+    return JobTable.from_columns(
+        policy=[k[0] for k in keys],
+        start=[None] * len(keys),
+        end=[datetime.fromisoformat(k[2]) if k[2] else None for k in keys],
+        kilobytes=np.where(sized[keep] > 0, kb[keep], KB_MISSING),
+        instance=[k[1] for k in keys],
+        extra={"jobs": jobs[keep]},
+    )
@@ -1,248 +1,49 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
+import json
 import os
-import re
+import shutil
 import subprocess
-from datetime import datetime
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
-import xml.etree.ElementTree as ET
 
+import numpy as np
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.utils import ImageReader
 
-# NetBackup "Jobs" export header columns (fixed-width)
-COLUMNS = [
-    "Job Id",
-    "Type",
-    "State",
-    "State Details",
-    "Status",
-    "Job Policy",
-    "Job Schedule",
-    "Client",
-    "Media Server",
-    "Start Time",
-    "Elapsed Time",
-    "End Time",
-    "Storage Unit",
-    "Attempt",
-    "Operation",
-    "Kilobytes",
-    "Files",
-    "Pathname",
-    "% Complete (Estimated)",
-    "Job PID",
-    "Owner",
-    "Copy",
-    "Parent Job ID",
-    "KB/Sec",
-    "Active Start",
-    "Active Elapsed",
-    "Robot",
-    "Vault",
-    "Profile",
-    "Session ID",
-    "Media to Eject",
-    "Data Movement",
-    "Off-Host Type",
-    "Master",
-    "Priority",
-    "Deduplication Rate",
-    "Transport",
-    "Accelerator Optimization",
-    "Instance or Database",
-    "Share Host",
-]
+from job_table import KB_PER_GB, JobTable, group_latest_sum
+from nbu_text import aggregate_jobs, extract_jobs
+from pdf_layout import bbox_union, find_line_words, find_word, parse_bbox, volume_column
+from policy_rules import POLICY_ROWS, RuleSet, policy_row_rules
 
 TEMPLATE_PDF_DEFAULT = "/home/owen/[벽산] Veritas 백업상태 점검보고서_2026_1월_5주차.pdf"
 TEMPLATE_IMG_DIR = "/tmp/nbu_template_img"
 FONT_PATH = "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf"
 
-POLICY_ROWS = [
-    {"label": "ERP-DB_ORACLE", "policy": "ERP-DB_ORACLE"},
-    {"label": "ERP_ORA_DUMP", "policy": "ERP_ORA_DUMP"},
-    {"label": "E-HR_ORA_DUMP", "policy": "E-HR_ORA_DUMP"},
-    {"label": "SFA_MSSQL", "policy": "SFA_MSSQL", "instance": "SFA"},
-    {"label": "PRM_ORACLE_PRMIF", "policy": "PRM_ORACLE_PRMIF"},
-    {"label": "PRM_ORACLE_PRMORA", "policy": "PRM_ORACLE_PRMORA"},
-    {"label": "ReportServer", "policy": "HZDB_MSSQL", "instance": "ReportServer"},
-    {"label": "SMS", "policy": "HZDB_MSSQL", "instance": "SMS"},
-    {"label": "NEOE", "policy": "HZDB_MSSQL", "instance": "NEOE"},
-    {"label": "ERP-APP2", "policy": "ERP-APP2"},
-    {"label": "E-HR_WAS", "policy": "E-HR_WAS"},
-    {"label": "E-HR_WEB", "policy": "E-HR_WEB"},
-    {"label": "PRM_WAS", "policy": "PRM_WAS"},
-    {"label": "PRM_WEB", "policy": "PRM_WEB"},
-    {"label": "HZWEB_ERP", "policy": "HZWEB_ERP"},
-    {"label": "ERP-APP", "policy": "ERP-APP"},
-]
-
-
-def parse_nb_datetime(s: str) -> Optional[datetime]:
-    s = re.sub(r"\s+", " ", s.strip())
-    if not s:
-        return None
-    m = re.match(r"(\d{4})\. (\d{1,2})\. (\d{1,2}) (오전|오후) (\d{1,2}):(\d{2}):(\d{2})", s)
-    if m:
-        y, mo, d, ap, hh, mm, ss = m.groups()
-        hh = int(hh)
-        if ap == "오후" and hh != 12:
-            hh += 12
-        if ap == "오전" and hh == 12:
-            hh = 0
-        return datetime(int(y), int(mo), int(d), hh, int(mm), int(ss))
-    for fmt in ("%Y. %m. %d %H:%M:%S",):
-        try:
-            return datetime.strptime(s, fmt)
-        except ValueError:
-            pass
-    return None
-
-
-def kb_to_gb(kb_str: str) -> Optional[float]:
-    kb_str = kb_str.strip().replace(",", "")
-    if not kb_str:
-        return None
-    try:
-        kb = float(kb_str)
-        return round(kb / 1024.0 / 1024.0, 2)  # KB -> GB
-    except ValueError:
-        return None
-
-
-def extract_jobs(raw_bytes: bytes) -> List[Dict]:
-    lines = raw_bytes.splitlines()
-
-    header_idx = -1
-    header_line = b""
-    for i, ln in enumerate(lines):
-        if ln.startswith(b"Job Id") and b"Job Policy" in ln and b"Start Time" in ln:
-            header_idx = i
-            header_line = ln
-            break
-    if header_idx == -1:
-        return []
-
-    starts = {}
-    pos = 0
-    for col in [c.encode() for c in COLUMNS]:
-        idx = header_line.find(col, pos)
-        if idx == -1:
-            return []
-        starts[col] = idx
-        pos = idx + len(col)
-
-    spans = []
-    cols_b = [c.encode() for c in COLUMNS]
-    for i, col in enumerate(cols_b):
-        start = starts[col]
-        end = starts[cols_b[i + 1]] if i < len(cols_b) - 1 else len(header_line)
-        spans.append((col, start, end))
-
-    j = header_idx + 1
-    while j < len(lines) and lines[j].strip() == b"":
-        j += 1
-    if j < len(lines) and set(lines[j].strip()) == {ord("-")}:
-        data_start = j + 1
-    else:
-        data_start = header_idx + 1
-
-    jobs = []
-    for ln in lines[data_start:]:
-        if not ln.strip():
-            continue
-        if ln.startswith(b"----") or ln.startswith(b"Job Id"):
-            continue
 
-        row = {}
-        for col, s, e in spans:
-            row[col.decode()] = ln[s:e].strip().decode("cp949", "ignore")
+def template_image_paths(template_pdf: str, n_pages: int) -> List[str]:
+    """Cached PNG path per template page (keyed by template path/mtime/size; rendered lazily by workers)."""
+    st = os.stat(template_pdf)
+    key = hashlib.sha1(f"{os.path.abspath(template_pdf)}:{st.st_mtime_ns}:{st.st_size}".encode("utf-8")).hexdigest()
+    img_dir = os.path.join(TEMPLATE_IMG_DIR, key[:16])
+    os.makedirs(img_dir, exist_ok=True)
+    return [os.path.join(img_dir, f"page-{n}.png") for n in range(1, n_pages + 1)]
 
-        if not row.get("Job Id", "").isdigit():
-            continue
 
-        candidates = re.findall(rb"\b\d{1,3}(?:,\d{3})+\b|\b\d+\b", ln)
-        if candidates:
-            k_val = max(candidates, key=lambda b: int(b.replace(b",", b""))).decode("ascii", "ignore")
-        else:
-            k_val = row.get("Kilobytes", "")
-
-        jobs.append({
-            "job_id": row.get("Job Id", ""),
-            "policy": row.get("Job Policy", ""),
-            "client": row.get("Client", ""),
-            "start_dt": parse_nb_datetime(row.get("Start Time", "")),
-            "end_dt": parse_nb_datetime(row.get("End Time", "")),
-            "size_gb": kb_to_gb(k_val),
-            "pathname": row.get("Pathname", ""),
-            "instance": row.get("Instance or Database", ""),
-        })
-
-    return jobs
-
-
-def run_pdftotext_bbox(template_pdf: str) -> str:
-    out = subprocess.check_output(["pdftotext", "-bbox", template_pdf, "-"])
-    return out.decode("utf-8", "ignore")
-
-
-def parse_bbox(template_pdf: str) -> Tuple[float, float, List[List[Dict]]]:
-    ns = {"x": "http://www.w3.org/1999/xhtml"}
-    xml_text = run_pdftotext_bbox(template_pdf)
-    root = ET.fromstring(xml_text)
-    pages = root.findall(".//x:page", ns)
-    if not pages:
-        raise SystemExit("TEMPLATE_PARSE_FAIL: no pages in bbox output")
-
-    page_words: List[List[Dict]] = []
-    width = float(pages[0].attrib["width"])
-    height = float(pages[0].attrib["height"])
-
-    for p in pages:
-        words = []
-        for w in p.findall(".//x:word", ns):
-            text = "".join(w.itertext())
-            words.append({
-                "text": text,
-                "xMin": float(w.attrib["xMin"]),
-                "yMin": float(w.attrib["yMin"]),
-                "xMax": float(w.attrib["xMax"]),
-                "yMax": float(w.attrib["yMax"]),
-            })
-        page_words.append(words)
-    return width, height, page_words
-
-
-def bbox_union(words: List[Dict]) -> Tuple[float, float, float, float]:
-    xMin = min(w["xMin"] for w in words)
-    yMin = min(w["yMin"] for w in words)
-    xMax = max(w["xMax"] for w in words)
-    yMax = max(w["yMax"] for w in words)
-    return xMin, yMin, xMax, yMax
-
-
-def find_word(words: List[Dict], text: str) -> Optional[Dict]:
-    for w in words:
-        if w["text"] == text:
-            return w
-    return None
-
-
-def find_line_words(words: List[Dict], target_y: float, tol: float = 0.7) -> List[Dict]:
-    line_words = [w for w in words if abs(w["yMin"] - target_y) <= tol]
-    return sorted(line_words, key=lambda w: w["xMin"])
-
-
-def ensure_template_images(template_pdf: str) -> Tuple[str, str]:
-    os.makedirs(TEMPLATE_IMG_DIR, exist_ok=True)
-    page1 = os.path.join(TEMPLATE_IMG_DIR, "page-1.png")
-    page2 = os.path.join(TEMPLATE_IMG_DIR, "page-2.png")
-    if not (os.path.exists(page1) and os.path.exists(page2)):
-        subprocess.check_call(["pdftoppm", "-png", "-r", "150", template_pdf, os.path.join(TEMPLATE_IMG_DIR, "page")])
-    return page1, page2
+def _ensure_page_image(template_pdf: str, page_no: int, img_path: str) -> None:
+    if os.path.exists(img_path):
+        return
+    tmp_prefix = f"{img_path[:-4]}.{os.getpid()}"
+    subprocess.check_call([
+        "pdftoppm", "-png", "-r", "150", "-f", str(page_no), "-l", str(page_no), "-singlefile",
+        template_pdf, tmp_prefix,
+    ])
+    os.replace(tmp_prefix + ".png", img_path)
 
 
 def draw_replacement(c: canvas.Canvas, page_height: float, box: Tuple[float, float, float, float], text: str, font_name: str):
@@ -262,24 +63,165 @@ def draw_replacement(c: canvas.Canvas, page_height: float, box: Tuple[float, flo
         c.drawString(xMin + 2, page_height - yMax + 1, text)
 
 
-def latest_sum_by_policy(jobs: List[Dict], policy: str, instance: Optional[str] = None) -> Optional[float]:
-    filtered = []
-    for j in jobs:
-        if j["policy"] != policy:
-            continue
-        if instance:
-            if instance.lower() not in (j.get("instance") or "").lower():
-                continue
-        if j["end_dt"] is None or j["size_gb"] is None:
-            continue
-        filtered.append(j)
-
-    if not filtered:
-        return None
+def latest_sums_by_label(jobs: JobTable, rows: List[Dict] = POLICY_ROWS) -> Dict[str, Optional[float]]:
+    # Labels depend only on (policy, instance): resolve each distinct code pair once, then gather.
+    n_inst = max(len(jobs.instances), 1)
+    pairs, pair_of_row = np.unique(jobs.policy.astype(np.int64) * n_inst + jobs.instance, return_inverse=True)
+    pair_policy, pair_instance = np.divmod(pairs, n_inst)
+    labels = RuleSet(policy_row_rules(rows)).apply(
+        (pair_policy, jobs.policies),
+        instances=(pair_instance, jobs.instances),
+        default="",
+    )
+    label_names = [r["label"] for r in rows]
+    index = {label: i for i, label in enumerate(label_names)}
+    pair_group = np.array([index.get(label, -1) for label in labels], dtype=np.int64)
+    groups = pair_group[pair_of_row.reshape(-1)]
+    valid = (groups >= 0) & jobs.has_size() & ~np.isnat(jobs.end)
+    groups = np.where(valid, groups, 0)
+
+    latest, sums = group_latest_sum(groups, len(label_names), jobs.end_day(), jobs.kilobytes, valid)
+    return {
+        label: (round(float(sums[i]) / KB_PER_GB, 2) if latest[i] >= 0 else None)
+        for i, label in enumerate(label_names)
+    }
+
+
+def latest_sum_by_policy(jobs: JobTable, policy: str, instance: Optional[str] = None) -> Optional[float]:
+    return latest_sums_by_label(jobs, [{"label": policy, "policy": policy, "instance": instance}])[policy]
+
+
+def page_layouts(page_words: List[List[Dict]], rows: List[Dict] = POLICY_ROWS) -> List[Dict[str, Tuple[float, float, float, float]]]:
+    """Value box per policy row, per template page.
+
+    Rows are placed on the first page (in order) whose "백업용량" table lists
+    their label below the table header, so a policy list spanning several
+    template pages is laid out page by page. Pages without a table header
+    line (e.g. a cover mentioning 백업용량) get no boxes; rows found on no
+    page are left for ``continuation_pages``.
+    """
+    placed = set()
+    layouts = []
+    for words in page_words:
+        boxes: Dict[str, Tuple[float, float, float, float]] = {}
+        bounds = volume_column(words)
+        if bounds:
+            col_xmin, col_xmax, header_bottom = bounds
+            body = [w for w in words if w["yMin"] >= header_bottom]
+            for row in rows:
+                label = row["label"]
+                if label in placed:
+                    continue
+                w = find_word(body, label)
+                if not w:
+                    continue
+                line_words = find_line_words(words, w["yMin"], tol=0.7)
+                if not line_words:
+                    continue
+                _, yMin, _, yMax = bbox_union(line_words)
+                boxes[label] = (col_xmin, yMin, col_xmax, yMax)
+                placed.add(label)
+        layouts.append(boxes)
+    return layouts
+
+
+CONT_MARGIN = 40.0
+CONT_LINE = 18.0
+
+
+def continuation_pages(
+    labels: List[str], values: Dict[str, str], page_width: float, page_height: float
+) -> List[List[Tuple[Tuple[float, float, float, float], str]]]:
+    """Cells of generated pages listing rows the template table has no line for.
+
+    Boxes use the template's top-left bbox coordinates, like ``page_layouts``.
+    """
+    label_x = (CONT_MARGIN, page_width / 2)
+    value_x = (page_width / 2, page_width - CONT_MARGIN)
+    first_row = CONT_MARGIN + 3 * CONT_LINE
+    per_page = max(1, int((page_height - CONT_MARGIN - first_row) // CONT_LINE))
+    pages = []
+    for start in range(0, len(labels), per_page):
+        y = CONT_MARGIN
+        cells = [((CONT_MARGIN, y, value_x[1], y + CONT_LINE), "백업용량 (계속)")]
+        y += 2 * CONT_LINE
+        cells.append(((label_x[0], y, label_x[1], y + CONT_LINE * 0.8), "정책"))
+        cells.append(((value_x[0], y, value_x[1], y + CONT_LINE * 0.8), "백업용량"))
+        for i, label in enumerate(labels[start:start + per_page]):
+            y = first_row + i * CONT_LINE
+            cells.append(((label_x[0], y, label_x[1], y + CONT_LINE * 0.8), label))
+            cells.append(((value_x[0], y, value_x[1], y + CONT_LINE * 0.8), values.get(label, "")))
+        pages.append(cells)
+    return pages
+
+
+def _render_page(task: Tuple) -> str:
+    """Worker: one page (template background, if any, + replaced cells) -> single-page PDF."""
+    template_pdf, page_no, img_path, page_width, page_height, cells, out_path = task
+    if "KFont" not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont("KFont", FONT_PATH))
+
+    c = canvas.Canvas(out_path, pagesize=landscape(A4))
+    if img_path:
+        _ensure_page_image(template_pdf, page_no, img_path)
+        c.drawImage(ImageReader(img_path), 0, 0, width=page_width, height=page_height)
+    for box, text in cells:
+        draw_replacement(c, page_height, box, text, "KFont")
+    c.showPage()
+    c.save()
+    return out_path
+
+
+def merge_pages(page_pdfs: List[str], out_pdf: str) -> None:
+    if len(page_pdfs) == 1:
+        shutil.move(page_pdfs[0], out_pdf)
+        return
+    # poppler-utils (same package as pdftotext/pdftoppm)
+    subprocess.check_call(["pdfunite", *page_pdfs, out_pdf])
+
+
+def render_report(
+    template_pdf: str,
+    out_pdf: str,
+    values: Dict[str, str],
+    rows: List[Dict] = POLICY_ROWS,
+    workers: Optional[int] = None,
+) -> None:
+    """Draw every template page and put ``values[label]`` into the "백업용량" column.
+
+    Rows the template table has no line for are listed on continuation pages
+    appended after the template pages, so no value is dropped. Pages are
+    rendered in parallel worker processes and merged in page order.
+    """
+    page_width, page_height, page_words = parse_bbox(template_pdf)
+    layouts = page_layouts(page_words, rows)
+    if not any(layouts):
+        raise SystemExit("TEMPLATE_PARSE_FAIL: cannot determine backup volume column bounds")
+    missing = [r["label"] for r in rows if not any(r["label"] in boxes for boxes in layouts)]
+    extra_pages = continuation_pages(missing, values, page_width, page_height)
+    if missing:
+        print(f"[WARN] rows not found in template, listed on {len(extra_pages)} continuation page(s): {', '.join(missing)}")
 
-    latest_date = max(j["end_dt"].date() for j in filtered)
-    total = round(sum(j["size_gb"] for j in filtered if j["end_dt"].date() == latest_date), 2)
-    return total
+    os.makedirs(os.path.dirname(out_pdf), exist_ok=True)
+    images = template_image_paths(template_pdf, len(page_words))
+
+    with tempfile.TemporaryDirectory(prefix=".pages_", dir=os.path.dirname(out_pdf)) as tmp:
+        tasks = []
+        for i, boxes in enumerate(layouts):
+            cells = [(box, values.get(label, "")) for label, box in boxes.items()]
+            out_page = os.path.join(tmp, f"page-{i + 1}.pdf")
+            tasks.append((template_pdf, i + 1, images[i], page_width, page_height, cells, out_page))
+        for j, cells in enumerate(extra_pages):
+            out_page = os.path.join(tmp, f"page-{len(layouts) + j + 1}.pdf")
+            tasks.append((None, None, None, page_width, page_height, cells, out_page))
+
+        workers = workers or min(len(tasks), os.cpu_count() or 1)
+        if workers <= 1:
+            page_pdfs = [_render_page(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                page_pdfs = list(pool.map(_render_page, tasks))
+        merge_pages(page_pdfs, out_pdf)
 
 
 def main():
@@ -287,77 +229,37 @@ def main():
     ap.add_argument("--in", dest="in_path", required=True)
     ap.add_argument("--out", dest="out_pdf", required=True)
     ap.add_argument("--template-pdf", default=TEMPLATE_PDF_DEFAULT)
+    ap.add_argument("--keep-attempts", action="store_true", help="Sum every row (no retry/duplicate collapsing)")
+    ap.add_argument("--policy-rows", help="JSON list of {label, policy, instance} (default: built-in POLICY_ROWS)")
+    ap.add_argument("--workers", type=int, help="Page render processes (default: one per page, up to CPU count)")
+    ap.add_argument("--parse-workers", type=int, help="Parse large exports in N processes (aggregates only)")
     args = ap.parse_args()
 
+    rows = POLICY_ROWS
+    if args.policy_rows:
+        with open(args.policy_rows, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+
     in_path = os.path.abspath(args.in_path)
     out_pdf = os.path.abspath(args.out_pdf)
 
-    raw_bytes = open(in_path, "rb").read()
-    jobs = extract_jobs(raw_bytes)
-    if not jobs:
+    stats: dict = {}
+    if args.parse_workers and args.parse_workers > 1:
+        # per (policy, instance, date) totals from all cores; same label sums as the per-job table
+        jobs = aggregate_jobs(in_path, args.parse_workers, dedup=not args.keep_attempts, stats=stats)
+    else:
+        raw_bytes = open(in_path, "rb").read()
+        jobs = extract_jobs(raw_bytes, dedup=not args.keep_attempts, stats=stats)
+    if not len(jobs):
         raise SystemExit("PARSE_FAIL: 'Job Id ...' header not found or no job rows parsed. Check Export1.txt format.")
 
-    page_width, page_height, page_words = parse_bbox(args.template_pdf)
-    page1_img, page2_img = ensure_template_images(args.template_pdf)
-
-    os.makedirs(os.path.dirname(out_pdf), exist_ok=True)
-
-    pdfmetrics.registerFont(TTFont("KFont", FONT_PATH))
-    c = canvas.Canvas(out_pdf, pagesize=landscape(A4))
-
-    # Page 1 background only
-    c.drawImage(ImageReader(page1_img), 0, 0, width=page_width, height=page_height)
-    c.showPage()
-
-    # Page 2: background + replace only the "백업용량" column
-    c.drawImage(ImageReader(page2_img), 0, 0, width=page_width, height=page_height)
-    words_p2 = page_words[1]
-
-    # Determine backup volume column bounds
-    col_xmin = None
-    col_xmax = None
-
-    header_backup = find_word(words_p2, "백업용량")
-    if header_backup:
-        col_xmin = header_backup["xMin"] - 2
-        col_xmax = header_backup["xMax"] + 18
-
-    header_path = [find_word(words_p2, t) for t in ["백업", "대상", "및", "경로"]]
-    header_result = find_word(words_p2, "백업결과")
-    if all(header_path) and header_result:
-        seq = header_path
-        col_xmin = max(w["xMax"] for w in seq) + 2
-        col_xmax = header_result["xMin"] - 2
-
-    if col_xmin is None or col_xmax is None or col_xmax <= col_xmin:
-        raise SystemExit("TEMPLATE_PARSE_FAIL: cannot determine backup volume column bounds")
-
-    # Build row boxes from label positions
-    row_boxes: Dict[str, Tuple[float, float, float, float]] = {}
-    for row in POLICY_ROWS:
-        w = find_word(words_p2, row["label"])
-        if not w:
-            continue
-        line_words = find_line_words(words_p2, w["yMin"], tol=0.7)
-        if not line_words:
-            continue
-        _, yMin, _, yMax = bbox_union(line_words)
-        row_boxes[row["label"]] = (col_xmin, yMin, col_xmax, yMax)
-
-    # Apply replacements
-    for row in POLICY_ROWS:
-        label = row["label"]
-        box = row_boxes.get(label)
-        if not box:
-            continue
-        total = latest_sum_by_policy(jobs, row["policy"], row.get("instance"))
-        text = f"{total:.2f}" if total is not None else ""
-        draw_replacement(c, page_height, box, text, "KFont")
-
-    c.showPage()
-    c.save()
+    totals = latest_sums_by_label(jobs, rows)
+    values = {label: (f"{total:.2f}" if total is not None else "") for label, total in totals.items()}
+    render_report(args.template_pdf, out_pdf, values, rows, args.workers)
 
-    print(f"[OK] parsed_jobs_total={len(jobs)}")
+    print(f"[OK] parsed_jobs_total={stats['kept']} (rows={stats['rows']}, collapsed={stats['collapsed']})")
+    if stats["bad_kb"]:
+        print(f"[WARN] Kilobytes: {stats['bad_kb']} job(s) with a malformed or overflowing size left empty")
     print(f"[OK] PDF generated: {out_pdf}")
 
 
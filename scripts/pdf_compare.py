@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Visual regression check between a reference PDF and a generated PDF.
+
+Pages are rasterized one at a time (``pdftoppm -gray -f N -l N``) by the
+comparison workers into a fresh per-run directory, loaded into NumPy arrays
+and compared in parallel; with ``--fail-fast`` no further pages are rendered
+after the first failure. Per page we report the
+number of differing pixels (like ImageMagick ``compare -metric AE`` with a
+fuzz threshold), their ratio, the mean absolute difference and the bounding
+box of the changes. Masked regions (e.g. the "백업용량" column) are ignored.
+
+    pdf_compare.py REF.pdf GEN.pdf --ignore-column 백업용량 --max-ratio 0.001 --fail-fast
+
+Exit status is 0 when every page passes, 1 otherwise, so it can gate a run.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DPI = 150
+FUZZ = 16  # grey levels (0-255) treated as equal
+
+
+def page_count(pdf: str) -> int:
+    out = subprocess.run(["pdfinfo", pdf], capture_output=True, text=True, check=True).stdout
+    m = re.search(r"^Pages:\s+(\d+)", out, re.MULTILINE)
+    if not m:
+        raise ValueError(f"page count not found: {pdf}")
+    return int(m.group(1))
+
+
+def render_page(pdf: str, page: int, out_dir: str, dpi: int = DPI) -> str:
+    """Rasterize one page to an 8-bit greyscale PGM; returns its path."""
+    os.makedirs(out_dir, exist_ok=True)
+    prefix = os.path.join(out_dir, f"page-{page}")
+    subprocess.check_call([
+        "pdftoppm", "-gray", "-r", str(dpi), "-f", str(page), "-l", str(page), "-singlefile", pdf, prefix,
+    ])
+    return prefix + ".pgm"
+
+
+def load_pgm(path: str) -> np.ndarray:
+    """Binary (P5) PGM -> uint8 array (16-bit files are scaled down)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    fields: List[bytes] = []
+    pos = 0
+    while len(fields) < 4:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b"#":
+            pos = data.index(b"\n", pos) + 1
+            continue
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        fields.append(data[pos:end])
+        pos = end
+    if fields[0] != b"P5":
+        raise ValueError(f"not a binary PGM: {path}")
+    width, height, maxval = int(fields[1]), int(fields[2]), int(fields[3])
+    pos += 1  # single whitespace before raster
+    if maxval < 256:
+        img = np.frombuffer(data, dtype=np.uint8, count=width * height, offset=pos)
+    else:
+        img = (np.frombuffer(data, dtype=">u2", count=width * height, offset=pos) >> 8).astype(np.uint8)
+    return img.reshape(height, width)
+
+
+def write_pgm(path: str, img: np.ndarray) -> None:
+    h, w = img.shape
+    with open(path, "wb") as f:
+        f.write(f"P5\n{w} {h}\n255\n".encode("ascii"))
+        f.write(np.ascontiguousarray(img, dtype=np.uint8).tobytes())
+
+
+def column_masks(pdf: str, words: Sequence[str], page: Optional[int] = None) -> List[Dict]:
+    """Full-height masks under header words.
+
+    For "백업용량" this is the column strip the PDF generator fills
+    (``pdf_layout.volume_column``); other words mask their own title box
+    widened the same way.
+    """
+    from pdf_layout import find_word, parse_bbox, volume_column
+
+    _, height, page_words = parse_bbox(pdf)
+    masks = []
+    for idx, pw in enumerate(page_words, start=1):
+        if page is not None and idx != page:
+            continue
+        for text in words:
+            if text == "백업용량":
+                bounds = volume_column(pw)
+                if bounds:
+                    masks.append({"page": idx, "box": (bounds[0], 0.0, bounds[1], height)})
+                continue
+            w = find_word(pw, text)
+            if w:
+                masks.append({"page": idx, "box": (w["xMin"] - 2, 0.0, w["xMax"] + 18, height)})
+    return masks
+
+
+def build_mask(shape: Tuple[int, int], boxes: Sequence[Tuple[float, float, float, float]], dpi: int) -> np.ndarray:
+    """Boolean keep-mask from boxes in PDF points (top-left origin, like pdftotext -bbox)."""
+    keep = np.ones(shape, dtype=bool)
+    scale = dpi / 72.0
+    for x0, y0, x1, y1 in boxes:
+        c0, c1 = max(0, int(x0 * scale)), min(shape[1], int(np.ceil(x1 * scale)))
+        r0, r1 = max(0, int(y0 * scale)), min(shape[0], int(np.ceil(y1 * scale)))
+        keep[r0:r1, c0:c1] = False
+    return keep
+
+
+def compare_arrays(ref: np.ndarray, gen: np.ndarray, keep: Optional[np.ndarray] = None, fuzz: int = FUZZ) -> Dict:
+    if ref.shape != gen.shape:
+        return {"status": "size_mismatch", "ref_shape": list(ref.shape), "gen_shape": list(gen.shape)}
+    diff = np.abs(ref.astype(np.int16) - gen.astype(np.int16))
+    if keep is not None:
+        diff = np.where(keep, diff, 0)
+    changed = diff > fuzz
+    n = int(np.count_nonzero(changed))
+    considered = int(keep.sum()) if keep is not None else diff.size
+    result = {
+        "status": "ok",
+        "diff_pixels": n,
+        "ratio": n / considered if considered else 0.0,
+        "mean_abs": float(diff.sum() / considered) if considered else 0.0,
+        "max_abs": int(diff.max()) if diff.size else 0,
+        "bbox": None,
+    }
+    if n:
+        rows = np.flatnonzero(changed.any(axis=1))
+        cols = np.flatnonzero(changed.any(axis=0))
+        result["bbox"] = [int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1]
+    return result
+
+
+def compare_page_files(ref_pages: Sequence[str], gen_pages: Sequence[str], **kwargs) -> Dict:
+    """Compare already rendered pages (PGM paths in page order); see ``compare_pages``."""
+    return compare_pages(
+        len(ref_pages), len(gen_pages), lambda page: (load_pgm(ref_pages[page - 1]), load_pgm(gen_pages[page - 1])), **kwargs
+    )
+
+
+def compare_pages(
+    n_ref: int,
+    n_gen: int,
+    load: Callable[[int], Tuple[np.ndarray, np.ndarray]],
+    masks: Sequence[Dict] = (),
+    dpi: int = DPI,
+    fuzz: int = FUZZ,
+    max_pixels: Optional[int] = None,
+    max_ratio: Optional[float] = None,
+    fail_fast: bool = False,
+    diff_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Dict:
+    """Compare pages in parallel (``load(page)`` -> ref, gen arrays); returns a structured report.
+
+    At most ``workers`` pages are in flight, so with ``fail_fast`` no page
+    is loaded (rendered) after the first failure is seen.
+    """
+    def passes(r: Dict) -> bool:
+        if r["status"] != "ok":
+            return False
+        if max_pixels is not None and r["diff_pixels"] > max_pixels:
+            return False
+        if max_ratio is not None and r["ratio"] > max_ratio:
+            return False
+        return True
+
+    def one(page: int) -> Dict:
+        ref, gen = load(page)
+        boxes = [m["box"] for m in masks if m.get("page") in (None, page)]
+        keep = build_mask(ref.shape, boxes, dpi) if boxes else None
+        r = compare_arrays(ref, gen, keep, fuzz)
+        r["page"] = page
+        r["pass"] = passes(r)
+        if diff_dir and r["status"] == "ok" and r["diff_pixels"]:
+            vis = np.where(np.abs(ref.astype(np.int16) - gen.astype(np.int16)) > fuzz, 0, 255).astype(np.uint8)
+            if keep is not None:
+                vis[~keep] = 200
+            r["diff_image"] = os.path.join(diff_dir, f"page-{page}.pgm")
+            write_pgm(r["diff_image"], vis)
+        return r
+
+    if diff_dir:
+        # diff images of an earlier run must not pass for this one's
+        os.makedirs(diff_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(diff_dir, "page-*.pgm")):
+            os.remove(old)
+
+    results: Dict[int, Dict] = {}
+    common = min(n_ref, n_gen)
+    for page in range(common + 1, max(n_ref, n_gen) + 1):
+        status = "missing_in_generated" if page > n_gen else "extra_in_generated"
+        results[page] = {"page": page, "status": status, "pass": False}
+
+    stopped = bool(fail_fast and results)
+    if not stopped:
+        n_workers = workers or min(8, os.cpu_count() or 1)
+        todo = iter(range(1, common + 1))
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            pending = set()
+            while True:
+                while not stopped and len(pending) < n_workers:
+                    page = next(todo, None)
+                    if page is None:
+                        break
+                    pending.add(pool.submit(one, page))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    r = fut.result()
+                    results[r["page"]] = r
+                    if fail_fast and not r["pass"]:
+                        stopped = True
+
+    pages = [results[p] for p in sorted(results)]
+    return {
+        "ok": all(r["pass"] for r in pages) and not stopped,
+        "stopped_early": stopped,
+        "pages_ref": n_ref,
+        "pages_gen": n_gen,
+        "fuzz": fuzz,
+        "max_pixels": max_pixels,
+        "max_ratio": max_ratio,
+        "pages": pages,
+    }
+
+
+def compare_pdfs(ref_pdf: str, gen_pdf: str, work_dir: Optional[str] = None, dpi: int = DPI, **kwargs) -> Dict:
+    """Render and compare page by page; pages go to a fresh directory that is removed afterwards."""
+    if work_dir:
+        os.makedirs(work_dir, exist_ok=True)
+    run_dir = tempfile.mkdtemp(prefix="pdfdiff_", dir=work_dir)
+
+    def load(page: int) -> Tuple[np.ndarray, np.ndarray]:
+        ref = load_pgm(render_page(ref_pdf, page, os.path.join(run_dir, "ref"), dpi))
+        gen = load_pgm(render_page(gen_pdf, page, os.path.join(run_dir, "gen"), dpi))
+        return ref, gen
+
+    try:
+        return compare_pages(page_count(ref_pdf), page_count(gen_pdf), load, dpi=dpi, **kwargs)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def _parse_box(spec: str) -> Dict:
+    # "x0,y0,x1,y1" or "page:x0,y0,x1,y1" in PDF points
+    page = None
+    if ":" in spec:
+        p, spec = spec.split(":", 1)
+        page = int(p)
+    x0, y0, x1, y1 = (float(v) for v in spec.split(","))
+    return {"page": page, "box": (x0, y0, x1, y1)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare two PDFs page by page (visual regression gate)")
+    ap.add_argument("ref")
+    ap.add_argument("gen")
+    ap.add_argument("--work-dir", help="Parent of the per-run page directory (default: system temp dir)")
+    ap.add_argument("--dpi", type=int, default=DPI)
+    ap.add_argument("--fuzz", type=int, default=FUZZ)
+    ap.add_argument("--max-pixels", type=int, help="Fail a page above this many differing pixels")
+    ap.add_argument("--max-ratio", type=float, help="Fail a page above this differing-pixel ratio")
+    ap.add_argument("--mask", action="append", default=[], help="Ignore region [page:]x0,y0,x1,y1 (PDF points)")
+    ap.add_argument("--ignore-column", action="append", default=[], help="Ignore the column under this header word")
+    ap.add_argument("--fail-fast", action="store_true", help="Stop rendering and comparing at the first failing page")
+    ap.add_argument("--diff-dir", help="Write diff images (PGM) for pages that differ")
+    ap.add_argument("--report", help="Write the JSON report here")
+    ap.add_argument("--workers", type=int)
+    args = ap.parse_args()
+
+    masks = [_parse_box(m) for m in args.mask]
+    if args.ignore_column:
+        masks += column_masks(args.ref, args.ignore_column)
+    max_pixels = args.max_pixels if args.max_pixels is not None or args.max_ratio is not None else 0
+
+    report = compare_pdfs(
+        args.ref,
+        args.gen,
+        work_dir=args.work_dir,
+        dpi=args.dpi,
+        masks=masks,
+        fuzz=args.fuzz,
+        max_pixels=max_pixels,
+        max_ratio=args.max_ratio,
+        fail_fast=args.fail_fast,
+        diff_dir=args.diff_dir,
+        workers=args.workers,
+    )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+    for r in report["pages"]:
+        detail = f"{r.get('diff_pixels', '-')} px ratio={r.get('ratio', 0):.6f}" if r["status"] == "ok" else r["status"]
+        print(f"page {r['page']}: {'PASS' if r['pass'] else 'FAIL'} {detail}")
+    print(f"[{'OK' if report['ok'] else 'FAIL'}] compared {len(report['pages'])} page(s)")
+    raise SystemExit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
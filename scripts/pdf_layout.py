@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Template PDF text layout via ``pdftotext -bbox`` (word boxes per page)."""
+import subprocess
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+
+def run_pdftotext_bbox(template_pdf: str) -> str:
+    out = subprocess.check_output(["pdftotext", "-bbox", template_pdf, "-"])
+    return out.decode("utf-8", "ignore")
+
+
+def parse_bbox(template_pdf: str) -> Tuple[float, float, List[List[Dict]]]:
+    ns = {"x": "http://www.w3.org/1999/xhtml"}
+    xml_text = run_pdftotext_bbox(template_pdf)
+    root = ET.fromstring(xml_text)
+    pages = root.findall(".//x:page", ns)
+    if not pages:
+        raise SystemExit("TEMPLATE_PARSE_FAIL: no pages in bbox output")
+
+    page_words: List[List[Dict]] = []
+    width = float(pages[0].attrib["width"])
+    height = float(pages[0].attrib["height"])
+
+    for p in pages:
+        words = []
+        for w in p.findall(".//x:word", ns):
+            text = "".join(w.itertext())
+            words.append({
+                "text": text,
+                "xMin": float(w.attrib["xMin"]),
+                "yMin": float(w.attrib["yMin"]),
+                "xMax": float(w.attrib["xMax"]),
+                "yMax": float(w.attrib["yMax"]),
+            })
+        page_words.append(words)
+    return width, height, page_words
+
+
+def bbox_union(words: List[Dict]) -> Tuple[float, float, float, float]:
+    xMin = min(w["xMin"] for w in words)
+    yMin = min(w["yMin"] for w in words)
+    xMax = max(w["xMax"] for w in words)
+    yMax = max(w["yMax"] for w in words)
+    return xMin, yMin, xMax, yMax
+
+
+def find_word(words: List[Dict], text: str) -> Optional[Dict]:
+    for w in words:
+        if w["text"] == text:
+            return w
+    return None
+
+
+def find_line_words(words: List[Dict], target_y: float, tol: float = 0.7) -> List[Dict]:
+    line_words = [w for w in words if abs(w["yMin"] - target_y) <= tol]
+    return sorted(line_words, key=lambda w: w["xMin"])
+
+
+def is_table_header(words: List[Dict], header: Dict) -> bool:
+    # A column title is separated from the other titles on its line by a column gap (wider than
+    # the text height); in running text (e.g. a cover mentioning 백업용량) neighbours are a space apart.
+    others = [w for w in find_line_words(words, header["yMin"], tol=0.7) if w is not header]
+    if not others:
+        return False
+    gap = min(max(w["xMin"] - header["xMax"], header["xMin"] - w["xMax"]) for w in others)
+    return gap > header["yMax"] - header["yMin"]
+
+
+def volume_column(words: List[Dict]) -> Optional[Tuple[float, float, float]]:
+    """The 백업용량 column (xmin, xmax, header bottom) on one page, or None if the page has no such table.
+
+    Between the 백업 대상 및 경로 and 백업결과 titles when both are present,
+    otherwise the 백업용량 title widened a little. The PDF generator fills
+    values inside these bounds and ``pdf_compare`` masks the same strip.
+    """
+    col_xmin = None
+    col_xmax = None
+    header_bottom = None
+
+    header_backup = find_word(words, "백업용량")
+    if header_backup and is_table_header(words, header_backup):
+        col_xmin = header_backup["xMin"] - 2
+        col_xmax = header_backup["xMax"] + 18
+        header_bottom = header_backup["yMax"]
+
+    header_path = [find_word(words, t) for t in ["백업", "대상", "및", "경로"]]
+    header_result = find_word(words, "백업결과")
+    if all(header_path) and header_result and is_table_header(words, header_result):
+        seq = header_path
+        col_xmin = max(w["xMax"] for w in seq) + 2
+        col_xmax = header_result["xMin"] - 2
+        header_bottom = header_result["yMax"]
+
+    if col_xmin is None or col_xmax is None or col_xmax <= col_xmin:
+        return None
+    return col_xmin, col_xmax, header_bottom
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Compiled rule engine for relabelling NetBackup jobs (policy splits).
+
+Rules are plain dicts so new splits are configuration, not code:
+
+    {"policy": "HZDB_MSSQL", "target": "HZDB_MSSQL_SMS", "label": "SMS",
+     "unit_range": (1000000, 2000000)}
+
+Every rule needs ``policy`` (source policy) and ``target`` (new label).
+Supported conditions (all optional):
+- ``unit_range``: (lo, hi) half-open interval on the Unit/Kilobytes value.
+  ``None`` bounds are open; ``(None, None)`` only requires a valid unit.
+- ``instance``: case-insensitive substring of "Instance or Database".
+- ``instance_re``: regular expression on the instance (case-insensitive).
+- ``client``: client name (case-insensitive exact match).
+
+The first matching rule (in list order) wins. Rows are reduced to distinct
+(policy, unit range, instance, client) combinations: bounded unit ranges of
+a policy are resolved with one ``searchsorted`` lookup, rules are evaluated
+once per combination (string matchers once per distinct value), and labels
+are assigned with a single gather, so the cost does not grow with
+rules x rows.
+"""
+import json
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# HZDB_MSSQL instances are told apart by backup size (Unit, KB).
+SPLIT_RULES: List[Dict] = [
+    {"policy": "HZDB_MSSQL", "target": "HZDB_MSSQL_ReportServer", "label": "ReportServer", "unit_range": (8000, 10000)},
+    {"policy": "HZDB_MSSQL", "target": "HZDB_MSSQL_SMS", "label": "SMS", "unit_range": (1000000, 2000000)},
+    {"policy": "HZDB_MSSQL", "target": "HZDB_MSSQL_NEOE", "label": "NEOE", "unit_range": (None, None)},
+]
+
+
+# Rows of the NetBackup PDF report (column labels); also the report keys of the rollup store.
+POLICY_ROWS: List[Dict] = [
+    {"label": "ERP-DB_ORACLE", "policy": "ERP-DB_ORACLE"},
+    {"label": "ERP_ORA_DUMP", "policy": "ERP_ORA_DUMP"},
+    {"label": "E-HR_ORA_DUMP", "policy": "E-HR_ORA_DUMP"},
+    {"label": "SFA_MSSQL", "policy": "SFA_MSSQL", "instance": "SFA"},
+    {"label": "PRM_ORACLE_PRMIF", "policy": "PRM_ORACLE_PRMIF"},
+    {"label": "PRM_ORACLE_PRMORA", "policy": "PRM_ORACLE_PRMORA"},
+    {"label": "ReportServer", "policy": "HZDB_MSSQL", "instance": "ReportServer"},
+    {"label": "SMS", "policy": "HZDB_MSSQL", "instance": "SMS"},
+    {"label": "NEOE", "policy": "HZDB_MSSQL", "instance": "NEOE"},
+    {"label": "ERP-APP2", "policy": "ERP-APP2"},
+    {"label": "E-HR_WAS", "policy": "E-HR_WAS"},
+    {"label": "E-HR_WEB", "policy": "E-HR_WEB"},
+    {"label": "PRM_WAS", "policy": "PRM_WAS"},
+    {"label": "PRM_WEB", "policy": "PRM_WEB"},
+    {"label": "HZWEB_ERP", "policy": "HZWEB_ERP"},
+    {"label": "ERP-APP", "policy": "ERP-APP"},
+]
+
+
+def policy_row_rules(rows: List[Dict]) -> List[Dict]:
+    # Each report row becomes a rule that labels matching jobs with the row label.
+    return [{"policy": r["policy"], "instance": r.get("instance"), "target": r["label"]} for r in rows]
+
+
+def load_rules(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    if not isinstance(rules, list):
+        raise ValueError(f"rules file must contain a JSON list: {path}")
+    return rules
+
+
+def split_labels(rules: Sequence[Dict]) -> Dict[str, str]:
+    """Report label (column D) -> split policy key, for rules that carry a label."""
+    return {r["label"]: r["target"] for r in rules if r.get("label")}
+
+
+class _Rule:
+    __slots__ = ("target", "range_id", "needs_unit", "instance_rx", "client")
+
+    def __init__(self, spec: Dict):
+        self.target = spec["target"]
+        self.range_id = -1
+        self.needs_unit = "unit_range" in spec
+        self.instance_rx = None
+        if spec.get("instance_re"):
+            self.instance_rx = re.compile(spec["instance_re"], re.IGNORECASE)
+        elif spec.get("instance"):
+            self.instance_rx = re.compile(re.escape(spec["instance"]), re.IGNORECASE)
+        self.client = spec["client"].lower() if spec.get("client") else None
+
+
+class _PolicyGroup:
+    """Rules of one source policy plus its interval table."""
+
+    def __init__(self):
+        self.rules: List[_Rule] = []
+        self.lo: List[float] = []
+        self.hi: List[float] = []
+
+    def add(self, spec: Dict) -> None:
+        rule = _Rule(spec)
+        rng = spec.get("unit_range")
+        if rng is not None and (rng[0] is not None or rng[1] is not None):
+            lo = -np.inf if rng[0] is None else float(rng[0])
+            hi = np.inf if rng[1] is None else float(rng[1])
+            if hi <= lo:
+                raise ValueError(f"empty unit_range in rule: {spec}")
+            rule.range_id = len(self.lo)
+            self.lo.append(lo)
+            self.hi.append(hi)
+        self.rules.append(rule)
+
+    def freeze(self) -> None:
+        order = np.argsort(self.lo, kind="stable")
+        self.edges = np.asarray(self.lo, dtype=float)[order]
+        self.ends = np.asarray(self.hi, dtype=float)[order]
+        self.order = order
+        if np.any(self.edges[1:] < self.ends[:-1]):
+            raise ValueError("overlapping unit_range rules for the same policy")
+
+    def range_ids(self, units: np.ndarray) -> np.ndarray:
+        # Interval lookup: index of the (unique) range containing each unit, else -1.
+        if not len(self.edges):
+            return np.full(len(units), -1, dtype=np.int64)
+        pos = np.searchsorted(self.edges, units, side="right") - 1
+        clipped = np.clip(pos, 0, None)
+        inside = (pos >= 0) & (units < self.ends[clipped])
+        return np.where(inside, self.order[clipped], -1)
+
+
+class RuleSet:
+    def __init__(self, rules: Sequence[Dict]):
+        self.groups: Dict[str, _PolicyGroup] = {}
+        for spec in rules:
+            if "policy" not in spec or "target" not in spec:
+                raise ValueError(f"rule needs 'policy' and 'target': {spec}")
+            self.groups.setdefault(spec["policy"], _PolicyGroup()).add(spec)
+        for g in self.groups.values():
+            g.freeze()
+
+    @property
+    def policies(self) -> List[str]:
+        return list(self.groups)
+
+    def apply(
+        self,
+        policies: Sequence,
+        units: Optional[Sequence] = None,
+        instances: Optional[Sequence] = None,
+        clients: Optional[Sequence] = None,
+        default: Optional[str] = None,
+    ) -> np.ndarray:
+        """Return the target label per row.
+
+        ``units`` must be numeric with NaN for missing values. String columns
+        may also be given pre-interned as ``(codes, names)``. Rows no rule
+        matches keep their policy, or get ``default`` when it is given.
+        """
+        if isinstance(policies, tuple):
+            inv, uniq = np.asarray(policies[0]), list(policies[1])
+        else:
+            uniq, inv = np.unique(np.asarray(policies, dtype=object).astype(str), return_inverse=True)
+        n = len(inv)
+        if default is None:
+            out = np.array(uniq, dtype=object)[inv] if len(uniq) else np.zeros(0, dtype=object)
+        else:
+            out = np.full(n, default, dtype=object)
+        if n == 0:
+            return out
+
+        unit_arr = None
+        if units is not None:
+            unit_arr = np.asarray(units, dtype=float)
+        inst_match = _UniqueMatcher(instances, n)
+        client_match = _UniqueMatcher(clients, n, lower=True)
+
+        codes = {name: code for code, name in enumerate(uniq)}
+        groups = [(codes[name], g) for name, g in self.groups.items() if name in codes]
+        if not groups:
+            return out
+        gid_of_code = np.full(len(uniq), -1, dtype=np.int64)
+        for k, (code, _) in enumerate(groups):
+            gid_of_code[code] = k
+        gid = gid_of_code[inv]
+        rows = np.flatnonzero(gid >= 0)
+        if not len(rows):
+            return out
+        gid = gid[rows]
+
+        # unit slot per row: 0 = no unit, 1 = unit outside every range, 2 + range id
+        slot = np.zeros(len(rows), dtype=np.int64)
+        if unit_arr is not None:
+            u = unit_arr[rows]
+            has_unit = ~np.isnan(u)
+            slot[has_unit] = 1
+            order = np.argsort(gid.astype(np.int16) if len(groups) < 1 << 15 else gid, kind="stable")
+            bounds = np.searchsorted(gid[order], np.arange(len(groups) + 1))
+            for k, (_, group) in enumerate(groups):
+                sel = order[bounds[k]:bounds[k + 1]]
+                sel = sel[has_unit[sel]]
+                slot[sel] = group.range_ids(u[sel]) + 2
+
+        use_inst = any(r.instance_rx is not None for _, g in groups for r in g.rules)
+        use_client = any(r.client is not None for _, g in groups for r in g.rules)
+        zeros = np.zeros(len(rows), dtype=np.int64)
+        cols = [
+            gid,
+            slot,
+            inst_match.inv[rows] if use_inst else zeros,
+            client_match.inv[rows] if use_client else zeros,
+        ]
+        combos, combo_inv = _distinct_rows(cols)
+        c_gid, c_slot, c_inst, c_client = combos
+
+        # first-match table over the distinct combinations
+        target_names: List[str] = []
+        target_ids: Dict[str, int] = {}
+        combo_target = np.full(len(c_gid), -1, dtype=np.int64)
+        for k, (_, group) in enumerate(groups):
+            open_ = c_gid == k
+            for rule in group.rules:
+                cond = open_.copy()
+                if rule.needs_unit:
+                    cond &= c_slot >= 1
+                if rule.range_id >= 0:
+                    cond &= c_slot == rule.range_id + 2
+                if rule.instance_rx is not None:
+                    cond &= inst_match.search(rule.instance_rx)[c_inst]
+                if rule.client is not None:
+                    cond &= client_match.equals(rule.client)[c_client]
+                if cond.any():
+                    combo_target[cond] = target_ids.setdefault(rule.target, len(target_names))
+                    if len(target_names) < len(target_ids):
+                        target_names.append(rule.target)
+                    open_ &= ~cond
+
+        target = combo_target[combo_inv]
+        hit = target >= 0
+        out[rows[hit]] = np.array(target_names, dtype=object)[target[hit]]
+        return out
+
+
+def _distinct_rows(cols: Sequence[np.ndarray]):
+    """Combinations of the int columns: (list of per-column arrays, index per row).
+
+    A small key space is enumerated densely, so the index is the combined code
+    itself; otherwise only the combinations present are kept.
+    """
+    n = len(cols[0])
+    dims = [int(c.max()) + 1 for c in cols]
+    size = 1
+    for d in dims:
+        size *= d
+    if size <= max(n, 1 << 16):
+        key = np.ravel_multi_index(cols, dims)
+        return list(np.unravel_index(np.arange(size), dims)), key
+    if size < 1 << 62:
+        uniq, inv = np.unique(np.ravel_multi_index(cols, dims), return_inverse=True)
+        return list(np.unravel_index(uniq, dims)), inv
+    uniq, inv = np.unique(np.stack(cols, axis=1), axis=0, return_inverse=True)
+    return [uniq[:, j] for j in range(len(cols))], inv.reshape(-1)
+
+
+class _UniqueMatcher:
+    """Evaluates string predicates once per distinct value of a column."""
+
+    def __init__(self, values: Optional[Sequence], n: int, lower: bool = False):
+        if values is None:
+            self.uniq = np.array([""], dtype=object)
+            self.inv = np.zeros(n, dtype=np.int64)
+        elif isinstance(values, tuple):
+            codes, names = values
+            self.uniq = np.array([v.lower() if lower else v for v in names] or [""], dtype=str)
+            self.inv = np.asarray(codes)
+        else:
+            arr = np.array(["" if v is None else str(v) for v in values], dtype=object)
+            if lower:
+                arr = np.array([v.lower() for v in arr], dtype=object)
+            self.uniq, self.inv = np.unique(arr.astype(str), return_inverse=True)
+        self._cache: Dict = {}
+
+    def search(self, rx: "re.Pattern") -> np.ndarray:
+        """Match flag per distinct value (index with ``inv`` codes)."""
+        key = ("re", rx.pattern)
+        hits = self._cache.get(key)
+        if hits is None:
+            hits = np.fromiter((rx.search(u) is not None for u in self.uniq), dtype=bool, count=len(self.uniq))
+            self._cache[key] = hits
+        return hits
+
+    def equals(self, value: str) -> np.ndarray:
+        key = ("eq", value)
+        hits = self._cache.get(key)
+        if hits is None:
+            hits = self.uniq == value
+            self._cache[key] = hits
+        return hits
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Publish outputs to the Windows (OneDrive) folder.
+
+- Skips the copy when the content hash matches what was last published there.
+- Writes a temp file in the destination folder and renames it into place.
+- If the target is locked (open in Excel), retries with a short exponential
+  backoff (a few seconds in total: runs hold the watcher lock) and finally
+  falls back to a timestamped file name.
+- Error logs are shipped incrementally: only bytes added since the last
+  shipment are written.
+- The shared state file is updated under an exclusive ``flock`` (copies and
+  log shipments from different runs can overlap).
+- A failed copy exits with status 2 (the run is retried on the next trigger).
+
+    publish.py file --src REPORT.xlsx --dest-dir "/mnt/c/.../4. 벽산"
+    publish.py log --log /home/owen/export1_watch.log --dest ".../ERROR_export1_watch_<ts>.log"
+
+Stdlib only, so the watcher can call it without the venv.
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+STATE_PATH = "/home/owen/.publish_state.json"
+RETRIES = 3
+BACKOFF = 0.5  # seconds, doubled per attempt (3.5 s of waiting at most)
+COPY_FAIL_EXIT = 2
+
+
+def _log(msg: str) -> None:
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] {msg}", flush=True)
+
+
+def file_sha256(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_state(path: str = STATE_PATH) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: Dict, path: str = STATE_PATH) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def state_lock(path: str = STATE_PATH) -> Iterator[None]:
+    """Exclusive lock for a read-modify-write of the state file (released on close)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _dest_sig(dest: str) -> Optional[list]:
+    try:
+        st = os.stat(dest)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _atomic_copy(src: str, dest: str) -> None:
+    d, name = os.path.split(dest)
+    tmp = os.path.join(d, f".{name}.{os.getpid()}.tmp")
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _fallback_name(dest: str) -> str:
+    stem, ext = os.path.splitext(dest)
+    return f"{stem}_{datetime.now().strftime('%H%M%S')}{ext}"
+
+
+def publish_file(
+    src: str,
+    dest_dir: str,
+    retries: int = RETRIES,
+    backoff: float = BACKOFF,
+    state_path: str = STATE_PATH,
+) -> str:
+    """Copy ``src`` into ``dest_dir`` unless unchanged; returns the published path or "skipped"."""
+    dest = os.path.join(dest_dir, os.path.basename(src))
+    digest = file_sha256(src)
+    state = load_state(state_path)
+    entry = state.get(dest)
+    if entry and entry.get("sha256") == digest and entry.get("sig") == _dest_sig(dest):
+        _log(f"[SKIP] unchanged: {dest}")
+        return "skipped"
+
+    os.makedirs(dest_dir, exist_ok=True)
+    target = dest
+    delay = backoff
+    for attempt in range(retries + 1):
+        try:
+            _atomic_copy(src, target)
+            break
+        except OSError as e:
+            if attempt == retries:
+                if target != dest:
+                    raise
+                # still locked: keep today's data visible under a timestamped name
+                target = _fallback_name(dest)
+                _log(f"[WARN] {dest} locked ({e}); writing {target}")
+                _atomic_copy(src, target)
+                break
+            _log(f"[WARN] publish attempt {attempt + 1} failed ({e}); retry in {delay:g}s")
+            time.sleep(delay)
+            delay *= 2
+
+    with state_lock(state_path):
+        state = load_state(state_path)
+        state[target] = {"sha256": digest, "sig": _dest_sig(target), "at": datetime.now().isoformat(timespec="seconds")}
+        save_state(state, state_path)
+    _log(f"[OK] published: {target}")
+    return target
+
+
+def ship_log(log_path: str, dest: str, state_path: str = STATE_PATH) -> int:
+    """Write the part of ``log_path`` added since the last shipment; returns bytes written."""
+    # held for the whole shipment so two shippers never send the same bytes
+    with state_lock(state_path):
+        return _ship_log(log_path, dest, state_path)
+
+
+def _ship_log(log_path: str, dest: str, state_path: str) -> int:
+    state = load_state(state_path)
+    key = f"log:{os.path.abspath(log_path)}"
+    offset = int(state.get(key, 0))
+    size = os.path.getsize(log_path)
+    if size < offset:  # truncated / rotated
+        offset = 0
+    if size == offset:
+        return 0
+
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        chunk = f.read(size - offset)
+    d, name = os.path.split(dest)
+    tmp = os.path.join(d, f".{name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as out:
+        out.write(chunk)
+    os.replace(tmp, dest)
+
+    state = load_state(state_path)
+    state[key] = size
+    save_state(state, state_path)
+    return len(chunk)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Publish report outputs to the Windows folder")
+    ap.add_argument("--state", default=STATE_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_file = sub.add_parser("file")
+    p_file.add_argument("--src", required=True)
+    p_file.add_argument("--dest-dir", required=True)
+    p_file.add_argument("--retries", type=int, default=RETRIES)
+    p_file.add_argument("--backoff", type=float, default=BACKOFF)
+
+    p_log = sub.add_parser("log")
+    p_log.add_argument("--log", required=True)
+    p_log.add_argument("--dest", required=True)
+    args = ap.parse_args()
+
+    if args.cmd == "file":
+        try:
+            publish_file(args.src, args.dest_dir, args.retries, args.backoff, args.state)
+        except OSError as e:
+            print(f"[ERROR] Failed to copy report to Windows path: {e}", file=sys.stderr)
+            sys.exit(COPY_FAIL_EXIT)
+    else:
+        n = ship_log(args.log, args.dest, args.state)
+        print(f"[OK] shipped {n} new log bytes -> {args.dest}" if n else "[OK] no new log lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Delta/anomaly engine for the report's remarks column (H).
+
+All policies are evaluated in one vectorized pass: current vs previous value,
+percentage change, and N-day rolling mean/stddev (from the rollup store when
+available). A remark is produced when any configured threshold is exceeded.
+
+Thresholds are per policy key; ``None`` keeps the existing remark untouched
+(ERP-APP's remark is maintained by hand):
+
+    THRESHOLDS = {"default": {"abs_gb": 10}, "ERP-APP": None, "SFA_MSSQL": {"abs_gb": 5, "pct": 30}}
+
+Supported threshold keys: ``abs_gb`` (|delta| in GB), ``pct`` (|delta| in %
+of the previous value) and ``z`` (|current - rolling mean| / rolling std).
+Relative triggers (pct, z) are named in the remark; a change over the
+absolute threshold alone keeps the plain text:
+
+    80GB -> 100GB (20GB증가)
+    100GB -> 140GB (40GB증가) [pct +40.0%≥30%, z 3.25≥3]
+
+A thresholds file is merged over ``THRESHOLDS`` (see ``load_thresholds``).
+"""
+import json
+from datetime import date, timedelta
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from job_table import KB_PER_GB, format_gb
+
+THRESHOLDS: Dict[str, Optional[Dict[str, float]]] = {
+    "default": {"abs_gb": 10},
+    "ERP-APP": None,
+}
+WINDOW_DAYS = 7
+METRICS = ("abs_gb", "pct", "z")
+
+
+def load_thresholds(path: str, base: Mapping = THRESHOLDS) -> Dict[str, Optional[Dict[str, float]]]:
+    """Thresholds from a JSON file, merged over ``base`` per policy key.
+
+    Keys the file does not mention keep their built-in value (e.g. the
+    ``ERP-APP: null`` exclusion stays unless the file overrides it).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        loaded = json.load(f)
+    if not isinstance(loaded, dict):
+        raise ValueError(f"thresholds file must contain a JSON object: {path}")
+    for key, spec in loaded.items():
+        if spec is None:
+            continue
+        if not isinstance(spec, dict):
+            raise ValueError(f"thresholds for {key!r} must be an object or null: {path}")
+        unknown = sorted(set(spec) - set(METRICS))
+        if unknown:
+            raise ValueError(f"unknown threshold(s) for {key!r}: {', '.join(unknown)} (expected {', '.join(METRICS)})")
+        bad = [m for m, v in spec.items() if v is not None and not isinstance(v, (int, float))]
+        if bad:
+            raise ValueError(f"non-numeric threshold(s) for {key!r}: {', '.join(bad)}")
+    return {**base, **loaded}
+
+
+def history_matrix(store: Mapping, keys: Sequence[str], before: date, days: int = WINDOW_DAYS) -> np.ndarray:
+    """len(keys) x days matrix of daily GB from a rollup store (NaN where missing)."""
+    out = np.full((len(keys), days), np.nan)
+    index = {k: i for i, k in enumerate(keys)}
+    for j in range(days):
+        day = (before - timedelta(days=days - j)).isoformat()
+        for key, (kb, _) in store.get("days", {}).get(day, {}).items():
+            i = index.get(key)
+            if i is not None:
+                out[i, j] = kb / KB_PER_GB
+    return out
+
+
+def compute_deltas(
+    current_gb: Mapping[str, float],
+    prev_gb: Mapping[str, float],
+    history: Optional[np.ndarray] = None,
+    keys: Optional[Sequence[str]] = None,
+) -> Dict[str, np.ndarray]:
+    """Column arrays over ``keys``: cur, prev, delta, pct, mean, std, z (NaN when unknown)."""
+    keys = list(keys if keys is not None else current_gb)
+    cur = np.array([current_gb.get(k, np.nan) for k in keys], dtype=float)
+    prev = np.array([prev_gb.get(k, np.nan) for k in keys], dtype=float)
+    delta = cur - prev
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(prev != 0, delta / prev * 100.0, np.nan)
+        if history is not None and history.size:
+            n = np.sum(~np.isnan(history), axis=1)
+            mean = np.where(n > 0, np.nansum(history, axis=1) / np.maximum(n, 1), np.nan)
+            var = np.where(n > 1, np.nansum((history - mean[:, None]) ** 2, axis=1) / np.maximum(n - 1, 1), np.nan)
+            std = np.sqrt(var)
+            z = np.where(std > 0, (cur - mean) / std, np.nan)
+        else:
+            mean = std = z = np.full(len(keys), np.nan)
+    return {"keys": np.array(keys, dtype=object), "cur": cur, "prev": prev, "delta": delta,
+            "pct": pct, "mean": mean, "std": std, "z": z}
+
+
+def _threshold_arrays(keys: Sequence[str], thresholds: Mapping) -> Dict[str, np.ndarray]:
+    default = thresholds.get("default") or {}
+    cols = {name: np.full(len(keys), np.inf) for name in METRICS}
+    skip = np.zeros(len(keys), dtype=bool)
+    for i, k in enumerate(keys):
+        spec = thresholds[k] if k in thresholds else default
+        if spec is None:
+            skip[i] = True
+            continue
+        for name in cols:
+            if spec.get(name) is not None:
+                cols[name][i] = spec[name]
+    cols["skip"] = skip
+    return cols
+
+
+def build_remarks(deltas: Mapping[str, np.ndarray], thresholds: Mapping = THRESHOLDS) -> Dict[str, str]:
+    """Remark text per key whose change crosses its threshold(s)."""
+    keys = list(deltas["keys"])
+    th = _threshold_arrays(keys, thresholds)
+    with np.errstate(invalid="ignore"):
+        by_abs = np.abs(deltas["delta"]) >= th["abs_gb"]
+        by_pct = np.abs(deltas["pct"]) >= th["pct"]
+        by_z = np.abs(deltas["z"]) >= th["z"]
+    hit = (by_abs | by_pct | by_z) & ~th["skip"] & ~np.isnan(deltas["delta"])
+
+    out = {}
+    for i in np.flatnonzero(hit):
+        cur, prev, diff = deltas["cur"][i], deltas["prev"][i], deltas["delta"][i]
+        trend = "증가" if diff > 0 else "감소"
+        text = f"{format_gb(prev)}GB -> {format_gb(cur)}GB ({format_gb(abs(diff))}GB{trend})"
+        # the GB change is already in the text; only relative triggers are named
+        reasons = []
+        if by_pct[i]:
+            reasons.append(f"pct {deltas['pct'][i]:+.1f}%≥{format_gb(th['pct'][i])}%")
+        if by_z[i]:
+            reasons.append(f"z {deltas['z'][i]:.2f}≥{format_gb(th['z'][i])}")
+        out[keys[i]] = f"{text} [{', '.join(reasons)}]" if reasons else text
+    return out
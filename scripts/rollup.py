@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Daily per-policy aggregates with incremental weekly/monthly rollups.
+
+Each ingest folds one export into a small JSON store instead of keeping raw
+exports around:
+
+    days[YYYY-MM-DD][key]  = [kilobytes, jobs]
+    periods[week|month][period_start][key] = {"total", "min", "max", "days"}
+
+Only the (day, key) cells present in the export are merged, and only the
+weeks/months containing those days are recomputed (from at most 31 daily
+entries each). A stored cell is replaced only by one with at least as many
+jobs, so a later export whose window covers just part of an older day does
+not overwrite the complete day.
+
+Keys are report keys: policy names, or split targets such as
+``HZDB_MSSQL_SMS``. Both export formats go through ``report_keys``.
+
+    rollup.py ingest --source /home/owen/Export1.xlsx
+    rollup.py show --period week --at 2026-01-29
+    rollup.py pdf --period week --at 2026-01-29 --out weekly.pdf
+    rollup.py xlsx --period week --at 2026-01-29 --report weekly.xlsx
+"""
+import argparse
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from job_table import KB_PER_GB, JobTable
+from policy_rules import POLICY_ROWS, RuleSet, SPLIT_RULES, policy_row_rules, split_labels
+
+STORE_DEFAULT = "/home/owen/nbu_rollup.json"
+PERIODS = ("week", "month")
+
+
+def period_start(day: date, period: str) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())  # Monday
+    if period == "month":
+        return day.replace(day=1)
+    raise ValueError(f"unknown period: {period}")
+
+
+def previous_period_start(start: date, period: str) -> date:
+    if period == "week":
+        return start - timedelta(days=7)
+    return (start - timedelta(days=1)).replace(day=1)
+
+
+def period_days(start: date, period: str) -> Iterable[date]:
+    if period == "week":
+        end = start + timedelta(days=7)
+    else:
+        end = (start + timedelta(days=32)).replace(day=1)
+    d = start
+    while d < end:
+        yield d
+        d += timedelta(days=1)
+
+
+def week_label(start: date) -> str:
+    """Template-style week name, e.g. "2026_1월_5주차" (week belongs to its Thursday's month)."""
+    thursday = start + timedelta(days=3)
+    return f"{thursday.year}_{thursday.month}월_{(thursday.day - 1) // 7 + 1}주차"
+
+
+def load_store(path: str) -> Dict:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            store = json.load(f)
+    else:
+        store = {}
+    store.setdefault("days", {})
+    store.setdefault("periods", {p: {} for p in PERIODS})
+    return store
+
+
+def save_store(store: Dict, path: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(store, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def daily_sums(table: JobTable) -> Dict[str, Dict[str, list]]:
+    """{day: {key: [kilobytes, jobs]}} for all rows with an end time, in one grouped pass."""
+    day = table.end.astype("datetime64[D]")
+    valid = ~np.isnat(day)
+    if not valid.any():
+        return {}
+    days = day[valid].astype(np.int64)
+    keys = np.stack([days, table.policy[valid].astype(np.int64)], axis=1)
+    uniq, inv = np.unique(keys, axis=0, return_inverse=True)
+    inv = inv.reshape(-1)
+    kb = np.where(table.has_size()[valid], table.kilobytes[valid], 0)
+    sums = np.zeros(len(uniq), dtype=np.int64)
+    np.add.at(sums, inv, kb)
+    counts = np.bincount(inv, minlength=len(uniq))
+
+    out: Dict[str, Dict[str, list]] = {}
+    for (d, code), total, n in zip(uniq, sums, counts):
+        out.setdefault(str(np.datetime64(int(d), "D")), {})[table.policies[code]] = [int(total), int(n)]
+    return out
+
+
+def _recompute_period(store: Dict, period: str, start: date) -> None:
+    bucket: Dict[str, Dict] = {}
+    for d in period_days(start, period):
+        for key, (kb, _) in store["days"].get(d.isoformat(), {}).items():
+            b = bucket.get(key)
+            if b is None:
+                bucket[key] = {"total": kb, "min": kb, "max": kb, "days": 1}
+            else:
+                b["total"] += kb
+                b["min"] = min(b["min"], kb)
+                b["max"] = max(b["max"], kb)
+                b["days"] += 1
+    store["periods"][period][start.isoformat()] = bucket
+
+
+def ingest(store: Dict, table: JobTable, stats: Optional[Dict[str, int]] = None) -> int:
+    """Merge the table's daily sums; returns the number of (day, key) cells written.
+
+    A cell with fewer jobs than the stored one is a partial day and is not
+    written; ``stats`` (if given) receives ``written`` and ``partial`` counts.
+    """
+    sums = daily_sums(table)
+    touched = {p: set() for p in PERIODS}
+    n = partial = 0
+    for day_str, per_key in sums.items():
+        cells = store["days"].setdefault(day_str, {})
+        written = 0
+        for key, (kb, jobs) in per_key.items():
+            old = cells.get(key)
+            if old is not None and jobs < old[1]:
+                partial += 1
+                continue
+            cells[key] = [kb, jobs]
+            written += 1
+        if not written:
+            continue
+        n += written
+        d = date.fromisoformat(day_str)
+        for p in PERIODS:
+            touched[p].add(period_start(d, p))
+    for p, starts in touched.items():
+        for start in starts:
+            _recompute_period(store, p, start)
+    if stats is not None:
+        stats.update(written=n, partial=partial)
+    return n
+
+
+def period_summary(store: Dict, period: str, at: date) -> Dict[str, Dict]:
+    """Rollup of the period containing ``at`` plus the delta against the previous period."""
+    start = period_start(at, period)
+    cur = store["periods"][period].get(start.isoformat(), {})
+    prev = store["periods"][period].get(previous_period_start(start, period).isoformat(), {})
+    out = {}
+    for key, b in cur.items():
+        row = dict(b)
+        p = prev.get(key)
+        row["prev_total"] = p["total"] if p else None
+        row["delta"] = b["total"] - p["total"] if p else None
+        out[key] = row
+    return out
+
+
+def report_key_rules(rows: Optional[List[Dict]] = None, split_rules: List[Dict] = SPLIT_RULES) -> List[Dict]:
+    """Rules mapping jobs of either export format to report keys.
+
+    Instance filters of the report rows apply to jobs that carry an instance
+    name (text export). Jobs without one (Export1.xlsx) of an instance-filtered
+    policy are split by size (``split_rules``) or, if the policy has a single
+    report row, take that row's key. Other instances of those policies map to
+    "" (not a report row); policies without report rows keep their name.
+    """
+    rows = POLICY_ROWS if rows is None else rows
+    label_to_key = split_labels(split_rules)
+    rules = [dict(r, target=label_to_key.get(r["target"], r["target"])) for r in policy_row_rules(rows)]
+    for policy in sorted({r["policy"] for r in rows if r.get("instance")}):
+        unnamed = [dict(s, instance_re="^$") for s in split_rules if s["policy"] == policy]
+        keys = {label_to_key.get(r["label"], r["label"]) for r in rows if r["policy"] == policy}
+        if not unnamed and len(keys) == 1:
+            unnamed = [{"policy": policy, "instance_re": "^$", "target": keys.pop()}]
+        rules += unnamed
+        rules.append({"policy": policy, "target": ""})
+    return rules
+
+
+def report_keys(table: JobTable, rules: Optional[List[Dict]] = None) -> JobTable:
+    """Relabel parsed jobs to report keys, dropping jobs that belong to no report row."""
+    table = table.relabel(RuleSet(report_key_rules() if rules is None else rules))
+    return table.take(table.policy_names() != "")
+
+
+def load_source_table(path: str) -> JobTable:
+    """Parse an export and relabel it to report keys (split targets included)."""
+    if path.lower().endswith(".xlsx"):
+        import pandas as pd
+        from export1_xlsx import table_from_export1
+
+        raw = pd.read_excel(path, sheet_name="Export1", header=None)
+        return report_keys(table_from_export1(raw.iloc[1:].reset_index(drop=True)))
+
+    from nbu_text import extract_jobs
+
+    with open(path, "rb") as f:
+        return report_keys(extract_jobs(f.read()))
+
+
+def _gb(kb: Optional[int]) -> str:
+    return "" if kb is None else f"{kb / KB_PER_GB:.2f}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Daily/weekly/monthly backup volume rollups")
+    ap.add_argument("--store", default=STORE_DEFAULT)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_ing = sub.add_parser("ingest")
+    p_ing.add_argument("--source", default="/home/owen/Export1.xlsx", help="Export1.xlsx or NetBackup text export")
+
+    for name in ("show", "pdf", "xlsx"):
+        p = sub.add_parser(name)
+        p.add_argument("--period", choices=PERIODS, default="week")
+        p.add_argument("--at", default=date.today().isoformat(), help="Any date inside the period (YYYY-MM-DD)")
+        p.add_argument("--value", choices=("total", "max", "min"), default="total")
+        if name == "pdf":
+            p.add_argument("--out", dest="out_pdf", required=True)
+            p.add_argument("--template-pdf")
+        if name == "xlsx":
+            p.add_argument("--report", required=True, help="Report copy to fill (column E)")
+    args = ap.parse_args()
+
+    store = load_store(args.store)
+    if args.cmd == "ingest":
+        stats: dict = {}
+        n = ingest(store, load_source_table(args.source), stats)
+        save_store(store, args.store)
+        print(f"[OK] rollup updated: {n} day/policy cells -> {args.store}")
+        if stats["partial"]:
+            print(f"[WARN] {stats['partial']} partial day/policy cell(s) kept from the store (fewer jobs than stored)")
+        return
+
+    at = date.fromisoformat(args.at)
+    summary = period_summary(store, args.period, at)
+    if not summary:
+        raise SystemExit(f"ROLLUP_EMPTY: no data for {args.period} containing {at}")
+    start = period_start(at, args.period)
+    title = week_label(start) if args.period == "week" else start.strftime("%Y_%m")
+
+    if args.cmd == "show":
+        print(f"[{title}] {args.period} from {start}")
+        for key in sorted(summary):
+            r = summary[key]
+            delta = "" if r["delta"] is None else f"{r['delta'] / KB_PER_GB:+.2f}"
+            print(f"{key:28s} total={_gb(r['total'])} min={_gb(r['min'])} max={_gb(r['max'])} days={r['days']} delta={delta}")
+    elif args.cmd == "pdf":
+        from nbu_txt_to_pdf import TEMPLATE_PDF_DEFAULT, render_report
+
+        label_to_key = split_labels(SPLIT_RULES)
+        values = {}
+        for row in POLICY_ROWS:
+            r = summary.get(label_to_key.get(row["label"], row["policy"]))
+            values[row["label"]] = _gb(r[args.value]) if r else ""
+        out_pdf = os.path.abspath(args.out_pdf)
+        render_report(args.template_pdf or TEMPLATE_PDF_DEFAULT, out_pdf, values)
+        print(f"[OK] PDF generated ({title}): {out_pdf}")
+    else:
+        from export1_to_report import fill_volume_cells
+
+        n = fill_volume_cells(args.report, {k: r[args.value] for k, r in summary.items()}, SPLIT_RULES)
+        print(f"[OK] report updated ({title}, {n} cells): {args.report}")
+
+
+if __name__ == "__main__":
+    main()
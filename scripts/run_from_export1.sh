@@ -23,19 +23,19 @@ python3 "$DIR/export1_to_report.py" \
   --parsed "$PARSED" \
   --report "$REPORT"
 
-mkdir -p "$WIN_DEST_DIR"
+# fold today's export into the daily/weekly/monthly rollup store
+python3 "$DIR/rollup.py" ingest --source "$EXPORT1" || echo "[WARN] rollup ingest failed"
+
+# keep the raw job rows (month partitions, deduplicated) before Export1 is overwritten
+python3 "$DIR/job_archive.py" ingest --source "$EXPORT1" || echo "[WARN] archive ingest failed"
+
 # Safety check: only copy the dated report, never the template
 if [[ -f "$REPORT" && "$REPORT" == *"벽산 리포트_백업상태_최종(양식)_"*.xlsx ]]; then
-  if ! cp -f "$REPORT" "$WIN_DEST_DIR/"; then
-    # If overwrite fails (e.g., file in use), write a timestamped copy instead
-    ts="$(date +%H%M%S)"
-    fallback="$WIN_DEST_DIR/벽산 리포트_백업상태_최종(양식)_${DATE_TAG}_${ts}.xlsx"
-    if cp -f "$REPORT" "$fallback"; then
-      echo "[WARN] Overwrite failed; copied to $fallback"
-    else
-      echo "[ERROR] Failed to copy report to Windows path"
-      exit 2
-    fi
+  # hash-checked, temp+rename copy; lock conflicts are retried with backoff.
+  # Foreground, so a failed copy fails the run (exit 2) and the watcher ships the log.
+  if ! python3 "$DIR/publish.py" file --src "$REPORT" --dest-dir "$WIN_DEST_DIR"; then
+    echo "[ERROR] Failed to copy report to Windows path"
+    exit 2
   fi
 else
   echo "[WARN] Report missing or unexpected filename: $REPORT"
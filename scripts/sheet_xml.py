@@ -0,0 +1,205 @@
+"""Part-level read/write of worksheet cells inside an .xlsx (no openpyxl round trip).
+
+Only the worksheet part that changes is rewritten; every other zip entry
+(drawings, images, printer settings, calcChain, ...) is copied byte for byte,
+so nothing has to be restored from the template afterwards.
+
+    with zipfile.ZipFile(path) as zf:
+        part = sheet_part(zf, "백업상태 점검_일일점검")
+        xml = zf.read(part).decode("utf-8")
+        cells = read_cells(xml, shared_strings(zf))
+    xml, n = set_cells(xml, {"E5": formula_cell("1000/(1024*1024)", 0.00095), "H5": text_cell("비고")})
+    rewrite_zip_entries(path, {part: xml.encode("utf-8")})
+"""
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, unescape
+
+NS = {
+    "m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+# (cell type or None, inner XML)
+CellXml = Tuple[Optional[str], str]
+
+_CELL_RE = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.DOTALL)
+_REF_RE = re.compile(r'\br="([A-Z]+)(\d+)"')
+_TYPE_RE = re.compile(r'\s+t="[^"]*"')
+
+
+def split_ref(ref: str) -> Tuple[int, int]:
+    """"H12" -> (8, 12)."""
+    m = re.fullmatch(r"([A-Z]+)(\d+)", ref)
+    if not m:
+        raise ValueError(f"bad cell reference: {ref}")
+    col = 0
+    for ch in m.group(1):
+        col = col * 26 + ord(ch) - 64
+    return col, int(m.group(2))
+
+
+def sheet_part(zf: zipfile.ZipFile, sheet_name: str) -> str:
+    """Zip entry name of the worksheet called ``sheet_name``."""
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    rid = None
+    for sheet in wb.iterfind("m:sheets/m:sheet", NS):
+        if sheet.get("name") == sheet_name:
+            rid = sheet.get(f"{{{NS['r']}}}id")
+            break
+    if rid is None:
+        raise KeyError(f"sheet not found: {sheet_name}")
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iterfind("rel:Relationship", NS):
+        if rel.get("Id") == rid:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise KeyError(f"relationship not found for sheet {sheet_name}: {rid}")
+
+
+def shared_strings(zf: zipfile.ZipFile) -> List[str]:
+    """Shared string table (rich-text runs joined, phonetic runs skipped)."""
+    try:
+        data = zf.read("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    out = []
+    for si in ET.fromstring(data).iterfind("m:si", NS):
+        t = si.find("m:t", NS)
+        if t is not None:
+            out.append(t.text or "")
+        else:
+            out.append("".join(r.text or "" for r in si.iterfind("m:r/m:t", NS)))
+    return out
+
+
+def _text(inner: str, tag: str) -> Optional[str]:
+    m = re.search(rf"<{tag}(?:\s[^>]*)?>(.*?)</{tag}>", inner, re.DOTALL)
+    return unescape(m.group(1)) if m else None
+
+
+def read_cells(sheet_xml: str, strings: List[str]) -> Dict[str, Tuple[object, Optional[str]]]:
+    """{ref: (value, formula)} for every cell in the sheet; numbers as float, strings resolved."""
+    cells = {}
+    for m in _CELL_RE.finditer(sheet_xml):
+        attrs, inner = m.group(1), m.group(2) or ""
+        ref = _REF_RE.search(attrs)
+        if not ref:
+            continue
+        t = re.search(r'\bt="([^"]*)"', attrs)
+        t = t.group(1) if t else "n"
+        formula = _text(inner, "f")
+        v = _text(inner, "v")
+        if t == "s":
+            try:
+                value = strings[int(v)]
+            except (TypeError, ValueError, IndexError):
+                value = None
+        elif t == "inlineStr":
+            value = "".join(unescape(x) for x in re.findall(r"<t(?:\s[^>]*)?>(.*?)</t>", inner, re.DOTALL))
+        elif t in ("str", "e"):
+            value = v
+        elif t == "b":
+            value = v == "1" if v is not None else None
+        else:
+            try:
+                value = float(v) if v not in (None, "") else None
+            except ValueError:
+                value = None
+        cells[ref.group(1) + ref.group(2)] = (value, formula)
+    return cells
+
+
+def merged_children(sheet_xml: str) -> set:
+    """(col, row) of cells covered by a merged range other than its top-left cell (not writable)."""
+    out = set()
+    for rng in re.findall(r'<mergeCell\b[^>]*\bref="([A-Z]+\d+):([A-Z]+\d+)"', sheet_xml):
+        (c0, r0), (c1, r1) = split_ref(rng[0]), split_ref(rng[1])
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                if (c, r) != (c0, r0):
+                    out.add((c, r))
+    return out
+
+
+def formula_cell(formula: str, value=None) -> CellXml:
+    v = "" if value is None else f"<v>{value}</v>"
+    return None, f"<f>{escape(formula)}</f>{v}"
+
+
+def text_cell(text: str) -> CellXml:
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return "inlineStr", f"<is><t{space}>{escape(text)}</t></is>"
+
+
+def _col_of(attrs: str) -> int:
+    ref = _REF_RE.search(attrs)
+    return split_ref(ref.group(1) + ref.group(2))[0] if ref else 0
+
+
+def _cell_xml(ref: str, attrs: str, cell: CellXml) -> str:
+    cell_type, inner = cell
+    attrs = _TYPE_RE.sub("", attrs).rstrip("/").strip() or f'r="{ref}"'
+    if cell_type:
+        attrs += f' t="{cell_type}"'
+    return f"<c {attrs}>{inner}</c>"
+
+
+def set_cells(sheet_xml: str, updates: Dict[str, CellXml]) -> Tuple[str, int]:
+    """Replace/insert cells in one pass; existing style (``s``) is kept. Returns (xml, cells written)."""
+    pending = dict(updates)
+
+    def repl(m: re.Match) -> str:
+        ref = _REF_RE.search(m.group(1))
+        key = ref.group(1) + ref.group(2) if ref else None
+        if key not in pending:
+            return m.group(0)
+        return _cell_xml(key, m.group(1), pending.pop(key))
+
+    sheet_xml = _CELL_RE.sub(repl, sheet_xml)
+    written = len(updates) - len(pending)
+    if not pending:
+        return sheet_xml, written
+
+    # cells that do not exist yet: insert into their row in column order
+    by_row: Dict[int, List[Tuple[int, str]]] = {}
+    for ref in pending:
+        col, row = split_ref(ref)
+        by_row.setdefault(row, []).append((col, ref))
+
+    def row_repl(m: re.Match) -> str:
+        row_num = int(m.group(2))
+        new = by_row.pop(row_num, None)
+        if not new:
+            return m.group(0)
+        body = m.group(3) or ""
+        parts = [(_col_of(c.group(1)), c.group(0)) for c in _CELL_RE.finditer(body)]
+        parts += [(col, _cell_xml(ref, "", pending[ref])) for col, ref in new]
+        parts.sort(key=lambda p: p[0])
+        open_tag = m.group(1).rstrip("/").rstrip()
+        return f"{open_tag}>{''.join(p[1] for p in parts)}</row>"
+
+    row_re = re.compile(r'(<row\b[^>]*?\br="(\d+)"[^>]*?)(?:/>|>(.*?)</row>)', re.DOTALL)
+    sheet_xml = row_re.sub(row_repl, sheet_xml)
+    written += len(pending) - sum(len(v) for v in by_row.values())  # rows missing from sheetData are skipped
+    return sheet_xml, written
+
+
+def rewrite_zip_entries(path: str, entries: Dict[str, bytes], src_path: Optional[str] = None) -> None:
+    """Replace the given entries, copying all others unchanged (temp file + rename).
+
+    With ``src_path`` the other entries come from that file (e.g. the template).
+    """
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(src_path or path, "r") as zin, zipfile.ZipFile(tmp_path, "w") as zout:
+        for item in zin.infolist():
+            data = entries.get(item.filename)
+            zout.writestr(item, data if data is not None else zin.read(item.filename))
+    os.replace(tmp_path, path)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Minimal stage DAG with content-hash fingerprints (make-style up-to-date checks).
+
+A stage declares its input files (static paths or a function of upstream
+outputs), a params dict, and a ``run`` callable that returns the files it
+produced. A stage is skipped when the sha256 of every input, its params, and
+its recorded outputs are unchanged since it last completed. The state file
+is saved after each completed stage, so a crashed run resumes from the first
+stage that did not finish.
+
+    stages = [
+        Stage("parse", parse, inputs=[EXPORT1]),
+        Stage("report", report, inputs=lambda out: out["parse"] + [TEMPLATE], after=["parse"]),
+    ]
+    run_stages(stages, "/home/owen/.pipeline_state.json")
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+Outputs = Dict[str, List[str]]
+Inputs = Union[Sequence[str], Callable[[Outputs], Sequence[str]]]
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[Outputs], Sequence[str]],
+        inputs: Inputs = (),
+        params: Optional[Dict] = None,
+        after: Iterable[str] = (),
+    ):
+        self.name = name
+        self.run = run
+        self.inputs = inputs
+        self.params = params or {}
+        self.after = list(after)
+
+    def input_paths(self, outputs: Outputs) -> List[str]:
+        paths = self.inputs(outputs) if callable(self.inputs) else self.inputs
+        return [p for p in paths if p]
+
+
+def _log(msg: str) -> None:
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] {msg}", flush=True)
+
+
+def load_state(path: str) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault("stages", {})
+    state.setdefault("files", {})
+    return state
+
+
+def save_state(state: Dict, path: str) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def file_digest(path: str, cache: Dict) -> Optional[str]:
+    """sha256 of the file (None if missing); reused while size and mtime are unchanged."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    sig = [st.st_size, st.st_mtime_ns]
+    hit = cache.get(path)
+    if hit and hit[:2] == sig:
+        return hit[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    cache[path] = sig + [h.hexdigest()]
+    return h.hexdigest()
+
+
+def _fingerprint(paths: Sequence[str], cache: Dict) -> Dict[str, Optional[str]]:
+    return {p: file_digest(p, cache) for p in paths}
+
+
+def _stale_reason(record: Optional[Dict], inputs: Dict, params: Dict, cache: Dict) -> Optional[str]:
+    if record is None:
+        return "never completed"
+    if record.get("params") != params:
+        return "params changed"
+    prev = record.get("inputs", {})
+    changed = sorted(p for p in set(inputs) | set(prev) if inputs.get(p) != prev.get(p))
+    if changed:
+        return "inputs changed: " + ", ".join(os.path.basename(p) for p in changed)
+    for path, digest in record.get("outputs", {}).items():
+        if file_digest(path, cache) != digest:
+            return f"output missing or modified: {os.path.basename(path)}"
+    return None
+
+
+def run_stages(
+    stages: Sequence[Stage],
+    state_path: str,
+    force: Iterable[str] = (),
+    dry_run: bool = False,
+) -> Dict[str, str]:
+    """Run stages in order, skipping up-to-date ones; returns {stage: "ran"|"skipped"|"stale"}."""
+    seen = set()
+    for stage in stages:
+        missing = [a for a in stage.after if a not in seen]
+        if missing:
+            raise ValueError(f"stage {stage.name} depends on later/unknown stage(s): {', '.join(missing)}")
+        seen.add(stage.name)
+
+    force = set(force)
+    state = load_state(state_path)
+    outputs: Outputs = {}
+    result: Dict[str, str] = {}
+    for stage in stages:
+        record = state["stages"].get(stage.name)
+        inputs = _fingerprint(stage.input_paths(outputs), state["files"])
+        params = json.loads(json.dumps(stage.params, default=str))
+        reason = "forced" if stage.name in force else _stale_reason(record, inputs, params, state["files"])
+
+        if reason is None:
+            outputs[stage.name] = list(record.get("outputs", {}))
+            result[stage.name] = "skipped"
+            _log(f"[SKIP] {stage.name}: up to date")
+            continue
+        if dry_run:
+            outputs[stage.name] = list((record or {}).get("outputs", {}))
+            result[stage.name] = "stale"
+            _log(f"[STALE] {stage.name}: {reason}")
+            continue
+
+        _log(f"[RUN] {stage.name}: {reason}")
+        produced = list(stage.run(outputs))
+        outputs[stage.name] = produced
+        state["stages"][stage.name] = {
+            "inputs": inputs,
+            "params": params,
+            "outputs": _fingerprint(produced, state["files"]),
+            "completed_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        # persist after every stage: a crash later in the run resumes from here
+        save_state(state, state_path)
+        result[stage.name] = "ran"
+
+    # keep digest cache entries only for files some stage still refers to
+    live = {p for rec in state["stages"].values() for key in ("inputs", "outputs") for p in rec.get(key, {})}
+    state["files"] = {p: v for p, v in state["files"].items() if p in live}
+    if not dry_run:
+        save_state(state, state_path)
+    return result
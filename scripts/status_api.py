@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Read-only JSON status API on localhost (latest per-policy totals, deltas, run info).
+
+Each pipeline run writes a small snapshot (``write_status``) with the
+aggregates it already has in memory. The server keeps the serialized
+snapshot in memory and reloads it only when the file changes, so a poll is
+a stat plus a bytes write; no report is generated and no Excel file is read.
+
+    status_api.py serve --port 8765 &
+    curl -s localhost:8765/status
+    curl -s localhost:8765/policies/ERP-DB_ORACLE
+
+Endpoints: ``/status`` (everything), ``/run``, ``/policies``,
+``/policies/<key>``, ``/healthz``. Stdlib only.
+"""
+import argparse
+import json
+import math
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Mapping, Optional
+from urllib.parse import unquote
+
+from job_table import KB_PER_GB
+
+STATUS_PATH = "/home/owen/nbu_status.json"
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+def _num(v) -> Optional[float]:
+    if v is None:
+        return None
+    v = float(v)
+    return None if math.isnan(v) else round(v, 4)
+
+
+def policy_status(agg_kb: Mapping[str, int], deltas: Optional[Mapping] = None, remarks: Optional[Mapping] = None) -> Dict[str, Dict]:
+    """Per-key status rows from the run's aggregates (``deltas`` as returned by remarks.compute_deltas)."""
+    out = {}
+    for key, kb in agg_kb.items():
+        out[key] = {"kilobytes": int(kb), "gb": _num(kb / KB_PER_GB)}
+    if deltas is not None:
+        for i, key in enumerate(deltas["keys"]):
+            row = out.setdefault(key, {"kilobytes": None, "gb": None})
+            row["prev_gb"] = _num(deltas["prev"][i])
+            row["delta_gb"] = _num(deltas["delta"][i])
+            row["pct"] = _num(deltas["pct"][i])
+    for key, text in (remarks or {}).items():
+        out.setdefault(key, {"kilobytes": None, "gb": None})["remark"] = text
+    return out
+
+
+def write_status(policies: Dict[str, Dict], run: Dict, path: str = STATUS_PATH) -> None:
+    """Atomically replace the snapshot; never fails the pipeline."""
+    doc = {"run": dict(run, written_at=datetime.now().isoformat(timespec="seconds")), "policies": policies}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[WARN] status snapshot not written: {e}")
+
+
+class _Snapshot:
+    """Serialized responses for the current snapshot, rebuilt when the file changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sig = None
+        self._lock = threading.Lock()
+        self.routes: Dict[str, bytes] = {}
+
+    def refresh(self) -> None:
+        try:
+            st = os.stat(self.path)
+            sig = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            sig = None
+        if sig == self._sig:
+            return
+        with self._lock:
+            if sig == self._sig:
+                return
+            doc = {"run": None, "policies": {}}
+            if sig is not None:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        doc = json.load(f)
+                except (OSError, ValueError):
+                    return  # mid-write or corrupt: keep serving the previous snapshot
+            routes = {
+                "/status": _dumps(doc),
+                "/run": _dumps(doc.get("run")),
+                "/policies": _dumps(doc.get("policies", {})),
+            }
+            for key, row in doc.get("policies", {}).items():
+                routes[f"/policies/{key}"] = _dumps(row)
+            self.routes = routes
+            self._sig = sig
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def make_handler(snapshot: _Snapshot):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            route = unquote(self.path.split("?", 1)[0]).rstrip("/") or "/status"
+            if route == "/healthz":
+                body, code = b'{"ok": true}', 200
+            else:
+                snapshot.refresh()
+                body = snapshot.routes.get(route)
+                code = 200
+                if body is None:
+                    body, code = _dumps({"error": f"not found: {route}"}), 404
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def serve(path: str = STATUS_PATH, port: int = PORT) -> None:
+    snapshot = _Snapshot(path)
+    snapshot.refresh()
+    server = ThreadingHTTPServer((HOST, port), make_handler(snapshot))
+    print(f"[OK] status API on http://{HOST}:{port}/status (snapshot: {path})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local read-only JSON status API")
+    ap.add_argument("--status", default=STATUS_PATH, help="Snapshot file written by the pipeline")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve")
+    p_serve.add_argument("--port", type=int, default=PORT)
+    sub.add_parser("show")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        serve(args.status, args.port)
+    else:
+        with open(args.status, "r", encoding="utf-8") as f:
+            print(json.dumps(json.load(f), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
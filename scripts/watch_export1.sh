@@ -1,12 +1,14 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-WATCH_DIR="/home/owen"
-WATCH_FILE="Export1.xlsx"
-RUNNER="/root/workspace/my-codex-repo/scripts/run_from_export1.sh"
-LOCKFILE="/tmp/export1_watch.lock"
-LOGFILE="/home/owen/export1_watch.log"
-WIN_ERROR_DIR="/mnt/c/Users/goust/OneDrive/바탕 화면/22/OneDrive/owen_잡/4. 벽산"
+WATCH_DIR="${WATCH_DIR:-/home/owen}"
+WATCH_FILE="${WATCH_FILE:-Export1.xlsx}"
+RUNNER="${RUNNER:-/root/workspace/my-codex-repo/scripts/run_from_export1.sh}"
+LOCKFILE="${LOCKFILE:-/tmp/export1_watch.lock}"
+LOGFILE="${LOGFILE:-/home/owen/export1_watch.log}"
+PUBLISH="$(cd "$(dirname "$0")" && pwd)/publish.py"
+WIN_ERROR_DIR="${WIN_ERROR_DIR:-/mnt/c/Users/goust/OneDrive/바탕 화면/22/OneDrive/owen_잡/4. 벽산}"
+DEBOUNCE="${DEBOUNCE:-5}"
 
 # Watch for close_write or moved_to (atomic upload + rename)
 /usr/bin/inotifywait -m -e close_write,moved_to,create --format '%f' "$WATCH_DIR" | while read -r fname; do
@@ -17,29 +19,38 @@ WIN_ERROR_DIR="/mnt/c/Users/goust/OneDrive/바탕 화면/22/OneDrive/owen_잡/4.
   # debounce + ensure only one run at a time
   if command -v flock >/dev/null 2>&1; then
     (
-      flock -n 9 || exit 0
-      sleep 5
-      {
-        echo "[INFO] $(date -Is) start"
-        bash "$RUNNER"
-        rc=$?
+      if ! flock -n 9; then
+        # another run holds the lock: queue a rerun instead of dropping this upload
+        touch "$LOCKFILE.pending"
+        flock -w 5 9 || exit 0
+      fi
+      sleep "$DEBOUNCE"
+      while true; do
+        rm -f "$LOCKFILE.pending"
+        rc=0
+        (
+          echo "[INFO] $(date -Is) start"
+          bash "$RUNNER"
+          rc=$?
+          if [[ $rc -ne 0 ]]; then
+            echo "[ERROR] $(date -Is) run failed rc=$rc"
+          else
+            echo "[INFO] $(date -Is) done"
+          fi
+          exit $rc
+        ) >>"$LOGFILE" 2>&1 || rc=$?
         if [[ $rc -ne 0 ]]; then
-          echo "[ERROR] $(date -Is) run failed rc=$rc"
-        else
-          echo "[INFO] $(date -Is) done"
+          mkdir -p "$WIN_ERROR_DIR"
+          ts="$(date +%Y%m%d_%H%M%S)"
+          # ship only the log lines added since the last shipment
+          python3 "$PUBLISH" log --log "$LOGFILE" --dest "$WIN_ERROR_DIR/ERROR_export1_watch_${ts}.log" || true
         fi
-        exit $rc
-      } >>"$LOGFILE" 2>&1
-      rc=$?
-      if [[ $rc -ne 0 ]]; then
-        mkdir -p "$WIN_ERROR_DIR"
-        ts="$(date +%Y%m%d_%H%M%S)"
-        cp -f "$LOGFILE" "$WIN_ERROR_DIR/ERROR_export1_watch_${ts}.log" || true
-      fi
+        [[ -e "$LOCKFILE.pending" ]] || break
+      done
     ) 9>"$LOCKFILE"
   else
-    sleep 5
-    {
+    sleep "$DEBOUNCE"
+    (
       echo "[INFO] $(date -Is) start"
       bash "$RUNNER"
       rc=$?
@@ -49,12 +60,12 @@ WIN_ERROR_DIR="/mnt/c/Users/goust/OneDrive/바탕 화면/22/OneDrive/owen_잡/4.
         echo "[INFO] $(date -Is) done"
       fi
       exit $rc
-    } >>"$LOGFILE" 2>&1
-    rc=$?
+    ) >>"$LOGFILE" 2>&1 && rc=0 || rc=$?
     if [[ $rc -ne 0 ]]; then
       mkdir -p "$WIN_ERROR_DIR"
       ts="$(date +%Y%m%d_%H%M%S)"
-      cp -f "$LOGFILE" "$WIN_ERROR_DIR/ERROR_export1_watch_${ts}.log" || true
+      # ship only the log lines added since the last shipment
+      python3 "$PUBLISH" log --log "$LOGFILE" --dest "$WIN_ERROR_DIR/ERROR_export1_watch_${ts}.log" || true
     fi
   fi
 
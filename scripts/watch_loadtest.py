@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""End-to-end latency load test for the Export1 watchers (upload -> published report).
+
+Each watcher script runs unchanged against stand-in directories (drop folder,
+destination folder, lock/log files) passed through its environment overrides.
+The real runner is replaced by a stub that reads the uploaded file, sleeps
+``--run-seconds`` (the pipeline) and publishes a report named after the
+upload id into the destination folder, appending one ledger line per run.
+
+Scenarios (one upload event per round, fixed file size):
+
+    atomic   write a temp file, rename onto Export1.xlsx
+    inplace  rewrite Export1.xlsx in one go
+    slow     rewrite in chunks over --slow-seconds
+    partial  write half, stall --stall-seconds, write the rest
+    burst    --burst uploads --burst-gap seconds apart; only the last must be published
+    overlap  upload, then upload again as soon as the runner has started
+
+Per watcher and scenario it reports trigger-to-publish latency p50/p95/p99
+(upload finished -> report in the destination), missed uploads (never
+published), duplicate runs (same upload published more than once) and torn
+runs (runner saw a partially written file).
+
+    watch_loadtest.py run --watcher poll --watcher inotify --rounds 5
+    watch_loadtest.py run --interval 1 --run-seconds 0.5 --json /tmp/watch_latency.json
+
+Stdlib only. ``--interval`` also sets the inotify watcher's debounce; use the
+production value (5) for SLA numbers.
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+WATCHERS = {
+    "poll": os.path.join(SCRIPTS, "byeoksan_watch", "watch_export1.sh"),
+    "inotify": os.path.join(SCRIPTS, "watch_export1.sh"),
+}
+SCENARIOS = ["atomic", "inplace", "slow", "partial", "burst", "overlap"]
+WATCH_NAME = "Export1.xlsx"
+
+
+# ---- stub runner (invoked by the watcher through the generated runner script)
+
+
+def stub_run(watch_file: str, dest_dir: str, ledger: str, run_seconds: float) -> None:
+    started = time.time()
+    with open(watch_file, "rb") as f:
+        data = f.read()
+    lines = data.split(b"\n")
+    head = lines[0].decode("ascii", "replace")
+    upload_id = int(head.split()[1]) if head.startswith("UPLOAD ") else -1
+    ok = len(lines) > 1 and lines[-2] == f"END {upload_id:06d}".encode()
+    _append(ledger, {"id": upload_id, "phase": "read", "at": started})
+    time.sleep(run_seconds)
+    out = os.path.join(dest_dir, f"report_{upload_id:06d}_{os.getpid()}.txt")
+    with open(out + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(out + ".tmp", out)
+    _append(ledger, {"id": upload_id, "phase": "published", "ok": ok, "started": started, "published": time.time()})
+
+
+def _append(ledger: str, rec: Dict) -> None:
+    with open(ledger, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec) + "\n")
+
+
+# ---- uploads
+
+
+def _payload(upload_id: int, size: int) -> bytes:
+    head = f"UPLOAD {upload_id:06d}\n".encode()
+    tail = f"END {upload_id:06d}\n".encode()
+    return head + b"x" * max(size - len(head) - len(tail) - 1, 0) + b"\n" + tail
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = os.path.join(os.path.dirname(path), f".{WATCH_NAME}.upload")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_inplace(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_chunked(path: str, data: bytes, seconds: float, chunks: int = 10) -> None:
+    step = max(len(data) // chunks, 1)
+    with open(path, "wb") as f:
+        for i in range(0, len(data), step):
+            f.write(data[i:i + step])
+            f.flush()
+            time.sleep(seconds / chunks)
+
+
+def _write_stalled(path: str, data: bytes, stall: float) -> None:
+    half = len(data) // 2
+    with open(path, "wb") as f:
+        f.write(data[:half])
+        f.flush()
+        time.sleep(stall)
+        f.write(data[half:])
+
+
+# ---- harness
+
+
+class Harness:
+    def __init__(self, watcher: str, args):
+        self.watcher = watcher
+        self.args = args
+        self.root = tempfile.mkdtemp(prefix=f"watch_loadtest_{watcher}_")
+        self.drop = os.path.join(self.root, "drop")
+        self.dest = os.path.join(self.root, "dest")
+        os.makedirs(self.drop)
+        os.makedirs(self.dest)
+        self.watch_file = os.path.join(self.drop, WATCH_NAME)
+        self.ledger = os.path.join(self.root, "ledger.jsonl")
+        self.size = args.size_kb * 1024
+        self.next_id = 0
+        self.uploads: List[Dict] = []  # id, scenario, done, expected
+        self.proc: Optional[subprocess.Popen] = None
+
+    def runs(self, phase: str = "published") -> List[Dict]:
+        """Ledger records so far (``read``: runner has read the file, ``published``: run finished)."""
+        try:
+            with open(self.ledger, "r", encoding="utf-8") as f:
+                recs = [json.loads(ln) for ln in f if ln.strip()]
+        except OSError:
+            return []
+        return [r for r in recs if r["phase"] == phase]
+
+    def _runner(self) -> str:
+        path = os.path.join(self.root, "runner.sh")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("#!/usr/bin/env bash\n")
+            f.write(
+                f'exec "{sys.executable}" "{os.path.abspath(__file__)}" stub '
+                f'--watch-file "{self.watch_file}" --dest-dir "{self.dest}" '
+                f'--ledger "{self.ledger}" --run-seconds {self.args.run_seconds}\n'
+            )
+        os.chmod(path, 0o755)
+        return path
+
+    def start(self) -> None:
+        # seed file, so the first measured upload is a change, not a creation
+        _write_atomic(self.watch_file, _payload(self._new_id(), self.size))
+        env = dict(
+            os.environ,
+            WATCH_DIR=self.drop,
+            WATCH_FILE=self.watch_file if self.watcher == "poll" else WATCH_NAME,
+            RUNNER=self._runner(),
+            LOCKFILE=os.path.join(self.root, "watch.lock"),
+            LOGFILE=os.path.join(self.root, "watch.log"),
+            WIN_ERROR_DIR=os.path.join(self.root, "errors"),
+            INTERVAL=str(self.args.interval),
+            DEBOUNCE=str(self.args.interval),
+        )
+        self.proc = subprocess.Popen(
+            ["bash", WATCHERS[self.watcher]], env=env, start_new_session=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        # the poll watcher runs once for the seed; wait for it to go quiet
+        time.sleep(1.0)
+        if self.watcher == "poll":
+            self._wait(lambda: any(r["id"] == 0 for r in self.runs()), self._timeout())
+            time.sleep(self.args.interval)
+
+    def stop(self) -> None:
+        if self.proc and self.proc.poll() is None:
+            try:
+                os.killpg(self.proc.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            self.proc.wait(timeout=10)
+        if not self.args.keep:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def _new_id(self) -> int:
+        upload_id = self.next_id
+        self.next_id += 1
+        return upload_id
+
+    def _timeout(self) -> float:
+        a = self.args
+        return 4 * a.interval + a.run_seconds + a.stall_seconds + a.slow_seconds + 5
+
+    @staticmethod
+    def _wait(cond, timeout: float, poll: float = 0.05) -> bool:
+        end = time.time() + timeout
+        while time.time() < end:
+            if cond():
+                return True
+            time.sleep(poll)
+        return False
+
+    def _upload(self, scenario: str, expected: bool = True) -> int:
+        upload_id = self._new_id()
+        data = _payload(upload_id, self.size)
+        a = self.args
+        if scenario == "atomic":
+            _write_atomic(self.watch_file, data)
+        elif scenario == "slow":
+            _write_chunked(self.watch_file, data, a.slow_seconds)
+        elif scenario == "partial":
+            _write_stalled(self.watch_file, data, a.stall_seconds)
+        else:
+            _write_inplace(self.watch_file, data)
+        self.uploads.append({"id": upload_id, "scenario": scenario, "done": time.time(), "expected": expected})
+        return upload_id
+
+    def round(self, scenario: str) -> None:
+        a = self.args
+        if scenario == "burst":
+            for i in range(a.burst):
+                self._upload(scenario, expected=i == a.burst - 1)
+                if i < a.burst - 1:
+                    time.sleep(a.burst_gap)
+        elif scenario == "overlap":
+            first = self._upload(scenario)
+            # second upload lands while the pipeline is busy with the first
+            self._wait(lambda: any(r["id"] == first for r in self.runs("read")), self._timeout())
+            self._upload(scenario)
+        else:
+            self._upload(scenario)
+
+        want = {u["id"] for u in self.uploads if u["scenario"] == scenario and u["expected"]}
+        self._wait(lambda: want <= {r["id"] for r in self.runs() if r["ok"]}, self._timeout())
+        time.sleep(2 * a.interval + a.run_seconds + 1)  # quiet period: catch late duplicate runs
+
+    def report(self) -> Dict[str, Dict]:
+        runs = self.runs()
+        by_id: Dict[int, List[Dict]] = {}
+        for r in runs:
+            by_id.setdefault(r["id"], []).append(r)
+        out = {}
+        for scenario in self.args.scenarios:
+            ups = [u for u in self.uploads if u["scenario"] == scenario]
+            ids = {u["id"] for u in ups}
+            lat, missed, dup = [], 0, 0
+            for u in ups:
+                ok = sorted(r["published"] for r in by_id.get(u["id"], []) if r["ok"])
+                dup += max(len(ok) - 1, 0)
+                if not u["expected"]:
+                    continue
+                if ok:
+                    lat.append(ok[0] - u["done"])
+                else:
+                    missed += 1
+            mine = [r for r in runs if r["id"] in ids]
+            out[scenario] = {
+                "uploads": len(ups),
+                "expected": sum(u["expected"] for u in ups),
+                "runs": len(mine),
+                "missed": missed,
+                "duplicate": dup,
+                "torn": sum(not r["ok"] for r in mine),
+                "p50": percentile(lat, 50),
+                "p95": percentile(lat, 95),
+                "p99": percentile(lat, 99),
+            }
+        return out
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (None when there are no samples)."""
+    if not values:
+        return None
+    s = sorted(values)
+    k = max(int(-(-q * len(s) // 100)) - 1, 0)
+    return round(s[min(k, len(s) - 1)], 3)
+
+
+def run_watcher(watcher: str, args) -> Optional[Dict[str, Dict]]:
+    if watcher == "inotify" and not os.path.exists("/usr/bin/inotifywait"):
+        print("[WARN] inotify: /usr/bin/inotifywait not installed (inotify-tools); skipped")
+        return None
+    h = Harness(watcher, args)
+    print(f"[INFO] {watcher}: {WATCHERS[watcher]} (work dir {h.root})", flush=True)
+    try:
+        h.start()
+        for n in range(args.rounds):
+            for scenario in args.scenarios:
+                h.round(scenario)
+            print(f"[INFO] {watcher}: round {n + 1}/{args.rounds} done", flush=True)
+        return h.report()
+    finally:
+        h.stop()
+
+
+def _fmt(v) -> str:
+    return "-" if v is None else f"{v:.2f}"
+
+
+def print_table(results: Dict[str, Dict[str, Dict]]) -> None:
+    cols = ["uploads", "runs", "missed", "duplicate", "torn"]
+    print(f"{'watcher':<8} {'scenario':<8} " + " ".join(f"{c:>9}" for c in cols) + f" {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}")
+    for watcher, rows in results.items():
+        for scenario, r in rows.items():
+            print(
+                f"{watcher:<8} {scenario:<8} " + " ".join(f"{r[c]:>9}" for c in cols)
+                + f" {_fmt(r['p50']):>8} {_fmt(r['p95']):>8} {_fmt(r['p99']):>8}"
+            )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Latency load test for the Export1 watch-and-publish loop")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run")
+    p_run.add_argument("--watcher", action="append", choices=sorted(WATCHERS), help="Default: all")
+    p_run.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated: " + ",".join(SCENARIOS))
+    p_run.add_argument("--rounds", type=int, default=5)
+    p_run.add_argument("--interval", type=float, default=5, help="Watcher INTERVAL / debounce seconds")
+    p_run.add_argument("--run-seconds", type=float, default=2.0, help="Simulated pipeline duration")
+    p_run.add_argument("--size-kb", type=int, default=256)
+    p_run.add_argument("--slow-seconds", type=float, default=8.0)
+    p_run.add_argument("--stall-seconds", type=float, default=12.0)
+    p_run.add_argument("--burst", type=int, default=3)
+    p_run.add_argument("--burst-gap", type=float, default=0.3)
+    p_run.add_argument("--json", help="Also write the results here")
+    p_run.add_argument("--keep", action="store_true", help="Keep the stand-in directories")
+
+    p_stub = sub.add_parser("stub", help="Stub runner (called by the watcher under test)")
+    p_stub.add_argument("--watch-file", required=True)
+    p_stub.add_argument("--dest-dir", required=True)
+    p_stub.add_argument("--ledger", required=True)
+    p_stub.add_argument("--run-seconds", type=float, default=0.0)
+    args = ap.parse_args()
+
+    if args.cmd == "stub":
+        stub_run(args.watch_file, args.dest_dir, args.ledger, args.run_seconds)
+        return
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"[ERROR] unknown scenario(s): {', '.join(unknown)}")
+
+    results = {}
+    for watcher in args.watcher or sorted(WATCHERS):
+        rows = run_watcher(watcher, args)
+        if rows is not None:
+            results[watcher] = rows
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
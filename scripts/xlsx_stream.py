@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Write-only xlsx writer: rows are streamed straight into the sheet XML.
+
+Memory stays constant in the number of rows (no cell object graph); strings
+are written as inline strings, numbers as plain values, and date/time
+values with the built-in Excel number formats.
+"""
+import math
+import re
+import zipfile
+from datetime import date, datetime, time
+from typing import Iterable, Sequence
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# cellXfs: 0 general, 1 date (14), 2 time (21), 3 datetime (22)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+_EPOCH = datetime(1899, 12, 30)
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def col_letter(idx: int) -> str:
+    """0-based column index -> Excel column letters."""
+    s = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        s = chr(65 + rem) + s
+    return s
+
+
+def _cell(ref: str, v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, np.generic):
+        v = v.item()
+    if v != v:  # NaN / NaT
+        return ""
+    if isinstance(v, bool):
+        return f'<c r="{ref}" t="b"><v>{int(v)}</v></c>'
+    if isinstance(v, (int, float)):
+        if isinstance(v, float) and math.isinf(v):
+            return ""
+        return f'<c r="{ref}"><v>{v!r}</v></c>'
+    if isinstance(v, datetime):
+        serial = (v.replace(tzinfo=None) - _EPOCH).total_seconds() / 86400
+        return f'<c r="{ref}" s="3"><v>{serial!r}</v></c>'
+    if isinstance(v, date):
+        return f'<c r="{ref}" s="1"><v>{(v - _EPOCH.date()).days}</v></c>'
+    if isinstance(v, time):
+        serial = (v.hour * 3600 + v.minute * 60 + v.second + v.microsecond / 1e6) / 86400
+        return f'<c r="{ref}" s="2"><v>{serial!r}</v></c>'
+    text = _ILLEGAL_XML.sub("", str(v))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def write_xlsx(path: str, rows: Iterable[Sequence], sheet_name: str = "Sheet1", chunk_rows: int = 1000) -> int:
+    """Stream ``rows`` into a single-sheet workbook; returns the row count."""
+    letters = [col_letter(i) for i in range(64)]
+    n = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name, {'"': "&quot;"})))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as out:
+            out.write(_SHEET_HEAD.encode("utf-8"))
+            buf = []
+            for row in rows:
+                n += 1
+                if len(row) > len(letters):
+                    letters.extend(col_letter(i) for i in range(len(letters), len(row)))
+                cells = "".join(_cell(f"{letters[i]}{n}", v) for i, v in enumerate(row))
+                buf.append(f'<row r="{n}">{cells}</row>')
+                if len(buf) >= chunk_rows:
+                    out.write("".join(buf).encode("utf-8"))
+                    buf = []
+            if buf:
+                out.write("".join(buf).encode("utf-8"))
+            out.write(_SHEET_TAIL.encode("utf-8"))
+    return n
@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from job_archive import ingest, load_range  # noqa: E402
+from job_table import JobTable  # noqa: E402
+
+
+def _export(n_same):
+    # Export1 rows: no job id/client/instance, so distinct jobs can look identical
+    policy = ["ERP-DB"] * n_same + ["SFA"]
+    start = ["2026-01-20T01:00:00"] * (n_same + 1)
+    end = ["2026-01-20T02:00:00"] * (n_same + 1)
+    return JobTable.from_columns(policy=policy, start=start, end=end, kilobytes=[100] * n_same + [50])
+
+
+def test_identical_rows_in_one_export_are_kept(tmp_path):
+    assert ingest(_export(3), str(tmp_path)) == {"2026-01": 4}
+    table = load_range(str(tmp_path))
+    assert len(table) == 4
+    assert table.sum_kb_by_policy() == {"ERP-DB": 300, "SFA": 50}
+
+
+def test_reingesting_the_same_export_adds_nothing(tmp_path):
+    ingest(_export(3), str(tmp_path))
+    assert ingest(_export(3), str(tmp_path)) == {}
+    assert len(load_range(str(tmp_path))) == 4
+
+
+def test_more_copies_than_archived_adds_the_difference(tmp_path):
+    ingest(_export(2), str(tmp_path))
+    assert ingest(_export(3), str(tmp_path)) == {"2026-01": 1}
+    assert load_range(str(tmp_path)).sum_kb_by_policy() == {"ERP-DB": 300, "SFA": 50}
@@ -0,0 +1,134 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from job_table import KB_MISSING, normalize_kb  # noqa: E402
+from nbu_text import COLUMNS, aggregate_jobs, extract_jobs, header_layout  # noqa: E402
+
+# Jobs export as saved by the Korean admin console: cp949, CRLF, columns padded
+# by display width (2 per Hangul character = 2 cp949 bytes), Hangul cells
+# (schedule, client, 오전/오후 times) before the Kilobytes column.
+FIXTURE = os.path.join(os.path.dirname(__file__), "data", "nbu_jobs_cp949.txt")
+
+
+def _raw():
+    with open(FIXTURE, "rb") as f:
+        return f.read()
+
+
+NUMERIC = {"Job Id", "Status", "Attempt", "Kilobytes", "Parent Job ID"}
+WIDTH = {"Job Policy": 12, "End Time": 26, "Kilobytes": 12, "Instance or Database": 22}
+
+
+def _export(rows):
+    """cp949 Jobs export in the fixture's layout, one line per row dict (column name -> cell)."""
+    def line(cells, numeric=NUMERIC):
+        out = b""
+        for col in COLUMNS:
+            v = str(cells.get(col, "")).encode("cp949")
+            w = max(WIDTH.get(col, 0), len(col) + 2)
+            out += v.rjust(w - 2) + b"  " if col in numeric else v.ljust(w)
+        return out.rstrip()
+
+    lines = [line({c: c for c in COLUMNS}, numeric=()), b"-" * 80]
+    for r in rows:
+        lines.append(line({"End Time": "2026. 1. 20 오전 2:00:00", "Instance or Database": "", **r}))
+    return b"\r\n".join(lines) + b"\r\n"
+
+
+def test_kilobytes_span_is_sliced_by_bytes_on_hangul_rows():
+    raw = _raw()
+    lines = raw.splitlines()
+    spans, data_start = header_layout(lines)
+    _, s, e = next(span for span in spans if span[0] == "Kilobytes")
+    cells = [ln[s:e].decode("cp949").strip() for ln in lines[data_start:]]
+    assert cells == ["1,234,567", "", "98765", "2,048"]
+    # the same offsets on decoded text land elsewhere: Hangul is 2 bytes, 1 character
+    assert lines[data_start].decode("cp949")[s:e].strip() != "1,234,567"
+
+
+def test_extract_jobs_reads_sizes_from_the_real_layout():
+    stats = {}
+    jobs = extract_jobs(_raw(), stats=stats)
+    assert list(jobs.policy_names()) == ["ERP-APP", "SFA_MSSQL", "HZDB_MSSQL", "MAIL_NAS"]
+    assert [jobs.clients[c] for c in jobs.client] == ["erpdb01", "sfadb01", "영업서버", "메일서버"]
+    assert list(jobs.instance_names()) == ["ERPDB", "SFA", "SMS", ""]
+    assert jobs.kilobytes.tolist() == [1234567, KB_MISSING, 98765, 2048]
+    assert str(jobs.end[2]) == "2026-01-20T23:40:00"
+    assert stats == {"rows": 4, "kept": 4, "collapsed": 0, "bad_kb": 0}
+
+
+def test_normalize_kb_comma_and_blank_cells():
+    kb, bad = normalize_kb(["1,234,567", "", "  ", "98765", "2,048", "1,23", None])
+    assert kb.tolist() == [1234567, KB_MISSING, KB_MISSING, 98765, 2048, KB_MISSING, KB_MISSING]
+    assert bad.tolist() == [False, False, False, False, False, True, False]
+    assert kb.dtype == np.int64
+
+
+def test_retries_keep_the_last_successful_attempt():
+    stats = {}
+    jobs = extract_jobs(_export([
+        {"Job Id": 2001, "Attempt": 1, "Status": 58, "Job Policy": "ERP-APP", "Kilobytes": "100"},
+        {"Job Id": 2001, "Attempt": 2, "Status": 0, "Job Policy": "ERP-APP", "Kilobytes": "500"},
+        {"Job Id": 2001, "Attempt": 3, "Status": 13, "Job Policy": "ERP-APP", "Kilobytes": ""},
+        {"Job Id": 2002, "Attempt": 1, "Status": 96, "Job Policy": "SFA_MSSQL", "Kilobytes": "7"},
+        {"Job Id": 2002, "Attempt": 2, "Status": 96, "Job Policy": "SFA_MSSQL", "Kilobytes": "9"},
+        {"Job Id": 2003, "Attempt": 1, "Status": 0, "Job Policy": "MAIL_NAS", "Kilobytes": "1,000"},
+        {"Job Id": 2003, "Attempt": 1, "Status": 0, "Job Policy": "MAIL_NAS", "Kilobytes": "1,200"},
+    ]), stats=stats)
+    assert list(jobs.job_id) == [2001, 2002, 2003]
+    assert jobs.kilobytes.tolist() == [500, 9, 1200]
+    assert stats == {"rows": 7, "kept": 3, "collapsed": 4, "bad_kb": 0}
+
+
+def test_child_jobs_are_kept_per_parent():
+    rows = [
+        {"Job Id": 3001, "Parent Job ID": 3000, "Attempt": 1, "Status": 0, "Job Policy": "HZDB_MSSQL", "Kilobytes": "10"},
+        {"Job Id": 3001, "Parent Job ID": 3001, "Attempt": 1, "Status": 0, "Job Policy": "HZDB_MSSQL", "Kilobytes": "20"},
+        {"Job Id": 3001, "Parent Job ID": 3000, "Attempt": 2, "Status": 0, "Job Policy": "HZDB_MSSQL", "Kilobytes": "30"},
+    ]
+    assert extract_jobs(_export(rows)).kilobytes.tolist() == [30, 20]
+    assert extract_jobs(_export(rows), dedup=False).kilobytes.tolist() == [10, 20, 30]
+
+
+def _group_totals(jobs):
+    out = {}
+    for p, i, d, kb in zip(jobs.policy_names(), jobs.instance_names(), jobs.end_day(), jobs.kilobytes):
+        total, n = out.get((p, i, str(d)), (KB_MISSING, 0))
+        if kb != KB_MISSING:
+            total = kb if total == KB_MISSING else total + kb
+        out[(p, i, str(d))] = (total, n + 1)
+    return out
+
+
+def test_parallel_aggregate_matches_serial_extract(tmp_path):
+    # first attempts in the first half of the file, retries in the second half, so
+    # attempts of one job fall into different byte ranges
+    policies = [("ERP-APP", "ERPDB"), ("SFA_MSSQL", "SFA"), ("HZDB_MSSQL", "SMS"), ("MAIL_NAS", "")]
+    first, retry = [], []
+    for job in range(400):
+        policy, instance = policies[job % 4]
+        row = {"Job Id": 5000 + job, "Job Policy": policy, "Instance or Database": instance,
+               "End Time": f"2026. 1. {19 + job % 3} 오후 {1 + job % 11}:00:00"}
+        first.append({**row, "Attempt": 1, "Status": 58, "Kilobytes": f"{job * 7:,}"})
+        if job % 5:
+            size = "" if job % 13 == 0 else f"{job * 1000:,}"
+            retry.append({**row, "Attempt": 2, "Status": 0 if job % 7 else 96, "Kilobytes": size})
+    raw = _export(first + retry)
+    path = tmp_path / "jobs.txt"
+    path.write_bytes(raw)
+
+    serial_stats = {}
+    expected = _group_totals(extract_jobs(raw, stats=serial_stats))
+    for workers in (1, 4):
+        stats = {}
+        agg = aggregate_jobs(str(path), workers=workers, stats=stats)
+        got = {
+            (p, i, str(d)): (kb, n)
+            for p, i, d, kb, n in zip(agg.policy_names(), agg.instance_names(), agg.end_day(), agg.kilobytes, agg.extra["jobs"])
+        }
+        assert got == expected
+        assert stats == serial_stats
@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from nbu_txt_to_pdf import continuation_pages, page_layouts  # noqa: E402
+
+
+def _word(text, x, y, width=None):
+    return {"text": text, "xMin": x, "yMin": y, "xMax": x + (width or 8 * len(text)), "yMax": y + 10}
+
+
+def _table_page(*labels):
+    header = [_word("정책", 10, 100, 20), _word("백업용량", 200, 100, 40)]
+    return header + [_word(label, 10, 120 + 20 * i) for i, label in enumerate(labels)]
+
+
+ROWS = [{"label": "A"}, {"label": "B"}, {"label": "C"}]
+
+
+def test_cover_mentioning_volume_is_not_a_table():
+    cover = [_word("주간", 10, 50, 20), _word("백업용량", 33, 50, 40), _word("점검", 76, 50, 20), _word("A", 10, 80)]
+    layouts = page_layouts([cover, _table_page("A", "B")], ROWS)
+    assert layouts[0] == {}
+    assert set(layouts[1]) == {"A", "B"}
+
+
+def test_rows_spread_over_table_pages_in_order():
+    layouts = page_layouts([_table_page("A"), _table_page("A", "B", "C")], ROWS)
+    assert set(layouts[0]) == {"A"}
+    assert set(layouts[1]) == {"B", "C"}
+
+
+def test_continuation_pages_list_every_missing_row():
+    labels = [f"P{i}" for i in range(60)]
+    pages = continuation_pages(labels, {"P7": "1.50"}, 842, 595)
+    texts = [text for cells in pages for _, text in cells]
+    assert len(pages) > 1
+    assert all(label in texts for label in labels)
+    assert "1.50" in texts
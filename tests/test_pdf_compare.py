@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import pdf_layout  # noqa: E402
+from pdf_compare import column_masks  # noqa: E402
+
+
+def _word(text, x, y, width=None):
+    return {"text": text, "xMin": x, "yMin": y, "xMax": x + (width or 8 * len(text)), "yMax": y + 10}
+
+
+def test_volume_mask_matches_the_generator_column(monkeypatch):
+    # path | 백업용량 | result header: the generator fills between the path and result titles
+    table = [_word("정책", 10, 100, 20), _word("백업", 60, 100, 16), _word("대상", 80, 100, 16),
+             _word("및", 100, 100, 8), _word("경로", 112, 100, 16),
+             _word("백업용량", 200, 100, 40), _word("백업결과", 320, 100, 40)]
+    cover = [_word("주간", 10, 50, 20), _word("백업용량", 33, 50, 40), _word("점검", 76, 50, 20)]
+    monkeypatch.setattr(pdf_layout, "parse_bbox", lambda pdf: (595.0, 842.0, [cover, table]))
+
+    col_xmin, col_xmax, _ = pdf_layout.volume_column(table)
+    assert (col_xmin, col_xmax) == (130, 318)
+    assert column_masks("ref.pdf", ["백업용량"]) == [{"page": 2, "box": (130, 0.0, 318, 842.0)}]
@@ -0,0 +1,36 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from remarks import THRESHOLDS, build_remarks, compute_deltas, load_thresholds  # noqa: E402
+
+
+def test_absolute_threshold_keeps_the_plain_remark():
+    deltas = compute_deltas({"SFA_MSSQL": 100.0}, {"SFA_MSSQL": 80.0})
+    assert build_remarks(deltas) == {"SFA_MSSQL": "80GB -> 100GB (20GB증가)"}
+
+
+def test_relative_triggers_are_named():
+    deltas = compute_deltas({"SFA_MSSQL": 140.0}, {"SFA_MSSQL": 100.0})
+    remarks = build_remarks(deltas, {"default": {"abs_gb": 10, "pct": 30}})
+    assert remarks == {"SFA_MSSQL": "100GB -> 140GB (40GB증가) [pct +40.0%≥30%]"}
+
+
+def test_thresholds_file_is_merged_over_the_defaults(tmp_path):
+    path = tmp_path / "thresholds.json"
+    path.write_text(json.dumps({"SFA_MSSQL": {"abs_gb": 5, "pct": 30}}), encoding="utf-8")
+    thresholds = load_thresholds(str(path))
+    assert thresholds["default"] == THRESHOLDS["default"]
+    assert thresholds["ERP-APP"] is None
+    assert thresholds["SFA_MSSQL"] == {"abs_gb": 5, "pct": 30}
+
+
+def test_unknown_threshold_key_is_rejected(tmp_path):
+    path = tmp_path / "thresholds.json"
+    path.write_text(json.dumps({"default": {"abs": 10}}), encoding="utf-8")
+    with pytest.raises(ValueError, match="abs"):
+        load_thresholds(str(path))
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from job_table import JobTable  # noqa: E402
+from rollup import ingest, load_store, report_keys  # noqa: E402
+
+
+def _jobs(policy, kilobytes, instance=None, day="2026-01-20"):
+    n = len(policy)
+    end = [f"{day}T02:00:00"] * n
+    return JobTable.from_columns(policy=policy, start=end, end=end, kilobytes=kilobytes, instance=instance)
+
+
+def test_partial_day_does_not_overwrite_complete_day(tmp_path):
+    store = load_store(str(tmp_path / "rollup.json"))
+    ingest(store, _jobs(["ERP-APP"] * 3, [100, 100, 100]))
+    stats = {}
+    n = ingest(store, _jobs(["ERP-APP"], [100]), stats)
+    assert n == 0 and stats == {"written": 0, "partial": 1}
+    assert store["days"]["2026-01-20"]["ERP-APP"] == [300, 3]
+    assert store["periods"]["week"]["2026-01-19"]["ERP-APP"]["total"] == 300
+
+
+def test_same_or_more_jobs_replace_the_day(tmp_path):
+    store = load_store(str(tmp_path / "rollup.json"))
+    ingest(store, _jobs(["ERP-APP"] * 2, [100, 100]))
+    ingest(store, _jobs(["ERP-APP"] * 3, [100, 100, 50]))
+    assert store["days"]["2026-01-20"]["ERP-APP"] == [250, 3]
+
+
+def test_text_and_xlsx_exports_map_to_the_same_keys():
+    # text export: instance names; Export1.xlsx: no instance, HZDB split by size
+    text = report_keys(_jobs(
+        ["SFA_MSSQL", "SFA_MSSQL", "HZDB_MSSQL", "HZDB_MSSQL", "ERP-APP"],
+        [10, 99, 1500000, 9000, 5],
+        instance=["SFA", "OTHER", "SMS", "ReportServer", ""],
+    ))
+    xlsx = report_keys(_jobs(["SFA_MSSQL", "HZDB_MSSQL", "HZDB_MSSQL", "ERP-APP"], [10, 1500000, 9000, 5]))
+    assert text.sum_kb_by_policy() == xlsx.sum_kb_by_policy() == {
+        "SFA_MSSQL": 10, "HZDB_MSSQL_SMS": 1500000, "HZDB_MSSQL_ReportServer": 9000, "ERP-APP": 5,
+    }
+
+
+def test_rollup_ingest_path_does_not_need_reportlab():
+    # the runners install only pandas/openpyxl; the PDF renderer's deps must stay optional
+    code = (
+        "import sys; sys.modules['reportlab'] = None; sys.path.insert(0, sys.argv[1])\n"
+        "import rollup, nbu_text\n"
+        "rollup.report_key_rules()\n"
+    )
+    scripts = os.path.join(os.path.dirname(__file__), "..", "scripts")
+    subprocess.run([sys.executable, "-c", code, scripts], check=True)